@@ -4,3 +4,42 @@ from django.apps import AppConfig
 class AdsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.ads'
+
+    def ready(self):
+        # Register scheduled job handlers and live event audiences
+        from . import jobs, sse  # noqa: F401
+
+        from django.db.models.functions import JSONArray
+        from django.db.models.signals import post_delete, post_save
+
+        from apps.common.cache import cache_invalidation
+        from apps.common.changes import track_changes
+        from apps.users.leaderboard import on_ad_changed
+        from apps.users.profile_views import CONTRACTOR_STATS_TAG, profile_tag
+        from .models import Ad, AdRequest
+        from .permissions import visible_ad_requests, visible_ads
+        from .serializers import AdRequestSerializer, AdSerializer
+
+        # Every ad is listed to everyone while OPEN, so its id isn't private
+        track_changes("ad", Ad, AdSerializer, visible_ads)
+        track_changes(
+            "ad_request",
+            AdRequest,
+            AdRequestSerializer,
+            visible_ad_requests,
+            audience=JSONArray("contractor_id", "ad__creator_id"),
+        )
+
+        # Profiles list the customer's ads and the contractor's completed ads;
+        # the contractor list counts completed ads
+        cache_invalidation(
+            Ad,
+            related_tags=lambda ad: [profile_tag(pk) for pk in (ad.creator_id, ad.assigned_contractor_id) if pk]
+            + ([CONTRACTOR_STATS_TAG] if ad.assigned_contractor_id else []),
+            related_fields=("creator_id", "assigned_contractor_id"),
+        )
+        cache_invalidation(AdRequest)
+
+        # Completed-ad counts of the contractor summary (apps.users.leaderboard)
+        post_save.connect(on_ad_changed, sender=Ad, dispatch_uid="leaderboard-ad-save")
+        post_delete.connect(on_ad_changed, sender=Ad, dispatch_uid="leaderboard-ad-delete")
@@ -0,0 +1,146 @@
+"""
+Near-duplicate ad detection with MinHash + LSH.
+
+An ad's text (title + description, lowercased, punctuation folded to
+spaces) is cut into character SHINGLE_SIZE-grams. Its MinHash signature
+keeps, for each of NUM_PERM hash functions, the smallest hash over those
+shingles; the share of equal positions between two signatures estimates the
+Jaccard similarity of their shingle sets.
+
+The signature is split into BANDS bands of ROWS values. Each band hashes to
+an AdLSHBucket row indexed on (band, bucket), so finding candidates for a
+new ad is BANDS index lookups, however many ads exist. Pairs with Jaccard
+0.8 share a bucket with probability > 0.999, pairs at 0.3 with < 0.15;
+candidates are then confirmed against ADS_DUPLICATE_THRESHOLD.
+
+AdViewSet.create checks new ads against the creator's own and
+everyone else's OPEN ads and applies ADS_DUPLICATE_OWN_POLICY /
+ADS_DUPLICATE_OTHERS_POLICY ("block", "hint" or "off"; both default to
+"hint"). The check and the insert run under a per-creator FlightLock
+(apps.common.singleflight) held until the insert commits, so a creator's
+concurrent reposts on this host's workers see each other. Ads
+written in bulk (import) are indexed without a check;
+`backfill_ad_signatures` indexes existing ads.
+"""
+import hashlib
+import random
+import re
+import struct
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db.models import Q
+
+from .models import Ad, AdLSHBucket, AdSignature
+
+SHINGLE_SIZE = 5
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+DEFAULT_THRESHOLD = 0.8
+POLICIES = ("block", "hint", "off")
+
+# Universal hashing h(x) = (a * x + b) mod p over a Mersenne prime
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20260101)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+_PACK = struct.Struct(f"<{NUM_PERM}Q")
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def shingles(text: str) -> set:
+    normalized = _NON_WORD.sub(" ", text.lower()).strip()
+    if len(normalized) <= SHINGLE_SIZE:
+        return {normalized} if normalized else set()
+    return {normalized[i : i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+
+
+def ad_text(title: str, description: str) -> str:
+    return f"{title} {description}"
+
+
+def minhash(text: str) -> tuple:
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+        for shingle in shingles(text)
+    ]
+    if not hashes:
+        return (_PRIME,) * NUM_PERM
+    return tuple(min((a * x + b) % _PRIME for x in hashes) for a, b in _PERMUTATIONS)
+
+
+def similarity(left: tuple, right: tuple) -> float:
+    return sum(x == y for x, y in zip(left, right)) / NUM_PERM
+
+
+def band_buckets(signature: tuple) -> list:
+    """[(band, bucket)]; bucket is a signed 64-bit hash of the band's values."""
+    buckets = []
+    for band in range(BANDS):
+        raw = struct.pack(f"<{ROWS}Q", *signature[band * ROWS : (band + 1) * ROWS])
+        buckets.append((band, int.from_bytes(hashlib.blake2b(raw, digest_size=8).digest(), "little", signed=True)))
+    return buckets
+
+
+def get_threshold() -> float:
+    return getattr(settings, "ADS_DUPLICATE_THRESHOLD", DEFAULT_THRESHOLD)
+
+
+# ---------- index ----------
+
+def index_ads(ads, signatures=None):
+    """(Re)write signature and bucket rows of these ads. `signatures` maps ad pk to a precomputed one."""
+    signatures = signatures or {}
+    rows, buckets = [], []
+    for ad in ads:
+        signature = signatures.get(ad.pk) or minhash(ad_text(ad.title, ad.description))
+        rows.append(AdSignature(ad_id=ad.pk, minhash=_PACK.pack(*signature)))
+        buckets.extend(AdLSHBucket(ad_id=ad.pk, band=band, bucket=bucket) for band, bucket in band_buckets(signature))
+    ids = [row.ad_id for row in rows]
+    AdLSHBucket.objects.filter(ad_id__in=ids).delete()
+    AdSignature.objects.bulk_create(rows, update_conflicts=True, unique_fields=["ad"], update_fields=["minhash"])
+    AdLSHBucket.objects.bulk_create(buckets, batch_size=1000)
+
+
+# ---------- lookup ----------
+
+@dataclass
+class DuplicateCheck:
+    signature: tuple
+    own: list = field(default_factory=list)
+    others: list = field(default_factory=list)
+
+
+def find_duplicates(title: str, description: str, creator_id, exclude_id=None) -> DuplicateCheck:
+    """OPEN ads whose estimated similarity reaches ADS_DUPLICATE_THRESHOLD, best first."""
+    signature = minhash(ad_text(title, description))
+    check = DuplicateCheck(signature)
+
+    in_buckets = Q()
+    for band, bucket in band_buckets(signature):
+        in_buckets |= Q(band=band, bucket=bucket)
+    candidates = dict(
+        AdLSHBucket.objects.filter(in_buckets, ad__status=Ad.Status.OPEN)
+        .exclude(ad_id=exclude_id)
+        .values_list("ad_id", "ad__creator_id")
+        .distinct()
+    )
+    if not candidates:
+        return check
+
+    threshold = get_threshold()
+    scored = []
+    for ad_id, packed in AdSignature.objects.filter(ad_id__in=candidates).values_list("ad_id", "minhash"):
+        score = similarity(signature, _PACK.unpack(bytes(packed)))
+        if score >= threshold:
+            scored.append((score, ad_id))
+    for score, ad_id in sorted(scored, reverse=True):
+        (check.own if candidates[ad_id] == creator_id else check.others).append(ad_id)
+    return check
+
+
+def policy(kind: str) -> str:
+    value = getattr(settings, f"ADS_DUPLICATE_{kind.upper()}_POLICY", "hint")
+    return value if value in POLICIES else "hint"
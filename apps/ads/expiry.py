@@ -0,0 +1,59 @@
+"""
+Expiry policy: OPEN ads older than ADS_OPEN_EXPIRY_DAYS become CANCELED.
+
+The sweep walks the (status, created_at) index oldest-first in small chunks,
+one short transaction per chunk, so SQLite's write lock is never held long.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.common.changes import record_changes
+from apps.common.outbox import record_events
+
+from .models import Ad
+
+DEFAULT_EXPIRY_DAYS = 30
+DEFAULT_EXPIRY_CHUNK_SIZE = 500
+
+
+def get_expiry_days() -> int:
+    return getattr(settings, "ADS_OPEN_EXPIRY_DAYS", DEFAULT_EXPIRY_DAYS)
+
+
+def stale_open_ads(cutoff):
+    return Ad.objects.filter(status=Ad.Status.OPEN, created_at__lt=cutoff).order_by("created_at")
+
+
+def expire_stale_open_ads(days=None, chunk_size=None, pause=0.0, now=None) -> int:
+    """Cancel OPEN ads created more than `days` ago. Returns how many were canceled."""
+    days = get_expiry_days() if days is None else days
+    chunk_size = chunk_size or getattr(settings, "ADS_EXPIRY_CHUNK_SIZE", DEFAULT_EXPIRY_CHUNK_SIZE)
+    now = now or timezone.now()
+    cutoff = now - timedelta(days=days)
+
+    total = 0
+    while True:
+        with transaction.atomic():
+            ids = list(stale_open_ads(cutoff).values_list("id", flat=True)[:chunk_size])
+            if ids:
+                # status is re-checked so an ad assigned meanwhile is left alone
+                Ad.objects.filter(id__in=ids, status=Ad.Status.OPEN).update(
+                    status=Ad.Status.CANCELED, canceled_at=now, updated_at=now
+                )
+                # Only the ads this UPDATE canceled (they carry its timestamp) are logged
+                expired = list(
+                    Ad.objects.filter(id__in=ids, status=Ad.Status.CANCELED, canceled_at=now).values_list("id", flat=True)
+                )
+                if expired:
+                    record_events("ad.canceled", Ad, expired, expired=True)
+                    record_changes("ad", expired)
+                total += len(expired)
+        if len(ids) < chunk_size:
+            return total
+        if pause:
+            # let request writers in between chunks
+            time.sleep(pause)
@@ -0,0 +1,73 @@
+"""
+Recommended OPEN ads for a contractor.
+
+Affinity per category comes from ContractorCategoryStats (apps.users.leaderboard),
+which is kept current on ad completion and review writes, so nothing here
+reads the contractor's history. A request loads that small vector (one
+indexed query), the newest FEED_CANDIDATE_WINDOW OPEN ads (a scan of the
+(status, created_at) index) and scores the candidates in memory:
+
+    relevance = FEED_AFFINITY_WEIGHT * affinity(category) + (1 - FEED_AFFINITY_WEIGHT) * recency
+
+affinity is the category's share of the contractor's DONE ads times its
+rating score / 5, scaled so the best category is 1. recency halves every
+FEED_RECENCY_HALF_LIFE_HOURS. A contractor with no history gets plain
+recency order.
+"""
+import math
+
+from django.conf import settings
+from django.utils import timezone
+
+from apps.users.leaderboard import normalize_category
+from apps.users.models import ContractorCategoryStats
+
+from .models import Ad, AdRequest
+
+DEFAULT_CANDIDATE_WINDOW = 500
+DEFAULT_AFFINITY_WEIGHT = 0.7
+DEFAULT_RECENCY_HALF_LIFE_HOURS = 48
+
+
+def category_affinity(contractor_id) -> dict:
+    """{normalized category: affinity in 0..1} from the contractor's DONE ads and ratings."""
+    rows = list(
+        ContractorCategoryStats.objects.filter(contractor_id=contractor_id).values_list(
+            "category", "done_count", "score"
+        )
+    )
+    total = sum(done for _, done, _ in rows)
+    if not total:
+        return {}
+    raw = {category: done / total * score / 5 for category, done, score in rows}
+    best = max(raw.values())
+    return {category: value / best for category, value in raw.items()}
+
+
+def candidate_ads(contractor_id, window: int):
+    """Newest OPEN ads the contractor could still apply to."""
+    applied = AdRequest.objects.filter(contractor_id=contractor_id, status="APPLIED").values("ad_id")
+    return (
+        Ad.objects.filter(status=Ad.Status.OPEN)
+        .exclude(creator_id=contractor_id)
+        .exclude(id__in=applied)
+        .order_by("-created_at")[:window]
+    )
+
+
+def recommended_ads(contractor_id, now=None) -> list:
+    """Candidate ads, best first, each with a `relevance` attribute."""
+    window = getattr(settings, "FEED_CANDIDATE_WINDOW", DEFAULT_CANDIDATE_WINDOW)
+    weight = getattr(settings, "FEED_AFFINITY_WEIGHT", DEFAULT_AFFINITY_WEIGHT)
+    half_life = getattr(settings, "FEED_RECENCY_HALF_LIFE_HOURS", DEFAULT_RECENCY_HALF_LIFE_HOURS) * 3600
+    now = now or timezone.now()
+
+    affinity = category_affinity(contractor_id)
+    ads = list(candidate_ads(contractor_id, window))
+    for ad in ads:
+        age = max((now - ad.created_at).total_seconds(), 0.0)
+        recency = math.pow(0.5, age / half_life)
+        ad.relevance = weight * affinity.get(normalize_category(ad.category), 0.0) + (1 - weight) * recency
+    # sort is stable: ties keep newest first
+    ads.sort(key=lambda ad: ad.relevance, reverse=True)
+    return ads
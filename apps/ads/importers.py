@@ -0,0 +1,184 @@
+"""
+Bulk ad import from JSONL/CSV.
+
+Records are parsed as a stream, checked by a small hand-written validator
+(no serializer per row) and inserted with `bulk_create` one chunk per
+transaction. Bad rows are reported with their line number and skipped;
+they never abort the batch.
+"""
+import csv
+import json
+from dataclasses import dataclass, field
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.common.changes import record_changes
+from apps.common.outbox import record_events
+
+from .dedup import index_ads
+from .models import Ad
+
+User = get_user_model()
+
+IMPORT_CHUNK_SIZE = 1000
+IMPORT_FORMATS = ("jsonl", "csv")
+# Only pre-assignment statuses: ASSIGNED/DONE need contractor + timestamps,
+# so DONE (and its completed_at) never comes in through an import
+IMPORT_STATUSES = (Ad.Status.OPEN, Ad.Status.CANCELED)
+MAX_REPORTED_ERRORS = 1000
+
+TITLE_MAX = Ad._meta.get_field("title").max_length
+CATEGORY_MAX = Ad._meta.get_field("category").max_length
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    failed: int = 0
+    errors: list = field(default_factory=list)
+
+    def add_error(self, line: int, errors: dict):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "errors": errors})
+
+    def as_dict(self) -> dict:
+        return {"created": self.created, "failed": self.failed, "errors": self.errors}
+
+
+def iter_records(lines, input_format: str):
+    """
+    Yield (line_number, record) from an iterable of text lines.
+    `record` is a dict, or a string describing why the line couldn't be parsed.
+    """
+    if input_format == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, record
+        return
+
+    for line_no, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield line_no, "Invalid JSON."
+            continue
+        yield line_no, record if isinstance(record, dict) else "Expected a JSON object."
+
+
+def validate_record(record: dict, default_creator_id=None):
+    """Return (Ad kwargs, None) or (None, {field: message})."""
+    errors = {}
+
+    title = str(record.get("title") or "").strip()
+    if not title:
+        errors["title"] = "This field is required."
+    elif len(title) > TITLE_MAX:
+        errors["title"] = f"At most {TITLE_MAX} characters."
+
+    description = str(record.get("description") or "").strip()
+    if not description:
+        errors["description"] = "This field is required."
+
+    category = str(record.get("category") or "").strip()
+    if len(category) > CATEGORY_MAX:
+        errors["category"] = f"At most {CATEGORY_MAX} characters."
+
+    ad_status = record.get("status") or Ad.Status.OPEN
+    if ad_status not in IMPORT_STATUSES:
+        errors["status"] = f"Must be one of: {', '.join(IMPORT_STATUSES)}."
+
+    canceled_at = None
+    if ad_status == Ad.Status.CANCELED:
+        canceled_at, error = _parse_timestamp(record.get("canceled_at"))
+        if error:
+            errors["canceled_at"] = error
+
+    creator_id = record.get("creator") or default_creator_id
+    try:
+        creator_id = int(creator_id)
+    except (TypeError, ValueError):
+        errors["creator"] = "A valid user id is required."
+
+    if errors:
+        return None, errors
+    return {
+        "title": title,
+        "description": description,
+        "category": category,
+        "status": ad_status,
+        "canceled_at": canceled_at,
+        "creator_id": creator_id,
+    }, None
+
+
+def _parse_timestamp(value):
+    """Return (aware datetime, None) or (None, message); a missing value means now."""
+    if not value:
+        return timezone.now(), None
+    try:
+        moment = parse_datetime(str(value))
+    except ValueError:
+        moment = None
+    if moment is None:
+        return None, "Use an ISO datetime."
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    if moment > timezone.now():
+        return None, "Cannot be in the future."
+    return moment, None
+
+
+def _flush(pending: list, result: ImportResult):
+    # One query to check all creators of the chunk instead of one per row
+    creator_ids = {kwargs["creator_id"] for _, kwargs in pending}
+    roles = dict(User.objects.filter(id__in=creator_ids).values_list("id", "role"))
+
+    ads = []
+    for line_no, kwargs in pending:
+        role = roles.get(kwargs["creator_id"])
+        if role is None:
+            result.add_error(line_no, {"creator": "User does not exist."})
+        elif role != User.Role.CUSTOMER:
+            # Ads belong to customers; contractor/support accounts never own one
+            result.add_error(line_no, {"creator": "Only customers can own ads."})
+        else:
+            ads.append(Ad(**kwargs))
+
+    with transaction.atomic():
+        Ad.objects.bulk_create(ads)
+        # Indexed for later duplicate checks; imported rows themselves are not checked
+        index_ads(ads)
+        ids = [ad.pk for ad in ads]
+        record_events("ad.created", Ad, ids, imported=True)
+        record_changes("ad", ids)
+    result.created += len(ads)
+
+
+def import_ads(lines, input_format="jsonl", chunk_size=IMPORT_CHUNK_SIZE, default_creator_id=None) -> ImportResult:
+    result = ImportResult()
+    pending = []
+
+    for line_no, record in iter_records(lines, input_format):
+        if isinstance(record, str):
+            result.add_error(line_no, {"non_field_errors": record})
+            continue
+
+        kwargs, errors = validate_record(record, default_creator_id)
+        if errors:
+            result.add_error(line_no, errors)
+            continue
+
+        pending.append((line_no, kwargs))
+        if len(pending) >= chunk_size:
+            _flush(pending, result)
+            pending = []
+
+    if pending:
+        _flush(pending, result)
+    return result
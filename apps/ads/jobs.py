@@ -0,0 +1,65 @@
+"""
+Time-based ad workflow, run by `manage.py run_jobs`:
+- auto-confirm: a reported-done ad the customer never confirms becomes DONE
+  after ADS_AUTO_CONFIRM_AFTER_HOURS.
+- reminder: `ad_reminder_due` fires ADS_REMINDER_BEFORE_HOURS before scheduled_at.
+Handlers re-check the ad, so a job for an ad that moved on is a no-op.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from apps.common.changes import record_changes
+from apps.common.jobs import job_handler, schedule_job
+from apps.common.outbox import record_events
+from apps.users.leaderboard import refresh_contractor_stats
+
+from .models import Ad
+from .signals import ad_reminder_due
+
+logger = logging.getLogger(__name__)
+
+AUTO_CONFIRM_JOB = "ads.auto_confirm"
+REMINDER_JOB = "ads.reminder"
+
+DEFAULT_AUTO_CONFIRM_AFTER_HOURS = 72
+DEFAULT_REMINDER_BEFORE_HOURS = 24
+
+
+def schedule_auto_confirm(ad: Ad):
+    hours = getattr(settings, "ADS_AUTO_CONFIRM_AFTER_HOURS", DEFAULT_AUTO_CONFIRM_AFTER_HOURS)
+    schedule_job(AUTO_CONFIRM_JOB, ad.pk, ad.work_reported_done_at + timedelta(hours=hours))
+
+
+def schedule_reminder(ad: Ad):
+    hours = getattr(settings, "ADS_REMINDER_BEFORE_HOURS", DEFAULT_REMINDER_BEFORE_HOURS)
+    run_at = ad.scheduled_at - timedelta(hours=hours)
+    if run_at > timezone.now():
+        schedule_job(REMINDER_JOB, ad.pk, run_at)
+
+
+@job_handler(AUTO_CONFIRM_JOB)
+def auto_confirm(ad_id: int):
+    now = timezone.now()
+    with transaction.atomic():
+        # Same preconditions as AdViewSet.confirm_completion, checked in the UPDATE itself
+        updated = Ad.objects.filter(id=ad_id, status=Ad.Status.ASSIGNED, work_reported_done_at__isnull=False).update(
+            status=Ad.Status.DONE, completed_at=now, updated_at=now
+        )
+        if updated:
+            record_events("ad.completed", Ad, [ad_id], auto=True)
+            record_changes("ad", [ad_id])
+            # An UPDATE sends no post_save: count the completed ad ourselves
+            refresh_contractor_stats(Ad.objects.filter(id=ad_id).values_list("assigned_contractor_id", flat=True))
+
+
+@job_handler(REMINDER_JOB)
+def remind(ad_id: int):
+    ad = Ad.objects.filter(id=ad_id, status=Ad.Status.ASSIGNED).first()
+    if ad is None or ad.scheduled_at is None or ad.scheduled_at < timezone.now():
+        return
+    logger.info("Reminder: ad %s is scheduled at %s", ad.pk, ad.scheduled_at)
+    ad_reminder_due.send(sender=Ad, ad=ad)
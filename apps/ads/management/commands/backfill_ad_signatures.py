@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.ads.dedup import index_ads
+from apps.ads.models import Ad
+
+
+class Command(BaseCommand):
+    help = (
+        "Compute MinHash signatures and LSH buckets for ads that have none (or for every ad with "
+        "--rebuild), in pk-ordered chunks with one short transaction each."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--rebuild", action="store_true", help="Recompute existing signatures too.")
+        parser.add_argument("--open-only", action="store_true", help="Only OPEN ads (the ones checked against).")
+
+    def handle(self, *args, **opts):
+        ads = Ad.objects.order_by("pk").only("pk", "title", "description")
+        if not opts["rebuild"]:
+            ads = ads.filter(signature__isnull=True)
+        if opts["open_only"]:
+            ads = ads.filter(status=Ad.Status.OPEN)
+
+        total = 0
+        last = 0
+        while True:
+            chunk = list(ads.filter(pk__gt=last)[: opts["chunk_size"]])
+            if not chunk:
+                break
+            with transaction.atomic():
+                index_ads(chunk)
+            total += len(chunk)
+            last = chunk[-1].pk
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} ads."))
@@ -0,0 +1,82 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from apps.ads.models import Ad
+from apps.common.batch import BULK_ACTION_MAX_IDS
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time POST /api/ads/batch-cancel/ on a batch of OPEN/ASSIGNED ads through the full "
+        "request path (UPDATE, outbox, change log, cache tags, rollups). Each run seeds its "
+        "ads inside a transaction that is rolled back, so the database is left unchanged."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ads", type=int, default=BULK_ACTION_MAX_IDS)
+        parser.add_argument("--categories", type=int, default=7)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **opts):
+        if not 1 <= opts["ads"] <= BULK_ACTION_MAX_IDS:
+            raise CommandError(f"--ads must be between 1 and {BULK_ACTION_MAX_IDS}.")
+        if opts["categories"] < 1 or opts["repeat"] < 1:
+            raise CommandError("--categories and --repeat must be positive.")
+
+        timings = []
+        # DEBUG would keep every SQL query in memory
+        with override_settings(DEBUG=False, ALLOWED_HOSTS=["testserver"]):
+            for _ in range(opts["repeat"]):
+                try:
+                    with transaction.atomic():
+                        timings.append(self.run_once(opts["ads"], opts["categories"]))
+                        raise Rollback
+                except Rollback:
+                    pass
+
+        self.stdout.write(
+            f"batch-cancel of {opts['ads']} ads: best {min(timings) * 1000:.0f} ms, "
+            f"median {sorted(timings)[len(timings) // 2] * 1000:.0f} ms"
+        )
+
+    def run_once(self, count, categories) -> float:
+        customer, contractor, support = (
+            User.objects.create(
+                username=f"bench-{role}", email=f"bench-{role}@example.com", phone=f"bench-{role}", password="!", role=role
+            )
+            for role in ("CUSTOMER", "CONTRACTOR", "SUPPORT")
+        )
+        ads = Ad.objects.bulk_create(
+            [
+                Ad(
+                    creator=customer,
+                    title=f"Bench {i}",
+                    description="-",
+                    category=f"cat{i % categories}",
+                    status="ASSIGNED" if i % 3 == 0 else "OPEN",
+                    assigned_contractor=contractor if i % 3 == 0 else None,
+                )
+                for i in range(count)
+            ],
+            batch_size=5000,
+        )
+
+        client = APIClient()
+        client.force_authenticate(user=support)
+        started = time.perf_counter()
+        response = client.post("/api/ads/batch-cancel/", {"ids": [ad.id for ad in ads]}, format="json")
+        elapsed = time.perf_counter() - started
+        if response.status_code != 200 or len(response.data["updated"]) != count:
+            raise CommandError(f"Unexpected response {response.status_code}: {response.data}")
+        return elapsed
@@ -0,0 +1,27 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.ads.expiry import expire_stale_open_ads, get_expiry_days, stale_open_ads
+
+
+class Command(BaseCommand):
+    help = "Cancel OPEN ads older than ADS_OPEN_EXPIRY_DAYS, in small chunks with short transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, help="Override ADS_OPEN_EXPIRY_DAYS.")
+        parser.add_argument("--chunk-size", type=int)
+        parser.add_argument("--pause", type=float, default=0.0, help="Seconds to sleep between chunks.")
+        parser.add_argument("--dry-run", action="store_true", help="Only count the ads that would expire.")
+
+    def handle(self, *args, **opts):
+        days = get_expiry_days() if opts["days"] is None else opts["days"]
+
+        if opts["dry_run"]:
+            count = stale_open_ads(timezone.now() - timedelta(days=days)).count()
+            self.stdout.write(f"{count} OPEN ads are older than {days} days.")
+            return
+
+        count = expire_stale_open_ads(days=days, chunk_size=opts["chunk_size"], pause=opts["pause"])
+        self.stdout.write(self.style.SUCCESS(f"Canceled {count} OPEN ads older than {days} days."))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from apps.ads.importers import IMPORT_CHUNK_SIZE, IMPORT_FORMATS, import_ads
+
+
+class Command(BaseCommand):
+    help = "Bulk import ads from a JSONL or CSV file (chunked bulk_create, bad rows are reported and skipped)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--input", choices=IMPORT_FORMATS, default="jsonl")
+        parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+        parser.add_argument("--creator", type=int, help="Creator for rows without a creator column.")
+
+    def handle(self, *args, **opts):
+        with open(opts["path"], encoding="utf-8", newline="") as fh:
+            result = import_ads(
+                fh,
+                input_format=opts["input"],
+                chunk_size=opts["chunk_size"],
+                default_creator_id=opts["creator"],
+            )
+
+        for error in result.errors:
+            self.stderr.write(f"line {error['line']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(f"Created {result.created} ads, {result.failed} rows failed."))
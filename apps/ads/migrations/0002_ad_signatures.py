@@ -0,0 +1,33 @@
+# Generated by Django 5.2.9 on 2026-10-19 03:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ads', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdSignature',
+            fields=[
+                ('ad', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='signature', serialize=False, to='ads.ad')),
+                ('minhash', models.BinaryField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AdLSHBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField()),
+                ('bucket', models.BigIntegerField()),
+                ('ad', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lsh_buckets', to='ads.ad')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['band', 'bucket', 'ad'], name='ads_lsh_bucket_idx')],
+            },
+        ),
+    ]
@@ -141,3 +141,29 @@ class AdRequest(models.Model):
 
     def __str__(self) -> str:
         return f"AdRequest#{self.pk} ad={self.ad_id} contractor={self.contractor_id} ({self.status})"
+
+
+class AdSignature(models.Model):
+    """MinHash signature of an ad's title + description (see apps.ads.dedup)."""
+
+    ad = models.OneToOneField(Ad, on_delete=models.CASCADE, primary_key=True, related_name="signature")
+    minhash = models.BinaryField()
+
+    def __str__(self) -> str:
+        return f"Signature of ad={self.ad_id}"
+
+
+class AdLSHBucket(models.Model):
+    """One LSH band of an ad's signature: ads sharing (band, bucket) are near-duplicate candidates."""
+
+    ad = models.ForeignKey(Ad, on_delete=models.CASCADE, related_name="lsh_buckets")
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["band", "bucket", "ad"], name="ads_lsh_bucket_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"Band {self.band} bucket {self.bucket} of ad={self.ad_id}"
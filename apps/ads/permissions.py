@@ -1,6 +1,36 @@
+from django.db.models import Q
 from rest_framework.permissions import BasePermission
 from apps.users.permissions import is_admin, is_support
 
+from .models import Ad, AdRequest
+
+
+def visible_ads(user):
+    """
+    Queryset version of CanViewAd (used by AdViewSet and the change feed).
+    """
+    qs = Ad.objects.all()
+
+    if is_admin(user) or is_support(user):
+        return qs
+
+    own = Q(creator=user)
+    open_ads = Q(status="OPEN")
+    contractor_assigned_or_done = Q(status__in=["ASSIGNED", "DONE"], assigned_contractor=user)
+
+    # CANCELED only visible to owner/support/admin (NOT contractor) :contentReference[oaicite:3]{index=3}
+    return qs.filter(own | open_ads | contractor_assigned_or_done).distinct()
+
+
+def visible_ad_requests(user):
+    """
+    Requests are visible to the contractor who sent them, the ad owner and support/admin.
+    """
+    qs = AdRequest.objects.all()
+    if is_admin(user) or is_support(user):
+        return qs
+    return qs.filter(Q(contractor=user) | Q(ad__creator=user))
+
 
 class IsAdOwnerOrAdmin(BasePermission):
     def has_object_permission(self, request, view, obj) -> bool:
@@ -1,8 +1,12 @@
 from rest_framework import serializers
+
+from apps.common.expand import ExpandableSerializerMixin
+from apps.common.fieldsets import SparseFieldsetSerializerMixin
+from apps.users.serializers import UserNonSensitiveSerializer
 from .models import Ad, AdRequest
 
 
-class AdSerializer(serializers.ModelSerializer):
+class AdSerializer(ExpandableSerializerMixin, SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     creator = serializers.PrimaryKeyRelatedField(read_only=True)
     assigned_contractor = serializers.PrimaryKeyRelatedField(read_only=True)
 
@@ -36,6 +40,11 @@ class AdSerializer(serializers.ModelSerializer):
             "updated_at",
         )
 
+    expandable_fields = {
+        "creator": UserNonSensitiveSerializer,
+        "assigned_contractor": UserNonSensitiveSerializer,
+    }
+
     def validate(self, attrs):
         # Prevent direct edits of workflow fields via PATCH/PUT:
         if self.instance:
@@ -77,11 +86,25 @@ class AdAssignSerializer(serializers.Serializer):
     location = serializers.CharField(max_length=255)
 
 
+class AdImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    input = serializers.ChoiceField(choices=["jsonl", "csv"], default="jsonl")
+    chunk_size = serializers.IntegerField(min_value=1, max_value=10000, default=1000)
+    creator = serializers.IntegerField(required=False, help_text="Creator for rows without a creator column.")
+
+
 class AdReviewCreateSerializer(serializers.Serializer):
     rating = serializers.IntegerField(min_value=1, max_value=5)
     comment = serializers.CharField(required=False, allow_blank=True)
 
 
+class RecommendedAdSerializer(AdSerializer):
+    relevance = serializers.FloatField(read_only=True)
+
+    class Meta(AdSerializer.Meta):
+        fields = AdSerializer.Meta.fields + ("relevance",)
+
+
 class AdSummarySerializer(serializers.ModelSerializer):
     """
     Lightweight serializer for profile endpoints (avoid huge nested payloads).
@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent by the scheduler shortly before an assigned ad's scheduled_at.
+# kwargs: ad (Ad)
+ad_reminder_due = Signal()
@@ -0,0 +1,35 @@
+"""
+Who gets live status events (apps.common.sse) for ads and ad requests:
+the customer, the assigned contractor and contractors with an active request.
+"""
+from collections import defaultdict
+
+from apps.common.sse import event_audience
+
+from .models import Ad, AdRequest
+
+
+@event_audience("ad")
+def ad_audience(ids) -> dict:
+    audience = defaultdict(set)
+    for ad_id, creator_id, contractor_id in Ad.objects.filter(id__in=ids).values_list(
+        "id", "creator_id", "assigned_contractor_id"
+    ):
+        audience[ad_id].add(creator_id)
+        if contractor_id:
+            audience[ad_id].add(contractor_id)
+    for ad_id, contractor_id in AdRequest.objects.filter(
+        ad_id__in=ids, status=AdRequest.Status.APPLIED
+    ).values_list("ad_id", "contractor_id"):
+        audience[ad_id].add(contractor_id)
+    return audience
+
+
+@event_audience("adrequest")
+def ad_request_audience(ids) -> dict:
+    return {
+        request_id: {contractor_id, creator_id}
+        for request_id, contractor_id, creator_id in AdRequest.objects.filter(id__in=ids).values_list(
+            "id", "contractor_id", "ad__creator_id"
+        )
+    }
@@ -1,12 +1,36 @@
+import json
+import os
+import tempfile
 from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from apps.common import outbox
+from apps.common.batch import BULK_ACTION_MAX_IDS
+from apps.common.cache import cache_stats
+from apps.common.jobs import run_due_jobs
+from apps.common.models import ChangeLogEntry, OutboxEvent, OutboxOffset, ScheduledJob
+from apps.common.singleflight import FlightLock
+
+from . import dedup
+from .dedup import ad_text
+from .expiry import expire_stale_open_ads
+from .models import Ad, AdLSHBucket, AdRequest, AdSignature
+from .signals import ad_reminder_due
+
 User = get_user_model()
 
 
@@ -53,8 +77,16 @@ class AdWorkflowTests(APITestCase):
         self.assertIn(res.status_code, (status.HTTP_200_OK, status.HTTP_201_CREATED))
         self.assertEqual(res.data["status"], "APPLIED")
 
-        # customer assigns
+        # customer sees the request (streamed list)
         self.client.force_authenticate(user=self.customer)
+        res = self.client.get(reverse("ad-requests", kwargs={"pk": ad_id}))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        # Served through WSGI: a sync stream, sent as it is produced
+        self.assertFalse(res.is_async)
+        requests = json.loads(b"".join(res.streaming_content))
+        self.assertEqual([r["contractor"] for r in requests], [self.contractor.id])
+
+        # customer assigns
         scheduled_at = (timezone.now() + timedelta(days=1)).strftime("%Y-%m-%dT%H:%M:%SZ")
         res = self.client.post(
             reverse("ad-assign", kwargs={"pk": ad_id}),
@@ -105,3 +137,750 @@ class AdWorkflowTests(APITestCase):
         res = self.client.get(reverse("ad-detail", kwargs={"pk": ad_id}))
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data["status"], "CANCELED")
+
+
+class AdSparseFieldsetTests(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username="customerF",
+            email="customerF@example.com",
+            phone="09000000110",
+            password="CustomerPass123",
+            role="CUSTOMER",
+        )
+        self.client.force_authenticate(user=self.customer)
+        self.client.post(
+            reverse("ad-list"),
+            {"title": "Fix sink", "description": "Leaking " * 100, "category": "plumbing"},
+            format="json",
+        )
+
+    def test_fields_param_narrows_response_and_sql(self):
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(reverse("ad-list"), {"fields": "id,title,status"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(res.data["results"][0]), {"id", "title", "status"})
+
+        select = [q["sql"] for q in ctx.captured_queries if '"ads_ad"."title"' in q["sql"]][0]
+        self.assertNotIn('"ads_ad"."description"', select)
+
+    def test_omit_param_drops_fields(self):
+        res = self.client.get(reverse("ad-list"), {"omit": "description,updated_at"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        row = res.data["results"][0]
+        self.assertNotIn("description", row)
+        self.assertNotIn("updated_at", row)
+        self.assertIn("title", row)
+
+
+class AdExpandTests(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username="customerE",
+            email="customerE@example.com",
+            phone="09000000120",
+            password="CustomerPass123",
+            role="CUSTOMER",
+        )
+        self.contractor = User.objects.create_user(
+            username="contractorE",
+            email="contractorE@example.com",
+            phone="09000000121",
+            password="ContractorPass123",
+            role="CONTRACTOR",
+        )
+        for i in range(5):
+            Ad.objects.create(
+                creator=self.customer,
+                title=f"Ad {i}",
+                description="Leaking",
+                status="ASSIGNED",
+                assigned_contractor=self.contractor,
+            )
+        self.client.force_authenticate(user=self.customer)
+
+    def test_expand_embeds_users_with_constant_queries(self):
+        for name in ("creator", "assigned_contractor"):
+            with self.subTest(expand=name):
+                # COUNT + page SELECT, whatever the page size
+                with self.assertNumQueries(2):
+                    res = self.client.get(reverse("ad-list"), {"expand": name})
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                self.assertEqual(len(res.data["results"]), 5)
+                self.assertIn("username", res.data["results"][0][name])
+
+    def test_expand_combines_with_sparse_fieldset(self):
+        with self.assertNumQueries(2):
+            res = self.client.get(reverse("ad-list"), {"fields": "id,creator", "expand": "creator"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(res.data["results"][0]), {"id", "creator"})
+        self.assertEqual(res.data["results"][0]["creator"]["id"], self.customer.id)
+
+
+class AdBatchTests(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username="customerB",
+            email="customerB@example.com",
+            phone="09000000130",
+            password="CustomerPass123",
+            role="CUSTOMER",
+        )
+        self.contractor = User.objects.create_user(
+            username="contractorB",
+            email="contractorB@example.com",
+            phone="09000000131",
+            password="ContractorPass123",
+            role="CONTRACTOR",
+        )
+        self.open_ads = [
+            Ad.objects.create(creator=self.customer, title=f"Ad {i}", description="Leaking") for i in range(3)
+        ]
+        self.canceled = Ad.objects.create(
+            creator=self.customer, title="Gone", description="Leaking", status="CANCELED"
+        )
+
+    def test_batch_returns_request_order_with_not_found_markers(self):
+        self.client.force_authenticate(user=self.contractor)
+        a, b, c = (ad.id for ad in self.open_ads)
+        ids = [c, self.canceled.id, a, 999999, b]
+
+        with self.assertNumQueries(1):
+            res = self.client.get(reverse("ad-batch"), {"ids": ",".join(map(str, ids))})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([row and row["id"] for row in res.data["results"]], [c, None, a, None, b])
+        self.assertEqual(res.data["not_found"], [self.canceled.id, 999999])
+
+    def test_batch_rejects_too_many_ids(self):
+        self.client.force_authenticate(user=self.customer)
+        res = self.client.get(reverse("ad-batch"), {"ids": ",".join(str(i) for i in range(1, 202))})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_batch_and_bulk_actions_reject_out_of_range_ids(self):
+        self.client.force_authenticate(user=self.customer)
+        res = self.client.get(reverse("ad-batch"), {"ids": "99999999999999999999"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("ids", res.data)
+
+        support = User.objects.create_user(
+            username="supportB",
+            email="supportB@example.com",
+            phone="09000000132",
+            password="SupportPass123",
+            role="SUPPORT",
+        )
+        self.client.force_authenticate(user=support)
+        res = self.client.post(reverse("ad-batch-cancel"), {"ids": [99999999999999999999]}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AdColumnarRendererTests(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username="customerC",
+            email="customerC@example.com",
+            phone="09000000140",
+            password="CustomerPass123",
+            role="CUSTOMER",
+        )
+        for i in range(3):
+            Ad.objects.create(creator=self.customer, title=f"Ad {i}", description="Leaking")
+        self.client.force_authenticate(user=self.customer)
+
+    def test_columnar_list_keeps_pagination_and_sends_keys_once(self):
+        res = self.client.get(
+            reverse("ad-list"),
+            {"fields": "id,title"},
+            HTTP_ACCEPT="application/vnd.columnar+json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res["Content-Type"], "application/vnd.columnar+json")
+
+        body = json.loads(res.content)
+        self.assertEqual(body["count"], 3)
+        self.assertIn("next", body)
+        self.assertEqual(body["fields"], ["id", "title"])
+        self.assertEqual(sorted(row[1] for row in body["rows"]), ["Ad 0", "Ad 1", "Ad 2"])
+
+    def test_plain_json_is_still_the_default(self):
+        res = self.client.get(reverse("ad-list"))
+        self.assertEqual(res["Content-Type"], "application/json")
+        self.assertIn("results", res.json())
+
+
+class AdBulkImportTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username="adminI",
+            email="adminI@example.com",
+            phone="09000000150",
+            password="AdminPass123",
+        )
+        self.customer = User.objects.create_user(
+            username="customerI",
+            email="customerI@example.com",
+            phone="09000000151",
+            password="CustomerPass123",
+            role="CUSTOMER",
+        )
+
+    def test_admin_imports_jsonl_and_bad_rows_are_reported(self):
+        lines = [
+            json.dumps({"title": "Fix sink", "description": "Leaking", "category": "plumbing", "creator": self.customer.id}),
+            json.dumps({"title": "", "description": "No title", "creator": self.customer.id}),
+            "{not json",
+            json.dumps({"title": "Paint wall", "description": "Blue", "creator": 999999}),
+            json.dumps({"title": "Fix door", "description": "Squeaks", "creator": self.customer.id, "status": "CANCELED"}),
+        ]
+        upload = SimpleUploadedFile("ads.jsonl", "\n".join(lines).encode(), content_type="application/x-ndjson")
+
+        self.client.force_authenticate(user=self.admin)
+        res = self.client.post(reverse("ad-bulk-import"), {"file": upload, "chunk_size": 2}, format="multipart")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["created"], 2)
+        self.assertEqual(res.data["failed"], 3)
+        self.assertEqual([e["line"] for e in res.data["errors"]], [2, 3, 4])
+        self.assertEqual(set(Ad.objects.values_list("title", flat=True)), {"Fix sink", "Fix door"})
+
+    def test_import_requires_customer_creator_and_stamps_canceled_at(self):
+        contractor = User.objects.create_user(
+            username="contractorI",
+            email="contractorI@example.com",
+            phone="09000000152",
+            password="ContractorPass123",
+            role="CONTRACTOR",
+        )
+        lines = [
+            json.dumps({"title": "Fix sink", "description": "Leaking", "creator": contractor.id}),
+            json.dumps({"title": "Fix door", "description": "Squeaks", "creator": self.customer.id, "status": "CANCELED"}),
+            json.dumps(
+                {
+                    "title": "Fix roof",
+                    "description": "Drips",
+                    "creator": self.customer.id,
+                    "status": "CANCELED",
+                    "canceled_at": "2026-01-02T03:04:05Z",
+                }
+            ),
+            json.dumps(
+                {"title": "Fix tap", "description": "Drips", "creator": self.customer.id, "status": "CANCELED", "canceled_at": "soon"}
+            ),
+        ]
+        upload = SimpleUploadedFile("ads.jsonl", "\n".join(lines).encode(), content_type="application/x-ndjson")
+
+        self.client.force_authenticate(user=self.admin)
+        res = self.client.post(reverse("ad-bulk-import"), {"file": upload}, format="multipart")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["created"], 2)
+        self.assertEqual(
+            [(e["line"], list(e["errors"])) for e in res.data["errors"]],
+            [(4, ["canceled_at"]), (1, ["creator"])],
+        )
+        self.assertIsNotNone(Ad.objects.get(title="Fix door").canceled_at)
+        self.assertEqual(Ad.objects.get(title="Fix roof").canceled_at.isoformat(), "2026-01-02T03:04:05+00:00")
+
+    def test_customer_cannot_import(self):
+        upload = SimpleUploadedFile("ads.jsonl", b"", content_type="application/x-ndjson")
+        self.client.force_authenticate(user=self.customer)
+        res = self.client.post(reverse("ad-bulk-import"), {"file": upload}, format="multipart")
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_import_command_reads_csv(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, newline="") as fh:
+            fh.write("title,description,category\nFix sink,Leaking,plumbing\nBroken,,\n")
+        out, err = StringIO(), StringIO()
+        call_command("import_ads", fh.name, "--input", "csv", "--creator", str(self.customer.id), stdout=out, stderr=err)
+        os.unlink(fh.name)
+
+        self.assertIn("Created 1 ads, 1 rows failed.", out.getvalue())
+        self.assertIn("line 3", err.getvalue())
+        self.assertEqual(Ad.objects.get().creator_id, self.customer.id)
+
+
+class AdBatchCancelTests(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username="customerBC",
+            email="customerBC@example.com",
+            phone="09000000160",
+            password="CustomerPass123",
+            role="CUSTOMER",
+        )
+        self.contractor = User.objects.create_user(
+            username="contractorBC",
+            email="contractorBC@example.com",
+            phone="09000000161",
+            password="ContractorPass123",
+            role="CONTRACTOR",
+        )
+        self.support = User.objects.create_user(
+            username="supportBC",
+            email="supportBC@example.com",
+            phone="09000000162",
+            password="SupportPass123",
+            role="SUPPORT",
+        )
+        now = timezone.now()
+        self.open_ad = Ad.objects.create(creator=self.customer, title="Open", description="x")
+        self.assigned = Ad.objects.create(
+            creator=self.customer, title="Assigned", description="x", status="ASSIGNED", assigned_contractor=self.contractor
+        )
+        self.done = Ad.objects.create(
+            creator=self.customer,
+            title="Done",
+            description="x",
+            status="DONE",
+            assigned_contractor=self.contractor,
+            work_reported_done_at=now,
+            completed_at=now,
+        )
+        self.canceled = Ad.objects.create(creator=self.customer, title="Canceled", description="x", status="CANCELED")
+
+    def test_batch_cancel_applies_rules_per_id_with_one_update(self):
+        ids = [self.open_ad.id, self.assigned.id, self.done.id, self.canceled.id, 999999]
+        self.client.force_authenticate(user=self.support)
+        # One UPDATE, SELECT what it changed, one INSERT each for outbox and change log,
+        # one SELECT for the response-cache tags (+ savepoint/release), and the daily
+        # rollup: one GROUP BY category, UPDATE, then INSERT as today's row is new (+ savepoint/release)
+        with self.assertNumQueries(12):
+            res = self.client.post(reverse("ad-batch-cancel"), {"ids": ids}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["updated"], [self.open_ad.id, self.assigned.id])
+        self.assertEqual(
+            [r["result"] for r in res.data["results"]],
+            ["canceled", "canceled", "not_cancelable", "already_canceled", "not_found"],
+        )
+
+        self.done.refresh_from_db()
+        self.assigned.refresh_from_db()
+        self.assertEqual(self.done.status, "DONE")
+        self.assertEqual(self.assigned.status, "CANCELED")
+        self.assertIsNotNone(self.assigned.canceled_at)
+        self.assertEqual(
+            sorted(OutboxEvent.objects.filter(topic="ad.canceled").values_list("aggregate", "aggregate_id", "payload")),
+            sorted(("ad", ad.id, {"actor": self.support.id}) for ad in (self.open_ad, self.assigned)),
+        )
+
+    def test_batch_cancel_of_10k_ads_uses_as_many_queries_as_a_small_one(self):
+        customers = [self.customer] + [
+            User.objects.create_user(
+                username=f"customerBC{i}",
+                email=f"customerBC{i}@example.com",
+                phone=f"091000001{i:02d}",
+                password="CustomerPass123",
+                role="CUSTOMER",
+            )
+            for i in range(20)
+        ]
+        ads = Ad.objects.bulk_create(
+            [
+                Ad(
+                    creator=customers[i % len(customers)],
+                    title=f"Ad {i}",
+                    description="x",
+                    status="ASSIGNED" if i % 3 == 0 else "OPEN",
+                    assigned_contractor=self.contractor if i % 3 == 0 else None,
+                )
+                for i in range(BULK_ACTION_MAX_IDS)
+            ]
+        )
+        self.client.force_authenticate(user=self.support)
+        # Same 12 as the 5-id batch above: nothing runs per row (timing: manage.py benchmark_batch_cancel)
+        with self.assertNumQueries(12):
+            res = self.client.post(reverse("ad-batch-cancel"), {"ids": [ad.id for ad in ads]}, format="json")
+        self.assertEqual(len(res.data["updated"]), BULK_ACTION_MAX_IDS)
+
+    def test_customer_cannot_batch_cancel(self):
+        self.client.force_authenticate(user=self.customer)
+        res = self.client.post(reverse("ad-batch-cancel"), {"ids": [self.open_ad.id]}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class AdExpiryTests(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username="customerX",
+            email="customerX@example.com",
+            phone="09000000170",
+            password="CustomerPass123",
+            role="CUSTOMER",
+        )
+        self.contractor = User.objects.create_user(
+            username="contractorX",
+            email="contractorX@example.com",
+            phone="09000000171",
+            password="ContractorPass123",
+            role="CONTRACTOR",
+        )
+        old = timezone.now() - timedelta(days=45)
+        self.stale = [Ad.objects.create(creator=self.customer, title=f"Old {i}", description="x") for i in range(5)]
+        self.old_assigned = Ad.objects.create(
+            creator=self.customer, title="Old assigned", description="x", status="ASSIGNED", assigned_contractor=self.contractor
+        )
+        Ad.objects.filter(id__in=[ad.id for ad in self.stale] + [self.old_assigned.id]).update(created_at=old)
+        self.fresh = Ad.objects.create(creator=self.customer, title="Fresh", description="x")
+
+    def test_expire_command_cancels_only_stale_open_ads(self):
+        out = StringIO()
+        call_command("expire_open_ads", "--days", "30", "--chunk-size", "2", stdout=out)
+        self.assertIn("Canceled 5 OPEN ads", out.getvalue())
+
+        self.assertEqual(Ad.objects.filter(status="CANCELED", canceled_at__isnull=False).count(), 5)
+        self.fresh.refresh_from_db()
+        self.old_assigned.refresh_from_db()
+        self.assertEqual(self.fresh.status, "OPEN")
+        self.assertEqual(self.old_assigned.status, "ASSIGNED")
+
+    def test_ads_assigned_after_the_select_get_no_events(self):
+        # old_assigned was OPEN when the chunk was selected and got assigned before the UPDATE
+        selected = Ad.objects.filter(created_at__lt=timezone.now() - timedelta(days=30)).order_by("created_at")
+        logged = ChangeLogEntry.objects.filter(kind="ad", object_id=self.old_assigned.id)
+        logged_before = logged.count()
+        with mock.patch("apps.ads.expiry.stale_open_ads", return_value=selected):
+            self.assertEqual(expire_stale_open_ads(days=30, chunk_size=10), 5)
+        self.assertEqual(
+            sorted(OutboxEvent.objects.filter(topic="ad.canceled").values_list("aggregate_id", flat=True)),
+            sorted(ad.id for ad in self.stale),
+        )
+        self.assertEqual(logged.count(), logged_before)
+
+
+class AdScheduledJobTests(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username="customerJ",
+            email="customerJ@example.com",
+            phone="09000000180",
+            password="CustomerPass123",
+            role="CUSTOMER",
+        )
+        self.contractor = User.objects.create_user(
+            username="contractorJ",
+            email="contractorJ@example.com",
+            phone="09000000181",
+            password="ContractorPass123",
+            role="CONTRACTOR",
+        )
+        self.ad = Ad.objects.create(creator=self.customer, title="Fix sink", description="Leaking")
+        AdRequest.objects.create(ad=self.ad, contractor=self.contractor)
+
+    def _assign(self, scheduled_at):
+        self.client.force_authenticate(user=self.customer)
+        res = self.client.post(
+            reverse("ad-assign", kwargs={"pk": self.ad.id}),
+            {"contractor_id": self.contractor.id, "scheduled_at": scheduled_at.isoformat(), "location": "Tehran"},
+            format="json",
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_report_done_is_auto_confirmed_after_grace_period(self):
+        self._assign(timezone.now() + timedelta(hours=1))
+        self.client.force_authenticate(user=self.contractor)
+        self.client.post(reverse("ad-report-done", kwargs={"pk": self.ad.id}), {}, format="json")
+
+        job = ScheduledJob.objects.get(kind="ads.auto_confirm", object_id=self.ad.id)
+        self.assertEqual(job.status, "PENDING")
+
+        # not due yet
+        self.assertEqual(run_due_jobs(), 0)
+        self.ad.refresh_from_db()
+        self.assertEqual(self.ad.status, "ASSIGNED")
+
+        self.assertEqual(run_due_jobs(now=job.run_at + timedelta(seconds=1)), 1)
+        self.ad.refresh_from_db()
+        self.assertEqual(self.ad.status, "DONE")
+        self.assertIsNotNone(self.ad.completed_at)
+        job.refresh_from_db()
+        self.assertEqual(job.status, "DONE")
+
+    def test_reminder_fires_before_scheduled_at(self):
+        scheduled_at = timezone.now() + timedelta(days=2)
+        self._assign(scheduled_at)
+        job = ScheduledJob.objects.get(kind="ads.reminder", object_id=self.ad.id)
+        self.assertEqual(job.run_at, scheduled_at - timedelta(hours=24))
+
+        received = []
+
+        def handler(sender, ad, **kwargs):
+            received.append(ad.id)
+
+        ad_reminder_due.connect(handler)
+        try:
+            run_due_jobs(now=job.run_at)
+        finally:
+            ad_reminder_due.disconnect(handler)
+        self.assertEqual(received, [self.ad.id])
+
+
+class AdOutboxTests(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username="customerO",
+            email="customerO@example.com",
+            phone="09000000190",
+            password="CustomerPass123",
+            role="CUSTOMER",
+        )
+        self.contractor = User.objects.create_user(
+            username="contractorO",
+            email="contractorO@example.com",
+            phone="09000000191",
+            password="ContractorPass123",
+            role="CONTRACTOR",
+        )
+
+    def test_lifecycle_writes_events_and_dispatcher_tracks_offsets(self):
+        self.client.force_authenticate(user=self.customer)
+        ad_id = self.client.post(reverse("ad-list"), {"title": "Fix sink", "description": "Leaking"}, format="json").data["id"]
+        self.client.force_authenticate(user=self.contractor)
+        self.client.post(reverse("ad-apply", kwargs={"pk": ad_id}), {}, format="json")
+        self.client.force_authenticate(user=self.customer)
+        self.client.post(reverse("ad-cancel", kwargs={"pk": ad_id}), {}, format="json")
+
+        self.assertEqual(
+            list(OutboxEvent.objects.values_list("topic", flat=True)),
+            ["ad.created", "adrequest.applied", "ad.canceled"],
+        )
+
+        delivered = []
+        consumers = {"test": (lambda events: delivered.extend(e.topic for e in events), ("ad.created", "ad.canceled"))}
+        with mock.patch.dict(outbox._consumers, consumers, clear=True):
+            self.assertEqual(outbox.dispatch_all(batch_size=1), 1)
+            self.assertEqual(outbox.dispatch_all(batch_size=10), 1)
+            self.assertEqual(outbox.dispatch_all(), 0)
+
+        self.assertEqual(delivered, ["ad.created", "ad.canceled"])
+        self.assertEqual(OutboxOffset.objects.get(consumer="test").last_event_id, OutboxEvent.objects.last().id)
+
+    def test_failed_transition_writes_no_event(self):
+        ad = Ad.objects.create(creator=self.customer, title="Fix sink", description="Leaking")
+        self.client.force_authenticate(user=self.customer)
+        # not ASSIGNED -> rejected before anything is written
+        res = self.client.post(reverse("ad-confirm-completion", kwargs={"pk": ad.id}), {}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(OutboxEvent.objects.exists())
+
+
+class AdResponseCacheTests(APITestCase):
+    def setUp(self):
+        # Tags are bumped on commit, which never happens inside a TestCase:
+        # start from an empty cache so rolled-back ids of other tests can't hit
+        cache.clear()
+        self.customer = User.objects.create_user(
+            username="customerRC",
+            email="customerRC@example.com",
+            phone="09000000190",
+            password="CustomerPass123",
+            role="CUSTOMER",
+        )
+        self.admin = User.objects.create_user(
+            username="adminRC",
+            email="adminRC@example.com",
+            phone="09000000191",
+            password="AdminPass123",
+            is_superuser=True,
+        )
+        self.ad = Ad.objects.create(creator=self.customer, title="Fix sink", description="Leaking")
+        self.url = reverse("ad-detail", kwargs={"pk": self.ad.id})
+
+    def _get(self, user, **params):
+        self.client.force_authenticate(user=user)
+        res = self.client.get(self.url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res["X-Cache"], json.loads(res.content)
+
+    def test_detail_is_cached_until_the_ad_or_expanded_user_changes(self):
+        hits_before = cache_stats()["views"]["AdViewSet.retrieve"]["hits"]
+        self.assertEqual(self._get(self.customer)[0], "MISS")
+        with self.assertNumQueries(0):
+            cache_state, body = self._get(self.customer)
+        self.assertEqual((cache_state, body["title"]), ("HIT", "Fix sink"))
+
+        # save() through the API invalidates the ad's tag once committed
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.patch(self.url, {"title": "Fix kitchen sink"}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._get(self.customer), ("MISS", res.data))
+
+        # set-based write (batch cancel) invalidates too
+        self.client.force_authenticate(user=self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse("ad-batch-cancel"), {"ids": [self.ad.id]}, format="json")
+        self.assertEqual(self._get(self.customer)[1]["status"], "CANCELED")
+
+        # an expanded user is a dependency as well
+        self.assertEqual(self._get(self.customer, expand="creator")[0], "MISS")
+        self.customer.first_name = "Sara"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.customer.save()
+        cache_state, body = self._get(self.customer, expand="creator")
+        self.assertEqual((cache_state, body["creator"]["first_name"]), ("MISS", "Sara"))
+
+        self.client.force_authenticate(user=self.admin)
+        stats = self.client.get(reverse("cache-stats")).data["views"]["AdViewSet.retrieve"]
+        self.assertEqual(stats["hits"] - hits_before, 1)
+        self.assertGreaterEqual(stats["misses"], 4)
+
+
+    def test_tags_are_bumped_once_the_write_commits(self):
+        self._get(self.customer)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.ad.title = "Fix kitchen sink"
+            self.ad.save()
+            # Other readers can't see the write yet, so the cached body stays valid
+            self.assertEqual(self._get(self.customer)[0], "HIT")
+        for callback in callbacks:
+            callback()
+        cache_state, body = self._get(self.customer)
+        self.assertEqual((cache_state, body["title"]), ("MISS", "Fix kitchen sink"))
+
+
+class AdRecommendedFeedTests(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username="customerF",
+            email="customerF@example.com",
+            phone="09000000200",
+            password="CustomerPass123",
+            role="CUSTOMER",
+        )
+        self.contractor = User.objects.create_user(
+            username="contractorF",
+            email="contractorF@example.com",
+            phone="09000000201",
+            password="ContractorPass123",
+            role="CONTRACTOR",
+        )
+        now = timezone.now()
+        for category in ("plumbing", "plumbing", "painting"):
+            Ad.objects.create(
+                creator=self.customer,
+                title="Done",
+                description="-",
+                category=category,
+                status="DONE",
+                assigned_contractor=self.contractor,
+                work_reported_done_at=now,
+                completed_at=now,
+            )
+        self.old_plumbing = self._open("Plumbing", hours_ago=24)
+        self.painting = self._open("painting", hours_ago=2)
+        self.gardening = self._open("gardening", hours_ago=0)
+        self.applied = self._open("plumbing", hours_ago=1)
+        AdRequest.objects.create(ad=self.applied, contractor=self.contractor, status="APPLIED")
+
+    def _open(self, category, hours_ago):
+        ad = Ad.objects.create(creator=self.customer, title=category, description="-", category=category)
+        Ad.objects.filter(pk=ad.pk).update(created_at=timezone.now() - timedelta(hours=hours_ago))
+        return ad
+
+    def test_feed_ranks_by_category_affinity_then_recency(self):
+        self.client.force_authenticate(user=self.contractor)
+        # affinity vector + candidate window, nothing over the history
+        with self.assertNumQueries(2):
+            res = self.client.get(reverse("ad-recommended"))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [row["id"] for row in res.data["results"]]
+        self.assertEqual(ids, [self.old_plumbing.id, self.painting.id, self.gardening.id])
+        self.assertGreater(res.data["results"][0]["relevance"], res.data["results"][1]["relevance"])
+
+    def test_customers_cannot_use_the_feed(self):
+        self.client.force_authenticate(user=self.customer)
+        self.assertEqual(self.client.get(reverse("ad-recommended")).status_code, status.HTTP_403_FORBIDDEN)
+
+
+class AdDuplicateDetectionTests(APITestCase):
+    TEXT = {
+        "title": "Kitchen sink leaking under the cabinet",
+        "description": "Water drips from the pipe joint under my kitchen sink, needs a plumber this week.",
+    }
+
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username="customerD",
+            email="customerD@example.com",
+            phone="09000000210",
+            password="CustomerPass123",
+            role="CUSTOMER",
+        )
+        self.other = User.objects.create_user(
+            username="otherD",
+            email="otherD@example.com",
+            phone="09000000211",
+            password="CustomerPass123",
+            role="CUSTOMER",
+        )
+
+    def _create(self, user, **data):
+        self.client.force_authenticate(user=user)
+        return self.client.post(reverse("ad-list"), {**self.TEXT, **data}, format="json")
+
+    def test_own_reposts_get_a_hint_by_default(self):
+        first = self._create(self.customer)
+        repost = self._create(self.customer, title="Kitchen sink leaking under the cabinet!!")
+        self.assertEqual(repost.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(repost.data["possible_duplicates"], [first.data["id"]])
+
+    @override_settings(ADS_DUPLICATE_OWN_POLICY="block")
+    def test_reposts_are_blocked_and_others_get_a_hint(self):
+        first = self._create(self.customer)
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn("possible_duplicates", first.data)
+
+        repost = self._create(self.customer, title="Kitchen sink leaking under the cabinet!!")
+        self.assertEqual(repost.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(repost.data["duplicate_of"], [first.data["id"]])
+
+        similar = self._create(self.other)
+        self.assertEqual(similar.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(similar.data["possible_duplicates"], [first.data["id"]])
+
+        unrelated = self._create(self.customer, title="Paint the bedroom", description="Two walls, white, 20 m2.")
+        self.assertEqual(unrelated.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn("possible_duplicates", unrelated.data)
+
+        # Once canceled, the original no longer counts
+        Ad.objects.filter(pk=first.data["id"]).update(status="CANCELED")
+        again = self._create(self.customer)
+        self.assertEqual(again.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(again.data["possible_duplicates"], [similar.data["id"]])
+
+    @override_settings(ADS_DUPLICATE_OWN_POLICY="block")
+    def test_backfill_indexes_existing_ads(self):
+        ad = Ad.objects.create(creator=self.customer, **self.TEXT)
+        self.assertFalse(AdSignature.objects.filter(ad=ad).exists())
+        call_command("backfill_ad_signatures", stdout=StringIO())
+        self.assertEqual(AdLSHBucket.objects.filter(ad=ad).count(), dedup.BANDS)
+
+        self.assertEqual(self._create(self.customer).data["duplicate_of"], [ad.id])
+
+    @override_settings(ADS_DUPLICATE_OWN_POLICY="block")
+    def test_creates_of_one_creator_are_serialized(self):
+        lock = FlightLock(f"ad-create:{self.customer.pk}")
+        real_find = dedup.find_duplicates
+
+        def find_while_locked(*args):
+            # The view holds the creator's lock around the check and the insert
+            self.assertFalse(FlightLock(f"ad-create:{self.customer.pk}").acquire())
+            return real_find(*args)
+
+        with mock.patch("apps.ads.views.find_duplicates", find_while_locked):
+            self.assertEqual(self._create(self.customer).status_code, status.HTTP_201_CREATED)
+
+        self.assertTrue(lock.acquire())
+        try:
+            with mock.patch("apps.ads.views.AD_CREATE_LOCK_TIMEOUT", 0.05):
+                busy = self._create(self.customer, title="Paint the bedroom", description="Two walls, white, 20 m2.")
+            self.assertEqual(busy.status_code, status.HTTP_409_CONFLICT)
+            # Other creators aren't held up
+            self.assertEqual(self._create(self.other).status_code, status.HTTP_201_CREATED)
+        finally:
+            lock.release()
+        self.assertEqual(Ad.objects.filter(creator=self.customer).count(), 1)
+
+    def test_similarity_estimate_tracks_jaccard(self):
+        text = ad_text(self.TEXT["title"], self.TEXT["description"])
+        edited = text.replace("this week", "next week")
+        exact = len(dedup.shingles(text) & dedup.shingles(edited)) / len(dedup.shingles(text) | dedup.shingles(edited))
+        self.assertAlmostEqual(dedup.similarity(dedup.minhash(text), dedup.minhash(edited)), exact, delta=0.15)
+        self.assertLess(dedup.similarity(dedup.minhash(text), dedup.minhash("Paint the bedroom walls")), 0.2)
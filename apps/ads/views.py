@@ -1,5 +1,7 @@
+import io
+
 from django.contrib.auth import get_user_model
-from django.db.models import Q
+from django.db import transaction
 from django.utils import timezone
 
 from rest_framework import permissions, status, viewsets
@@ -13,38 +15,75 @@ from drf_spectacular.utils import (
     OpenApiResponse,
 )
 
-from apps.users.permissions import IsContractorOrAdmin, IsCustomerOrAdmin, is_admin, is_support
+from apps.common.asyncviews import AsyncListModelMixin, AsyncRetrieveModelMixin, AsyncViewMixin
+from apps.common.batch import BatchRetrieveMixin, BulkIdsSerializer
+from apps.common.cache import cache_response, instance_tag, user_scope
+from apps.common.changes import record_changes
+from apps.common.expand import ExpandMixin, expand_parameter
+from apps.common.export import ExportMixin
+from apps.common.fieldsets import SPARSE_FIELDSET_PARAMETERS, SparseFieldsetMixin
+from apps.common.outbox import record_event, record_events
+from apps.common.singleflight import FlightLock
+from apps.common.streaming import StreamedList, StreamingJSONResponse, is_asgi
+from apps.users.permissions import (
+    IsAdmin,
+    IsContractorOrAdmin,
+    IsCustomerOrAdmin,
+    IsSupportOrAdmin,
+    is_support,
+)
 from apps.reviews.models import Review
 from apps.reviews.serializers import ReviewSerializer
 
+from .dedup import find_duplicates, index_ads, policy
+from .feed import recommended_ads
+from .importers import import_ads
+from .jobs import schedule_auto_confirm, schedule_reminder
 from .models import Ad, AdRequest
-from .permissions import CanViewAd, IsAdOwnerOrAdmin, IsAssignedContractorOrAdmin
+from .permissions import CanViewAd, IsAdOwnerOrAdmin, IsAssignedContractorOrAdmin, visible_ads
 from .serializers import (
     AdApplySerializer,
     AdAssignSerializer,
+    AdImportSerializer,
     AdRequestSerializer,
     AdReviewCreateSerializer,
     AdSerializer,
+    RecommendedAdSerializer,
 )
 
 User = get_user_model()
 
+AD_READ_PARAMETERS = SPARSE_FIELDSET_PARAMETERS + [expand_parameter("creator", "assigned_contractor")]
+# Seconds a create waits for the same creator's create in progress before answering 409
+AD_CREATE_LOCK_TIMEOUT = 5
+
+
+def ad_cache_scope(request) -> str:
+    # Which ads are visible depends on the caller; support/admin see them all
+    return "staff" if is_support(request.user) else user_scope(request)
+
 
 @extend_schema_view(
     list=extend_schema(
         tags=["Ads"],
         summary="List ads",
         description="Lists ads visible to the current user. CANCELED ads are only visible to owner/support/admin.",
+        parameters=AD_READ_PARAMETERS,
     ),
     create=extend_schema(
         tags=["Ads"],
         summary="Create ad",
-        description="CUSTOMER creates a new ad. Status defaults to OPEN.",
+        description=(
+            "CUSTOMER creates a new ad. Status defaults to OPEN. Near-duplicates of OPEN ads are "
+            "rejected (400 with duplicate_of) or listed in possible_duplicates, per ADS_DUPLICATE_*_POLICY. "
+            "A creator's ads are created one at a time; 409 if another one stays in progress too long."
+        ),
     ),
     retrieve=extend_schema(
         tags=["Ads"],
         summary="Retrieve ad",
         description="Retrieve an ad if it is visible to you.",
+        parameters=AD_READ_PARAMETERS,
     ),
     partial_update=extend_schema(
         tags=["Ads"],
@@ -57,24 +96,39 @@ User = get_user_model()
         description="Owner only.",
     ),
 )
-class AdViewSet(viewsets.ModelViewSet):
+class AdViewSet(
+    AsyncViewMixin,
+    AsyncListModelMixin,
+    AsyncRetrieveModelMixin,
+    SparseFieldsetMixin,
+    ExpandMixin,
+    BatchRetrieveMixin,
+    ExportMixin,
+    viewsets.ModelViewSet,
+):
+    # list/retrieve are async (apps.common.asyncviews); writes and actions stay sync
     serializer_class = AdSerializer
     queryset = Ad.objects.all()
+    export_fields = (
+        "id",
+        "title",
+        "description",
+        "category",
+        "status",
+        "creator_id",
+        "assigned_contractor_id",
+        "scheduled_at",
+        "location",
+        "work_reported_done_at",
+        "completed_at",
+        "canceled_at",
+        "created_at",
+        "updated_at",
+    )
 
     # ---------- visibility rules ----------
     def get_queryset(self):
-        u = self.request.user
-        qs = Ad.objects.all()
-
-        if is_admin(u) or is_support(u):
-            return qs
-
-        own = Q(creator=u)
-        open_ads = Q(status="OPEN")
-        contractor_assigned_or_done = Q(status__in=["ASSIGNED", "DONE"], assigned_contractor=u)
-
-        # CANCELED only visible to owner/support/admin (NOT contractor) :contentReference[oaicite:3]{index=3}
-        return qs.filter(own | open_ads | contractor_assigned_or_done).distinct()
+        return visible_ads(self.request.user)
 
     # ---------- permissions ----------
     def get_permissions(self):
@@ -88,7 +142,7 @@ class AdViewSet(viewsets.ModelViewSet):
         if self.action in ("cancel", "assign", "confirm_completion", "requests"):
             return [permissions.IsAuthenticated(), IsAdOwnerOrAdmin()]
 
-        if self.action in ("apply", "withdraw"):
+        if self.action in ("apply", "withdraw", "recommended"):
             return [permissions.IsAuthenticated(), IsContractorOrAdmin()]
 
         if self.action == "report_done":
@@ -97,10 +151,119 @@ class AdViewSet(viewsets.ModelViewSet):
         if self.action == "review":
             return [permissions.IsAuthenticated(), IsAdOwnerOrAdmin(), IsCustomerOrAdmin()]
 
+        if self.action in ("export", "batch_cancel"):
+            return [permissions.IsAuthenticated(), IsSupportOrAdmin()]
+
+        if self.action == "bulk_import":
+            return [permissions.IsAuthenticated(), IsAdmin()]
+
         return [permissions.IsAuthenticated()]
 
+    # ---------- cached detail ----------
+    @cache_response(scope=ad_cache_scope)
+    async def retrieve(self, request, *args, **kwargs):
+        return await super().retrieve(request, *args, **kwargs)
+
+    def get_cache_tags(self, request, response):
+        tags = [instance_tag(Ad, self.kwargs["pk"])]
+        for name in ("creator", "assigned_contractor"):
+            expanded = response.data.get(name)
+            if isinstance(expanded, dict) and "id" in expanded:
+                tags.append(instance_tag(User, expanded["id"]))
+        return tags
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        data = serializer.validated_data
+        # Lookup and insert under a per-creator lock held until the insert commits
+        # (SQLite has no row locks): two identical posts sent at once can't both pass
+        # the own-duplicate check. Other customers' concurrent posts may miss each other.
+        lock = FlightLock(f"ad-create:{request.user.pk}")
+        if not lock.acquire(timeout=AD_CREATE_LOCK_TIMEOUT):
+            return Response(
+                {"detail": "Another ad of yours is being created; retry."}, status=status.HTTP_409_CONFLICT
+            )
+        try:
+            with transaction.atomic():
+                self.duplicate_check = find_duplicates(
+                    data.get("title", ""), data.get("description", ""), request.user.id
+                )
+                found = {"own": self.duplicate_check.own, "others": self.duplicate_check.others}
+                blocking = [ad_id for kind, ids in found.items() if policy(kind) == "block" for ad_id in ids]
+                if blocking:
+                    return Response(
+                        {"detail": "This ad duplicates an OPEN ad.", "duplicate_of": blocking},
+                        status=status.HTTP_400_BAD_REQUEST,
+                    )
+                self.perform_create(serializer)
+        finally:
+            lock.release()
+
+        body = dict(serializer.data)
+        hints = [ad_id for kind, ids in found.items() if policy(kind) == "hint" for ad_id in ids]
+        if hints:
+            body["possible_duplicates"] = hints
+        return Response(body, status=status.HTTP_201_CREATED, headers=self.get_success_headers(serializer.data))
+
     def perform_create(self, serializer):
-        serializer.save(creator=self.request.user)
+        with transaction.atomic():
+            ad = serializer.save(creator=self.request.user)
+            index_ads([ad], signatures={ad.pk: self.duplicate_check.signature})
+            record_event("ad.created", ad, actor=self.request.user.id)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            ad = serializer.save()
+            if {"title", "description"} & set(serializer.validated_data):
+                index_ads([ad])
+
+    @extend_schema(
+        tags=["Ads"],
+        summary="Bulk import ads",
+        description=(
+            "ADMIN only. Upload a JSONL or CSV file with title, description, category, "
+            "status (OPEN/CANCELED) and creator columns. Rows are inserted in chunks; "
+            "invalid rows are reported by line number and skipped."
+        ),
+        request={"multipart/form-data": AdImportSerializer},
+        responses={200: OpenApiResponse(description="Import summary")},
+        examples=[
+            OpenApiExample(
+                "Import response",
+                value={"created": 99998, "failed": 2, "errors": [{"line": 17, "errors": {"title": "This field is required."}}]},
+                response_only=True,
+            )
+        ],
+    )
+    @action(detail=False, methods=["post"], url_path="import")
+    def bulk_import(self, request):
+        s = AdImportSerializer(data=request.data)
+        s.is_valid(raise_exception=True)
+
+        lines = io.TextIOWrapper(s.validated_data["file"].file, encoding="utf-8", newline="")
+        result = import_ads(
+            lines,
+            input_format=s.validated_data["input"],
+            chunk_size=s.validated_data["chunk_size"],
+            default_creator_id=s.validated_data.get("creator"),
+        )
+        return Response(result.as_dict(), status=status.HTTP_200_OK)
+
+    @extend_schema(
+        tags=["Ads"],
+        summary="Recommended ads",
+        description=(
+            "CONTRACTOR feed: OPEN ads you haven't applied to, ranked by your affinity for their category "
+            "(from your DONE ads and their ratings) and by recency. Paginated like the list."
+        ),
+        responses={200: RecommendedAdSerializer(many=True)},
+    )
+    @action(detail=False, methods=["get"], url_path="recommended")
+    def recommended(self, request):
+        page = self.paginate_queryset(recommended_ads(request.user.id))
+        return self.get_paginated_response(RecommendedAdSerializer(page, many=True).data)
 
     # ---------- lifecycle actions ----------
 
@@ -138,15 +301,17 @@ class AdViewSet(viewsets.ModelViewSet):
         s.is_valid(raise_exception=True)
         note = s.validated_data.get("note", "")
 
-        obj, created = AdRequest.objects.get_or_create(
-            ad=ad,
-            contractor=request.user,
-            defaults={"status": "APPLIED", "note": note},
-        )
-        if not created:
-            obj.status = "APPLIED"
-            obj.note = note
-            obj.save(update_fields=["status", "note", "updated_at"])
+        with transaction.atomic():
+            obj, created = AdRequest.objects.get_or_create(
+                ad=ad,
+                contractor=request.user,
+                defaults={"status": "APPLIED", "note": note},
+            )
+            if not created:
+                obj.status = "APPLIED"
+                obj.note = note
+                obj.save(update_fields=["status", "note", "updated_at"])
+            record_event("adrequest.applied", obj, ad=ad.id, actor=request.user.id)
 
         return Response(
             AdRequestSerializer(obj).data,
@@ -181,8 +346,10 @@ class AdViewSet(viewsets.ModelViewSet):
             return Response({"detail": "You have not applied to this ad."}, status=status.HTTP_400_BAD_REQUEST)
 
         if obj.status != "WITHDRAWN":
-            obj.status = "WITHDRAWN"
-            obj.save(update_fields=["status", "updated_at"])
+            with transaction.atomic():
+                obj.status = "WITHDRAWN"
+                obj.save(update_fields=["status", "updated_at"])
+                record_event("adrequest.withdrawn", obj, ad=ad.id, actor=request.user.id)
 
         return Response(AdRequestSerializer(obj).data, status=status.HTTP_200_OK)
 
@@ -208,13 +375,15 @@ class AdViewSet(viewsets.ModelViewSet):
         ],
     )
     @action(detail=True, methods=["get"], url_path="requests")
-    def requests(self, request, pk=None):
+    async def requests(self, request, pk=None):
         """
         Customer selects contractor from this list. :contentReference[oaicite:5]{index=5}
         """
-        ad: Ad = self.get_object()
+        ad: Ad = await self.aget_object()
         qs = AdRequest.objects.filter(ad=ad, status="APPLIED").order_by("-created_at")
-        return Response(AdRequestSerializer(qs, many=True).data, status=status.HTTP_200_OK)
+        return StreamingJSONResponse(
+            StreamedList(qs, AdRequestSerializer), status=status.HTTP_200_OK, asynchronous=is_asgi(request)
+        )
 
     @extend_schema(
         request=AdAssignSerializer,
@@ -274,7 +443,10 @@ class AdViewSet(viewsets.ModelViewSet):
         ad.scheduled_at = scheduled_at
         ad.location = location
         ad.status = "ASSIGNED"
-        ad.save(update_fields=["assigned_contractor", "scheduled_at", "location", "status", "updated_at"])
+        with transaction.atomic():
+            ad.save(update_fields=["assigned_contractor", "scheduled_at", "location", "status", "updated_at"])
+            schedule_reminder(ad)
+            record_event("ad.assigned", ad, contractor=contractor.id, actor=request.user.id)
 
         return Response(AdSerializer(ad).data, status=status.HTTP_200_OK)
 
@@ -298,7 +470,11 @@ class AdViewSet(viewsets.ModelViewSet):
 
         if not ad.work_reported_done_at:
             ad.work_reported_done_at = timezone.now()
-            ad.save(update_fields=["work_reported_done_at", "updated_at"])
+            with transaction.atomic():
+                ad.save(update_fields=["work_reported_done_at", "updated_at"])
+                # Customer has ADS_AUTO_CONFIRM_AFTER_HOURS to confirm before it happens automatically
+                schedule_auto_confirm(ad)
+                record_event("ad.reported_done", ad, actor=request.user.id)
 
         return Response(AdSerializer(ad).data, status=status.HTTP_200_OK)
 
@@ -325,7 +501,9 @@ class AdViewSet(viewsets.ModelViewSet):
         # Customer confirms -> DONE (contractor cannot confirm) :contentReference[oaicite:7]{index=7}
         ad.status = "DONE"
         ad.completed_at = timezone.now()
-        ad.save(update_fields=["status", "completed_at", "updated_at"])
+        with transaction.atomic():
+            ad.save(update_fields=["status", "completed_at", "updated_at"])
+            record_event("ad.completed", ad, actor=request.user.id)
 
         return Response(AdSerializer(ad).data, status=status.HTTP_200_OK)
 
@@ -351,10 +529,72 @@ class AdViewSet(viewsets.ModelViewSet):
         if ad.status != "CANCELED":
             ad.status = "CANCELED"
             ad.canceled_at = timezone.now()
-            ad.save(update_fields=["status", "canceled_at", "updated_at"])
+            with transaction.atomic():
+                ad.save(update_fields=["status", "canceled_at", "updated_at"])
+                record_event("ad.canceled", ad, actor=request.user.id)
 
         return Response(AdSerializer(ad).data, status=status.HTTP_200_OK)
 
+    @extend_schema(
+        tags=["Ads"],
+        summary="Cancel many ads",
+        description=(
+            "SUPPORT/ADMIN only. Cancels every listed ad that is not DONE with one conditional UPDATE "
+            "and returns the ids it canceled (`updated`) and a per-id result: canceled, already_canceled, "
+            "not_cancelable (DONE) or not_found."
+        ),
+        request=BulkIdsSerializer,
+        responses={200: OpenApiResponse(description="Per-id results")},
+        examples=[
+            OpenApiExample("Batch cancel request", value={"ids": [10, 11, 12]}, request_only=True),
+            OpenApiExample(
+                "Batch cancel response",
+                value={
+                    "updated": [10],
+                    "results": [
+                        {"id": 10, "result": "canceled"},
+                        {"id": 11, "result": "not_cancelable"},
+                        {"id": 12, "result": "not_found"},
+                    ],
+                },
+                response_only=True,
+            ),
+        ],
+    )
+    @action(detail=False, methods=["post"], url_path="batch-cancel")
+    def batch_cancel(self, request):
+        s = BulkIdsSerializer(data=request.data)
+        s.is_valid(raise_exception=True)
+        ids = s.validated_data["ids"]
+
+        now = timezone.now()
+        with transaction.atomic():
+            # Same rule as cancel(): DONE ads can't be canceled. The status condition is
+            # in the UPDATE itself so a concurrent transition can't be overwritten.
+            Ad.objects.filter(id__in=ids, status__in=["OPEN", "ASSIGNED"]).update(
+                status="CANCELED", canceled_at=now, updated_at=now
+            )
+            # The rows this UPDATE changed carry its timestamp; only they get events
+            rows = Ad.objects.filter(id__in=ids).values_list("id", "status", "canceled_at")
+            current = {pk: (st, canceled_at) for pk, st, canceled_at in rows}
+            canceled = [pk for pk in ids if pk in current and current[pk][1] == now]
+            if canceled:
+                record_events("ad.canceled", Ad, canceled, actor=request.user.id)
+                record_changes("ad", canceled)
+
+        outcomes = {"CANCELED": "already_canceled", "DONE": "not_cancelable"}
+        moved = set(canceled)
+        results = []
+        for pk in ids:
+            if pk in moved:
+                result = "canceled"
+            elif pk in current:
+                result = outcomes.get(current[pk][0], "not_cancelable")
+            else:
+                result = "not_found"
+            results.append({"id": pk, "result": result})
+        return Response({"updated": canceled, "results": results}, status=status.HTTP_200_OK)
+
     @extend_schema(
         request=AdReviewCreateSerializer,
         responses={201: ReviewSerializer},
@@ -388,11 +628,13 @@ class AdViewSet(viewsets.ModelViewSet):
         s = AdReviewCreateSerializer(data=request.data)
         s.is_valid(raise_exception=True)
 
-        review = Review.objects.create(
-            ad=ad,
-            author=request.user,
-            contractor=ad.assigned_contractor,
-            rating=s.validated_data["rating"],
-            comment=s.validated_data.get("comment", ""),
-        )
+        with transaction.atomic():
+            review = Review.objects.create(
+                ad=ad,
+                author=request.user,
+                contractor=ad.assigned_contractor,
+                rating=s.validated_data["rating"],
+                comment=s.validated_data.get("comment", ""),
+            )
+            record_event("review.created", review, ad=ad.id, contractor=review.contractor_id, rating=review.rating)
         return Response(ReviewSerializer(review).data, status=status.HTTP_201_CREATED)
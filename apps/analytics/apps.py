@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class AnalyticsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.analytics'
+
+    def ready(self):
+        from apps.common.outbox import events_recorded
+        from .rollups import on_events_recorded
+
+        # Rollups are bumped inside the write's own transaction
+        events_recorded.connect(on_events_recorded, dispatch_uid="analytics-rollups")
@@ -0,0 +1,39 @@
+import django_filters as filters
+
+from apps.users.leaderboard import normalize_category
+
+from .models import DailyAdStats, DailyResponseSketch, DailyReviewStats, DailyTicketStats
+
+
+class DayRangeFilterSet(filters.FilterSet):
+    since = filters.DateFilter(field_name="day", lookup_expr="gte")
+    until = filters.DateFilter(field_name="day", lookup_expr="lte")
+
+
+class DailyAdStatsFilterSet(DayRangeFilterSet):
+    category = filters.CharFilter(method="filter_category")
+
+    class Meta:
+        model = DailyAdStats
+        fields = []
+
+    def filter_category(self, queryset, name, value):
+        return queryset.filter(category=normalize_category(value))
+
+
+class DailyReviewStatsFilterSet(DayRangeFilterSet):
+    class Meta:
+        model = DailyReviewStats
+        fields = []
+
+
+class DailyTicketStatsFilterSet(DayRangeFilterSet):
+    class Meta:
+        model = DailyTicketStats
+        fields = ["status"]
+
+
+class DailyResponseSketchFilterSet(DayRangeFilterSet):
+    class Meta:
+        model = DailyResponseSketch
+        fields = ["responder"]
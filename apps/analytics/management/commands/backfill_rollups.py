@@ -0,0 +1,30 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.analytics.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the daily ad/review/ticket rollups and response-time sketches from the source tables (one transaction). "
+        "Rollups are kept current on writes; run this once after deploying them or to repair drift."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="First day to rebuild (YYYY-MM-DD). Default: all days.")
+
+    def handle(self, *args, **opts):
+        since = None
+        if opts["since"]:
+            try:
+                since = date.fromisoformat(opts["since"])
+            except ValueError:
+                raise CommandError("--since must be a date like 2026-01-31.")
+        written = rebuild_rollups(since=since)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt {written['ads']} ad, {written['reviews']} review, {written['tickets']} ticket "
+                f"and {written['sla']} response-time rollup rows."
+            )
+        )
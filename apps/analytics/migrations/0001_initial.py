@@ -0,0 +1,54 @@
+# Generated by Django 5.2.9 on 2026-10-19 03:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyReviewStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['day'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyAdStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('category', models.CharField(blank=True, max_length=100)),
+                ('created', models.PositiveIntegerField(default=0)),
+                ('completed', models.PositiveIntegerField(default=0)),
+                ('canceled', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['day', 'category'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'category'), name='daily_ad_stats_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyTicketStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.CharField(max_length=20)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['day', 'status'],
+                'constraints': [models.UniqueConstraint(fields=('day', 'status'), name='daily_ticket_stats_unique')],
+            },
+        ),
+    ]
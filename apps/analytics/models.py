@@ -0,0 +1,83 @@
+from django.conf import settings
+from django.db import models
+
+
+class DailyAdStats(models.Model):
+    """Ads created/completed/canceled per day and category (normalized: trimmed, lowercase)."""
+
+    day = models.DateField()
+    category = models.CharField(max_length=100, blank=True)
+    created = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    canceled = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["day", "category"]
+        constraints = [
+            models.UniqueConstraint(fields=["day", "category"], name="daily_ad_stats_unique"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.day} {self.category or '-'}: +{self.created} done {self.completed} canceled {self.canceled}"
+
+
+class DailyReviewStats(models.Model):
+    """Reviews written per day; average = rating_sum / review_count."""
+
+    day = models.DateField(unique=True)
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["day"]
+
+    def __str__(self) -> str:
+        return f"{self.day}: {self.review_count} reviews"
+
+
+class DailyTicketStats(models.Model):
+    """
+    Tickets per day and status: each counts as OPEN on its creation day and,
+    once past OPEN, in its current status on the day of its last response
+    (else of its last update). See apps.analytics.rollups.
+    """
+
+    day = models.DateField()
+    status = models.CharField(max_length=20)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["day", "status"]
+        constraints = [
+            models.UniqueConstraint(fields=["day", "status"], name="daily_ticket_stats_unique"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.day} {self.status}: {self.count}"
+
+
+class DailyResponseSketch(models.Model):
+    """
+    Time to first support response (seconds) per response day and responder,
+    as a DDSketch (apps.analytics.sketches) so rows merge into any percentile.
+    """
+
+    day = models.DateField()
+    responder = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    count = models.PositiveIntegerField(default=0)
+    sketch = models.JSONField(default=dict)
+
+    class Meta:
+        ordering = ["day", "responder"]
+        constraints = [
+            models.UniqueConstraint(fields=["day", "responder"], name="daily_response_sketch_unique"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.day} responder#{self.responder_id}: {self.count} responses"
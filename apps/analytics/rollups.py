@@ -0,0 +1,235 @@
+"""
+Daily rollups for the admin analytics endpoints.
+
+The write paths already record an outbox event for every transition
+(apps.common.outbox); `events_recorded` fires inside their transaction and
+`on_events_recorded` bumps the day's counters there, so rollups commit or
+roll back with the write itself:
+
+    ad.created / ad.completed / ad.canceled -> DailyAdStats (per category)
+    review.created / .updated / .deleted    -> DailyReviewStats (per creation day)
+    ticket.created / .updated / .responded
+      / .closed / .deleted                  -> DailyTicketStats (per status)
+    first responses (.responded, .closed)   -> DailyResponseSketch (per responder)
+
+Days are local dates (TIME_ZONE). `rebuild_rollups()` (`manage.py
+backfill_rollups`) recomputes them from the ad, review and ticket tables, and
+the live counters keep to what it computes. Ticket transitions aren't stored,
+so each ticket counts as OPEN on its creation day and, once past OPEN, in its
+current status on the day of its last response (else of its last update; see
+`ticket_slots`). Ticket events carry the slots the tickets left in their
+`previous` payload, and the handler moves them to where they are now.
+Response sketches keep first responses; the rebuild only sees the latest
+one, so first responses that were later overwritten are lost there.
+"""
+from collections import Counter, defaultdict
+from datetime import date
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce, Greatest, TruncDate
+from django.utils import timezone
+
+from apps.ads.models import Ad
+from apps.reviews.models import Review
+from apps.tickets.models import Ticket
+from apps.users.leaderboard import normalize_category
+
+from .models import DailyAdStats, DailyResponseSketch, DailyReviewStats, DailyTicketStats
+from .sketches import DEFAULT_RELATIVE_ACCURACY, DDSketch
+
+AD_TOPICS = {"ad.created": "created", "ad.completed": "completed", "ad.canceled": "canceled"}
+TICKET_TOPICS = {"ticket.created", "ticket.updated", "ticket.responded", "ticket.closed", "ticket.deleted"}
+
+
+def _increment(model, lookup: dict, **deltas):
+    """
+    Add `deltas` to the row matching `lookup`, creating it if needed.
+    Negative deltas subtract; a row they empty is removed, as the rebuild
+    writes no empty rows.
+    """
+    if any(value < 0 for value in deltas.values()):
+        model.objects.filter(**lookup).update(**{name: Greatest(F(name) + value, 0) for name, value in deltas.items()})
+        model.objects.filter(**lookup, **{name: 0 for name in deltas}).delete()
+        return
+    changes = {name: F(name) + value for name, value in deltas.items()}
+    if model.objects.filter(**lookup).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **deltas)
+    except IntegrityError:
+        # Created concurrently: it exists now
+        model.objects.filter(**lookup).update(**changes)
+
+
+def new_sketch() -> DDSketch:
+    return DDSketch(getattr(settings, "SLA_SKETCH_RELATIVE_ACCURACY", DEFAULT_RELATIVE_ACCURACY))
+
+
+def record_response_times(day, responder_id, seconds):
+    """Add times-to-first-response (an iterable of seconds) to the (day, responder) sketch."""
+    with transaction.atomic():
+        row, _ = DailyResponseSketch.objects.select_for_update().get_or_create(day=day, responder_id=responder_id)
+        sketch = DDSketch.from_dict(row.sketch) if row.sketch else new_sketch()
+        for value in seconds:
+            sketch.add(max(value, 0.0))
+        row.sketch = sketch.to_dict()
+        row.count = sketch.count
+        row.save(update_fields=["sketch", "count"])
+
+
+def ticket_slots(queryset) -> Counter:
+    """
+    {(day, status): n} for these tickets past OPEN: each counts under its
+    current status on the day of its last response, else of its last update.
+    """
+    rows = (
+        queryset.exclude(status=Ticket.Status.OPEN)
+        .annotate(day=TruncDate(Coalesce("responded_at", "updated_at")))
+        .order_by()
+        .values_list("day", "status")
+        .annotate(n=Count("id"))
+    )
+    return Counter({(day, status): n for day, status, n in rows})
+
+
+def previous_slots(queryset) -> list:
+    """`ticket_slots()` as JSON for the `previous` payload of a ticket event. Call before the write."""
+    return [[day.isoformat(), status, n] for (day, status), n in ticket_slots(queryset).items()]
+
+
+def _move_tickets(topic, ids, payload, day):
+    counts = Counter()
+    if topic == "ticket.created":
+        counts[day, Ticket.Status.OPEN] += len(ids)
+    if topic == "ticket.deleted":
+        counts[date.fromisoformat(payload["created_day"]), Ticket.Status.OPEN] -= len(ids)
+    else:
+        counts.update(ticket_slots(Ticket.objects.filter(pk__in=ids)))
+    for previous_day, status, n in payload.get("previous", ()):
+        counts[date.fromisoformat(previous_day), status] -= n
+    for (slot_day, status), n in sorted(counts.items()):
+        if n:
+            _increment(DailyTicketStats, {"day": slot_day, "status": status}, count=n)
+
+    if "response_seconds" in payload:
+        record_response_times(day, payload.get("actor"), [payload["response_seconds"]])
+    elif payload.get("first_response"):
+        # Set-based closes with a response: each ticket's wait since it was opened
+        responses = Ticket.objects.filter(pk__in=ids).values_list("created_at", "responded_at")
+        record_response_times(
+            day, payload.get("actor"), [(responded_at - created_at).total_seconds() for created_at, responded_at in responses]
+        )
+
+
+def on_events_recorded(sender, topic, ids, payload, **kwargs):
+    if not ids:
+        return
+    day = timezone.localdate()
+
+    if topic in AD_TOPICS:
+        # One query for the whole batch, counted here
+        categories = Counter(
+            normalize_category(category) for category in Ad.objects.filter(pk__in=ids).values_list("category", flat=True)
+        )
+        for category, n in categories.items():
+            _increment(DailyAdStats, {"day": day, "category": category}, **{AD_TOPICS[topic]: n})
+    elif topic == "review.created":
+        _increment(DailyReviewStats, {"day": day}, review_count=len(ids), rating_sum=payload["rating"] * len(ids))
+    elif topic == "review.updated":
+        # Counted on the day the review was written, with its current rating
+        if payload["rating"] != payload["previous_rating"]:
+            _increment(
+                DailyReviewStats,
+                {"day": date.fromisoformat(payload["created_day"])},
+                rating_sum=(payload["rating"] - payload["previous_rating"]) * len(ids),
+            )
+    elif topic == "review.deleted":
+        _increment(
+            DailyReviewStats,
+            {"day": date.fromisoformat(payload["created_day"])},
+            review_count=-len(ids),
+            rating_sum=-payload["rating"] * len(ids),
+        )
+    elif topic in TICKET_TOPICS:
+        _move_tickets(topic, ids, payload, day)
+
+
+# ---------- backfill ----------
+
+def _since(queryset, field, since):
+    return queryset.filter(**{f"{field}__date__gte": since}) if since else queryset
+
+
+@transaction.atomic
+def rebuild_rollups(since=None) -> dict:
+    """Recompute rollups from day `since` on (all days if None). Returns rows written per table."""
+    ad_rows = defaultdict(lambda: {"created": 0, "completed": 0, "canceled": 0})
+    sources = (
+        ("created", "created_at", Q()),
+        ("completed", "completed_at", Q(status=Ad.Status.DONE)),
+        ("canceled", "canceled_at", Q(status=Ad.Status.CANCELED)),
+    )
+    for column, field, condition in sources:
+        queryset = _since(Ad.objects.filter(condition, **{f"{field}__isnull": False}), field, since)
+        # Grouped by the raw category, merged under normalize_category() like the live path
+        rows = (
+            queryset.annotate(day=TruncDate(field))
+            .order_by()
+            .values_list("day", "category")
+            .annotate(n=Count("id"))
+        )
+        for day, category, n in rows:
+            ad_rows[day, normalize_category(category)][column] += n
+
+    review_rows = (
+        _since(Review.objects.all(), "created_at", since)
+        .annotate(day=TruncDate("created_at"))
+        .order_by()
+        .values("day")
+        .annotate(review_count=Count("id"), rating_sum=Sum("rating"))
+    )
+
+    ticket_rows = defaultdict(int)
+    opened = (
+        _since(Ticket.objects.all(), "created_at", since)
+        .annotate(day=TruncDate("created_at"))
+        .order_by()
+        .values("day")
+        .annotate(n=Count("id"))
+    )
+    for row in opened:
+        ticket_rows[row["day"], Ticket.Status.OPEN] += row["n"]
+    for (day, status), n in ticket_slots(Ticket.objects.all()).items():
+        if since is None or day >= since:
+            ticket_rows[day, status] += n
+
+    sketches = defaultdict(new_sketch)
+    responses = Ticket.objects.filter(responded_at__isnull=False).values_list("responded_by_id", "created_at", "responded_at")
+    if since:
+        responses = responses.filter(responded_at__date__gte=since)
+    for responder_id, created_at, responded_at in responses.iterator():
+        sketches[timezone.localdate(responded_at), responder_id].add(max((responded_at - created_at).total_seconds(), 0.0))
+
+    day_filter = {"day__gte": since} if since else {}
+    for model in (DailyAdStats, DailyReviewStats, DailyTicketStats, DailyResponseSketch):
+        model.objects.filter(**day_filter).delete()
+    DailyAdStats.objects.bulk_create(
+        [DailyAdStats(day=day, category=category, **counts) for (day, category), counts in ad_rows.items()],
+        batch_size=1000,
+    )
+    reviews = DailyReviewStats.objects.bulk_create([DailyReviewStats(**row) for row in review_rows], batch_size=1000)
+    DailyTicketStats.objects.bulk_create(
+        [DailyTicketStats(day=day, status=status, count=n) for (day, status), n in ticket_rows.items()],
+        batch_size=1000,
+    )
+    DailyResponseSketch.objects.bulk_create(
+        [
+            DailyResponseSketch(day=day, responder_id=responder_id, count=sketch.count, sketch=sketch.to_dict())
+            for (day, responder_id), sketch in sketches.items()
+        ],
+        batch_size=1000,
+    )
+    return {"ads": len(ad_rows), "reviews": len(reviews), "tickets": len(ticket_rows), "sla": len(sketches)}
@@ -0,0 +1,48 @@
+from rest_framework import serializers
+
+from .models import DailyAdStats, DailyReviewStats, DailyTicketStats
+
+
+class DailyAdStatsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DailyAdStats
+        fields = ("day", "category", "created", "completed", "canceled")
+        read_only_fields = fields
+
+
+class DailyReviewStatsSerializer(serializers.ModelSerializer):
+    avg_rating = serializers.SerializerMethodField()
+
+    class Meta:
+        model = DailyReviewStats
+        fields = ("day", "review_count", "avg_rating")
+        read_only_fields = fields
+
+    def get_avg_rating(self, obj) -> float | None:
+        return round(obj.rating_sum / obj.review_count, 3) if obj.review_count else None
+
+
+class DailyTicketStatsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DailyTicketStats
+        fields = ("day", "status", "count")
+        read_only_fields = fields
+
+
+class ResponseTimeSerializer(serializers.Serializer):
+    """Time to first response, in seconds (percentiles within the sketch's relative accuracy)."""
+
+    count = serializers.IntegerField()
+    mean_seconds = serializers.FloatField(allow_null=True)
+    p50 = serializers.FloatField(allow_null=True)
+    p90 = serializers.FloatField(allow_null=True)
+    p99 = serializers.FloatField(allow_null=True)
+
+
+class DailyResponseTimeSerializer(ResponseTimeSerializer):
+    day = serializers.DateField()
+
+
+class ResponderResponseTimeSerializer(ResponseTimeSerializer):
+    responder = serializers.IntegerField(allow_null=True)
+    username = serializers.CharField(allow_null=True)
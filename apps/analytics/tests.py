@@ -0,0 +1,236 @@
+import random
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from django.test import SimpleTestCase
+from rest_framework.test import APITestCase
+
+from apps.reviews.models import Review
+from apps.tickets.models import Ticket
+
+from .models import DailyAdStats, DailyResponseSketch, DailyReviewStats, DailyTicketStats
+from .rollups import rebuild_rollups
+from .sketches import DDSketch
+
+User = get_user_model()
+
+
+class RollupTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username="adminA", email="adminA@example.com", phone="09000000400", password="AdminPass123"
+        )
+        self.customer = User.objects.create_user(
+            username="customerA",
+            email="customerA@example.com",
+            phone="09000000401",
+            password="CustomerPass123",
+            role="CUSTOMER",
+        )
+        self.contractor = User.objects.create_user(
+            username="contractorA",
+            email="contractorA@example.com",
+            phone="09000000402",
+            password="ContractorPass123",
+            role="CONTRACTOR",
+        )
+        self.today = timezone.localdate().isoformat()
+
+    def _post(self, user, name, data=None, **kwargs):
+        self.client.force_authenticate(user=user)
+        res = self.client.post(reverse(name, kwargs=kwargs or None), data or {}, format="json")
+        self.assertIn(res.status_code, (status.HTTP_200_OK, status.HTTP_201_CREATED), res.content)
+        return res.data
+
+    def _write_activity(self):
+        done = self._post(self.customer, "ad-list", {"title": "Fix sink", "description": "Leaking", "category": "Plumbing"})
+        self._post(self.customer, "ad-list", {"title": "Paint", "description": "Two walls", "category": "painting"})
+        canceled = self._post(self.customer, "ad-list", {"title": "Fix tap", "description": "Dripping", "category": "plumbing"})
+        self._post(self.customer, "ad-cancel", pk=canceled["id"])
+
+        self._post(self.contractor, "ad-apply", pk=done["id"])
+        scheduled_at = (timezone.now() + timedelta(days=2)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        assignment = {"contractor_id": self.contractor.id, "scheduled_at": scheduled_at, "location": "Tehran"}
+        self._post(self.customer, "ad-assign", assignment, pk=done["id"])
+        self._post(self.contractor, "ad-report-done", pk=done["id"])
+        self._post(self.customer, "ad-confirm-completion", pk=done["id"])
+        self._post(self.customer, "ad-review", {"rating": 4, "comment": "Good"}, pk=done["id"])
+
+        tickets = [self._post(self.customer, "ticket-list", {"title": "Help", "message": "?"}) for _ in range(3)]
+        self._post(self.admin, "ticket-respond", {"support_response": "On it"}, pk=tickets[0]["id"])
+        self._post(self.admin, "ticket-batch-close", {"ids": [tickets[1]["id"], tickets[2]["id"]]})
+
+    def _get(self, name, **params):
+        self.client.force_authenticate(user=self.admin)
+        res = self.client.get(reverse(name), params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [dict(row) for row in res.data["results"]]
+
+    def test_write_paths_maintain_rollups(self):
+        self._write_activity()
+        # A follow-up response that keeps the status is not a transition
+        ticket = Ticket.objects.get(status="IN_PROGRESS")
+        self._post(self.admin, "ticket-respond", {"support_response": "Still on it"}, pk=ticket.pk)
+
+        self.assertEqual(
+            self._get("analytics-ads"),
+            [
+                {"day": self.today, "category": "painting", "created": 1, "completed": 0, "canceled": 0},
+                {"day": self.today, "category": "plumbing", "created": 2, "completed": 1, "canceled": 1},
+            ],
+        )
+        self.assertEqual(self._get("analytics-ads", category="PLUMBING")[0]["created"], 2)
+        self.assertEqual(self._get("analytics-reviews"), [{"day": self.today, "review_count": 1, "avg_rating": 4.0}])
+        self.assertEqual(
+            self._get("analytics-tickets"),
+            [
+                {"day": self.today, "status": "CLOSED", "count": 2},
+                {"day": self.today, "status": "IN_PROGRESS", "count": 1},
+                {"day": self.today, "status": "OPEN", "count": 3},
+            ],
+        )
+        self.assertEqual(self._get("analytics-tickets", since="2000-01-01", until="2000-12-31"), [])
+
+    def _rollups(self):
+        return [
+            list(model.objects.values_list(*fields))
+            for model, fields in (
+                (DailyAdStats, ("day", "category", "created", "completed", "canceled")),
+                (DailyReviewStats, ("day", "review_count", "rating_sum")),
+                (DailyTicketStats, ("day", "status", "count")),
+                (DailyResponseSketch, ("day", "responder", "count", "sketch")),
+            )
+        ]
+
+    def test_backfill_matches_incremental_rollups(self):
+        self._write_activity()
+        snapshot = self._rollups()
+        for model in (DailyAdStats, DailyReviewStats, DailyTicketStats, DailyResponseSketch):
+            model.objects.all().delete()
+
+        call_command("backfill_rollups", stdout=StringIO())
+        self.assertEqual(list(DailyAdStats.objects.values_list("day", "category", "created", "completed", "canceled")), snapshot[0])
+        self.assertEqual(list(DailyReviewStats.objects.values_list("day", "review_count", "rating_sum")), snapshot[1])
+        self.assertEqual(list(DailyTicketStats.objects.values_list("day", "status", "count")), snapshot[2])
+        self.assertEqual(list(DailyResponseSketch.objects.values_list("day", "responder", "count", "sketch")), snapshot[3])
+
+    def test_edits_and_deletes_keep_rollups_equal_to_a_rebuild(self):
+        self._write_activity()
+        # Move that history to yesterday and start from its rebuild
+        yesterday = timezone.now() - timedelta(days=1)
+        Ticket.objects.update(created_at=yesterday, updated_at=yesterday)
+        Ticket.objects.filter(responded_at__isnull=False).update(responded_at=yesterday)
+        Review.objects.update(created_at=yesterday)
+        rebuild_rollups()
+
+        answered = Ticket.objects.get(status="IN_PROGRESS")
+        review = Review.objects.get()
+        tickets = [self._post(self.customer, "ticket-list", {"title": "More", "message": "?"})["id"] for _ in range(3)]
+        self.client.force_authenticate(user=self.customer)
+        for pk, state in ((tickets[0], "IN_PROGRESS"), (tickets[1], "CLOSED"), (tickets[1], "OPEN")):
+            res = self.client.patch(reverse("ticket-detail", kwargs={"pk": pk}), {"status": state}, format="json")
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.patch(reverse("review-detail", kwargs={"pk": review.pk}), {"rating": 2}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        # First responses on the new tickets; the one answered yesterday closes without one
+        self._post(self.admin, "ticket-batch-close", {"ids": tickets[:2], "support_response": "Done"})
+        self._post(self.admin, "ticket-batch-close", {"ids": [answered.pk]})
+        self.client.force_authenticate(user=self.admin)
+        self.assertEqual(self.client.delete(reverse("ticket-detail", kwargs={"pk": tickets[2]})).status_code, 204)
+        live = self._rollups()
+        self.assertEqual(live[1], [(timezone.localdate(yesterday), 1, 2)])
+        self.assertEqual(DailyResponseSketch.objects.get(day=timezone.localdate()).count, 2)
+
+        rebuild_rollups()
+        self.assertEqual(live, self._rollups())
+
+        self.client.force_authenticate(user=self.customer)
+        self.assertEqual(self.client.delete(reverse("review-detail", kwargs={"pk": review.pk})).status_code, 204)
+        self.assertEqual(DailyReviewStats.objects.count(), 0)
+        live = self._rollups()
+        rebuild_rollups()
+        self.assertEqual(live, self._rollups())
+
+    def test_only_admins_read_analytics(self):
+        self.client.force_authenticate(user=self.customer)
+        self.assertEqual(self.client.get(reverse("analytics-ads")).status_code, status.HTTP_403_FORBIDDEN)
+
+
+class DDSketchTests(SimpleTestCase):
+    def test_quantiles_within_relative_accuracy_and_merge_is_exact(self):
+        rng = random.Random(7)
+        values = [rng.lognormvariate(6, 1.5) for _ in range(5000)]
+        whole, left, right = DDSketch(), DDSketch(), DDSketch()
+        for i, value in enumerate(values):
+            whole.add(value)
+            (left if i % 2 else right).add(value)
+        left.merge(DDSketch.from_dict(right.to_dict()))
+
+        ordered = sorted(values)
+        for q in (0.5, 0.9, 0.99):
+            exact = ordered[int(q * (len(ordered) - 1))]
+            self.assertLessEqual(abs(whole.quantile(q) - exact), 0.01 * exact + 1e-9)
+            self.assertEqual(left.quantile(q), whole.quantile(q))
+        self.assertEqual(left.count, 5000)
+        self.assertIsNone(DDSketch().quantile(0.5))
+
+
+class ResponseTimeTests(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username="customerS", email="customerS@example.com", phone="09000000410", password="CustomerPass123"
+        )
+        self.agents = [
+            User.objects.create_user(
+                username=f"support{i}",
+                email=f"support{i}@example.com",
+                phone=f"0900000042{i}",
+                password="SupportPass123",
+                role="SUPPORT",
+            )
+            for i in range(2)
+        ]
+
+    def _ticket(self, age: timedelta) -> Ticket:
+        ticket = Ticket.objects.create(created_by=self.customer, title="Help", message="?")
+        Ticket.objects.filter(pk=ticket.pk).update(created_at=timezone.now() - age)
+        return ticket
+
+    def _respond(self, agent, ticket):
+        self.client.force_authenticate(user=agent)
+        res = self.client.post(reverse("ticket-respond", kwargs={"pk": ticket.pk}), {"support_response": "Hi"}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_first_responses_feed_percentiles_per_day_and_responder(self):
+        for minutes in (10, 20, 30):
+            self._respond(self.agents[0], self._ticket(timedelta(minutes=minutes)))
+        slow = self._ticket(timedelta(hours=5))
+        self._respond(self.agents[1], slow)
+        # A follow-up isn't a first response
+        self._respond(self.agents[0], slow)
+
+        self.client.force_authenticate(user=self.agents[0])
+        with self.assertNumQueries(1):
+            res = self.client.get(reverse("analytics-sla"))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        [day] = res.data
+        self.assertEqual((day["day"], day["count"]), (timezone.localdate().isoformat(), 4))
+        self.assertAlmostEqual(day["p50"], 20 * 60, delta=0.02 * 20 * 60)
+        self.assertAlmostEqual(day["p90"], 30 * 60, delta=0.02 * 30 * 60)
+
+        res = self.client.get(reverse("analytics-sla-responders"))
+        self.assertEqual([(row["username"], row["count"]) for row in res.data], [("support0", 3), ("support1", 1)])
+        self.assertAlmostEqual(res.data[1]["p50"], 5 * 3600, delta=0.02 * 5 * 3600)
+
+        res = self.client.get(reverse("analytics-sla"), {"responder": self.agents[1].id})
+        self.assertEqual(res.data[0]["count"], 1)
+        self.assertEqual(self.client.get(reverse("analytics-sla"), {"until": "2000-01-01"}).data, [])
+
+        self.client.force_authenticate(user=self.customer)
+        self.assertEqual(self.client.get(reverse("analytics-sla")).status_code, status.HTTP_403_FORBIDDEN)
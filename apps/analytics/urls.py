@@ -0,0 +1,17 @@
+from django.urls import path
+
+from .views import (
+    DailyAdStatsView,
+    DailyResponseTimeView,
+    DailyReviewStatsView,
+    DailyTicketStatsView,
+    ResponderResponseTimeView,
+)
+
+urlpatterns = [
+    path("ads/", DailyAdStatsView.as_view(), name="analytics-ads"),
+    path("reviews/", DailyReviewStatsView.as_view(), name="analytics-reviews"),
+    path("tickets/", DailyTicketStatsView.as_view(), name="analytics-tickets"),
+    path("sla/", DailyResponseTimeView.as_view(), name="analytics-sla"),
+    path("sla/responders/", ResponderResponseTimeView.as_view(), name="analytics-sla-responders"),
+]
@@ -0,0 +1,156 @@
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import generics, permissions
+from rest_framework.response import Response
+
+from drf_spectacular.utils import OpenApiParameter, extend_schema, extend_schema_view
+
+from apps.users.permissions import IsAdmin, IsSupportOrAdmin
+
+from .filters import (
+    DailyAdStatsFilterSet,
+    DailyResponseSketchFilterSet,
+    DailyReviewStatsFilterSet,
+    DailyTicketStatsFilterSet,
+)
+from .models import DailyAdStats, DailyResponseSketch, DailyReviewStats, DailyTicketStats
+from .serializers import (
+    DailyAdStatsSerializer,
+    DailyResponseTimeSerializer,
+    DailyReviewStatsSerializer,
+    DailyTicketStatsSerializer,
+    ResponderResponseTimeSerializer,
+)
+from .sketches import DDSketch
+
+DAY_RANGE_PARAMETERS = [
+    OpenApiParameter(name="since", type=str, required=False, description="First day, YYYY-MM-DD."),
+    OpenApiParameter(name="until", type=str, required=False, description="Last day, YYYY-MM-DD."),
+]
+
+
+class RollupListView(generics.ListAPIView):
+    """
+    ADMIN only. Reads rollup tables only (see apps.analytics.rollups), never
+    the ad/review/ticket tables. Oldest day first.
+    """
+
+    permission_classes = [permissions.IsAuthenticated, IsAdmin]
+    filter_backends = [DjangoFilterBackend]
+
+
+@extend_schema_view(
+    get=extend_schema(
+        tags=["Analytics"],
+        summary="Ads per day and category",
+        description="ADMIN only. Ads created, completed and canceled per day and category.",
+        parameters=DAY_RANGE_PARAMETERS,
+    )
+)
+class DailyAdStatsView(RollupListView):
+    queryset = DailyAdStats.objects.all()
+    serializer_class = DailyAdStatsSerializer
+    filterset_class = DailyAdStatsFilterSet
+
+
+@extend_schema_view(
+    get=extend_schema(
+        tags=["Analytics"],
+        summary="Reviews per day",
+        description="ADMIN only. Reviews written and their average rating per day.",
+        parameters=DAY_RANGE_PARAMETERS,
+    )
+)
+class DailyReviewStatsView(RollupListView):
+    queryset = DailyReviewStats.objects.all()
+    serializer_class = DailyReviewStatsSerializer
+    filterset_class = DailyReviewStatsFilterSet
+
+
+@extend_schema_view(
+    get=extend_schema(
+        tags=["Analytics"],
+        summary="Tickets per day and status",
+        description=(
+            "ADMIN only. Tickets per day and status: each counts as OPEN on its creation day and, "
+            "once past OPEN, in its current status on the day of its last response (else last update)."
+        ),
+        parameters=DAY_RANGE_PARAMETERS,
+    )
+)
+class DailyTicketStatsView(RollupListView):
+    queryset = DailyTicketStats.objects.all()
+    serializer_class = DailyTicketStatsSerializer
+    filterset_class = DailyTicketStatsFilterSet
+
+
+class ResponseTimeView(RollupListView):
+    """
+    SUPPORT/ADMIN. Merges the (day, responder) response-time sketches that
+    match the filters into one sketch per group and reports its
+    percentiles; the ticket table is never read. Subclasses set
+    `group_fields`: output key -> field of DailyResponseSketch to group by.
+    """
+
+    permission_classes = [permissions.IsAuthenticated, IsSupportOrAdmin]
+    queryset = DailyResponseSketch.objects.all()
+    filterset_class = DailyResponseSketchFilterSet
+    pagination_class = None
+    group_fields = {}
+
+    def list(self, request, *args, **kwargs):
+        rows = self.filter_queryset(self.get_queryset()).values_list(*self.group_fields.values(), "sketch")
+        merged = {}
+        for row in rows:
+            key, sketch = row[:-1], DDSketch.from_dict(row[-1])
+            if key in merged:
+                merged[key].merge(sketch)
+            else:
+                merged[key] = sketch
+
+        results = []
+        for key, sketch in merged.items():
+            results.append(
+                {
+                    **dict(zip(self.group_fields, key)),
+                    "count": sketch.count,
+                    "mean_seconds": sketch.mean,
+                    "p50": sketch.quantile(0.5),
+                    "p90": sketch.quantile(0.9),
+                    "p99": sketch.quantile(0.99),
+                }
+            )
+        return Response(self.get_serializer(results, many=True).data)
+
+
+@extend_schema_view(
+    get=extend_schema(
+        tags=["Analytics"],
+        summary="Time to first response per day",
+        description=(
+            "SUPPORT/ADMIN. Time from ticket creation to its first support response, in seconds: "
+            "p50/p90/p99 per response day, optionally for one responder. Percentiles are within 1% "
+            "(SLA_SKETCH_RELATIVE_ACCURACY)."
+        ),
+        parameters=DAY_RANGE_PARAMETERS,
+    )
+)
+class DailyResponseTimeView(ResponseTimeView):
+    serializer_class = DailyResponseTimeSerializer
+    group_fields = {"day": "day"}
+
+
+@extend_schema_view(
+    get=extend_schema(
+        tags=["Analytics"],
+        summary="Time to first response per responder",
+        description=(
+            "SUPPORT/ADMIN. Time from ticket creation to its first support response, in seconds: "
+            "p50/p90/p99 per responder over the selected days (all days by default)."
+        ),
+        parameters=DAY_RANGE_PARAMETERS,
+    )
+)
+class ResponderResponseTimeView(ResponseTimeView):
+    queryset = DailyResponseSketch.objects.order_by("responder", "day")
+    serializer_class = ResponderResponseTimeSerializer
+    group_fields = {"responder": "responder", "username": "responder__username"}
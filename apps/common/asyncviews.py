@@ -0,0 +1,120 @@
+"""
+Native async read paths for DRF views.
+
+DRF dispatches synchronously, so under ASGI Django runs every DRF view in a
+worker thread. `AsyncViewMixin` makes dispatch a coroutine instead:
+
+- `async def` handlers run on the event loop and read with the async ORM.
+  Authentication, permissions and throttling are sync DRF code and take a
+  single thread hop before the handler.
+- Sync handlers (writes, custom actions) run in a worker thread exactly as
+  before, so a viewset can make only its read paths async.
+
+`AsyncListModelMixin` / `AsyncRetrieveModelMixin` are the async versions of
+DRF's list/retrieve. They keep get_queryset/filter_queryset/pagination and the
+serializers, so filters, ?fields=, ?expand= and visibility rules apply as-is.
+Serializers must not trigger lazy loads (use select_related/annotations).
+"""
+import inspect
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage
+from django.http import Http404
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+
+
+def _is_async_handler(handler) -> bool:
+    # drf-spectacular wraps inherited methods in a sync function (see
+    # extend_schema_view); look through functools.wraps chains.
+    return iscoroutinefunction(inspect.unwrap(handler))
+
+
+class AsyncViewMixin:
+    """Put first in the bases of an APIView/ViewSet."""
+
+    view_is_async = True
+
+    @classmethod
+    def as_view(cls, *args, **initkwargs):
+        # ViewSets build their own view function; tell Django to await it
+        return markcoroutinefunction(super().as_view(*args, **initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        method = request.method.lower()
+        handler = getattr(self, method, None) if method in self.http_method_names else None
+        if handler is None or not _is_async_handler(handler):
+            return await sync_to_async(super().dispatch)(request, *args, **kwargs)
+
+        # Same steps as APIView.dispatch, awaiting the handler
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def apaginate_queryset(self, queryset):
+        paginator = self.paginator
+        if paginator is None:
+            return None
+        if not isinstance(paginator, PageNumberPagination):
+            return await sync_to_async(paginator.paginate_queryset)(queryset, self.request, view=self)
+
+        # PageNumberPagination.paginate_queryset with an async count and fetch
+        page_size = paginator.get_page_size(self.request)
+        if not page_size:
+            return None
+        django_paginator = paginator.django_paginator_class(queryset, page_size)
+        django_paginator.count = await queryset.acount()
+        page_number = paginator.get_page_number(self.request, django_paginator)
+        try:
+            paginator.page = django_paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = paginator.invalid_page_message.format(page_number=page_number, message=str(exc))
+            raise NotFound(msg)
+        paginator.page.object_list = [obj async for obj in paginator.page.object_list]
+
+        if django_paginator.num_pages > 1 and paginator.template is not None:
+            paginator.display_page_controls = True
+        paginator.request = self.request
+        return paginator.page.object_list
+
+    async def aget_object(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        filter_kwargs = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        try:
+            obj = await queryset.aget(**filter_kwargs)
+        except (queryset.model.DoesNotExist, TypeError, ValueError, ValidationError):
+            raise Http404
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+
+class AsyncListModelMixin:
+    async def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        serializer = self.get_serializer([obj async for obj in queryset], many=True)
+        return Response(serializer.data)
+
+
+class AsyncRetrieveModelMixin:
+    async def retrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data)
@@ -0,0 +1,86 @@
+"""
+Batch helpers: `GET <list-url>/batch/?ids=3,1,2` fetches many objects in one
+`id__in` query; BulkIdsSerializer validates id lists for bulk write actions.
+"""
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from drf_spectacular.utils import OpenApiExample, OpenApiParameter, extend_schema
+
+from .fieldsets import parse_field_list
+
+BATCH_MAX_IDS = 200
+# Write-side bulk actions are set-based UPDATEs, so they take much larger batches
+BULK_ACTION_MAX_IDS = 10000
+# Largest value of a 64-bit signed integer column (SQLite, bigint)
+MAX_ID = 2**63 - 1
+
+
+class BulkIdsSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1, max_value=MAX_ID),
+        allow_empty=False,
+        max_length=BULK_ACTION_MAX_IDS,
+    )
+
+    def validate_ids(self, ids):
+        return list(dict.fromkeys(ids))
+
+
+class BatchRetrieveMixin:
+    """
+    ViewSet mixin adding a `batch` list action. Objects go through
+    `get_queryset()` (same visibility rules as retrieve) and come back in
+    request order; ids that don't exist or aren't visible are `null`.
+    """
+
+    batch_max_ids = BATCH_MAX_IDS
+
+    def get_batch_ids(self) -> list:
+        raw = parse_field_list(self.request.query_params.get("ids"))
+        if not raw:
+            raise ValidationError({"ids": "Provide a comma-separated list of ids."})
+        try:
+            ids = list(dict.fromkeys(int(i) for i in raw))
+        except ValueError:
+            raise ValidationError({"ids": "Ids must be integers."})
+        if any(not 1 <= i <= MAX_ID for i in ids):
+            # Larger ints overflow the database driver instead of matching nothing
+            raise ValidationError({"ids": f"Ids must be between 1 and {MAX_ID}."})
+        if len(ids) > self.batch_max_ids:
+            raise ValidationError({"ids": f"At most {self.batch_max_ids} ids per request."})
+        return ids
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                name="ids",
+                type=str,
+                required=True,
+                description=f"Comma-separated ids (max {BATCH_MAX_IDS}). Example: 3,1,2",
+            ),
+        ],
+        examples=[
+            OpenApiExample(
+                "Batch response",
+                value={"results": [{"id": 3}, None, {"id": 2}], "not_found": [1]},
+                response_only=True,
+            )
+        ],
+    )
+    @action(detail=False, methods=["get"], url_path="batch")
+    def batch(self, request):
+        ids = self.get_batch_ids()
+        queryset = self.filter_queryset(self.get_queryset()).filter(pk__in=ids)
+        found = {obj.pk: obj for obj in queryset}
+
+        serializer = self.get_serializer(list(found.values()), many=True)
+        rows = {obj.pk: row for obj, row in zip(found.values(), serializer.data)}
+
+        payload = {
+            "results": [rows.get(pk) for pk in ids],
+            "not_found": [pk for pk in ids if pk not in rows],
+        }
+        return Response(payload, status=status.HTTP_200_OK)
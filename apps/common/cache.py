@@ -0,0 +1,449 @@
+"""
+Tag-based response cache.
+
+`@cache_response()` on a GET handler (APIView.get or a ViewSet action, sync
+or async) stores the rendered body under a key built from the view, the
+path + query string, the negotiated media type and the caller's scope (see
+`user_scope`). The view's `get_cache_tags(request, response)` names what the
+response depends on, e.g. "ads.ad:10".
+
+Each tag has a version (a time_ns stamp) in the cache. An entry keeps the
+versions it was built with and is only served while they are all current.
+Saves/deletes of models registered with `cache_invalidation()` bump their
+tags once the transaction commits (right away outside one). A reader racing
+the transaction can't store the old body after that: `_store` drops entries
+whose tags were bumped after it started reading. With a per-process cache
+(LocMem) the bump also goes out on the invalidation bus to the other
+workers, as one message with consecutive ids coalesced ("ads.ad:1..500"). Set-based writes go through `record_changes()`, which sends
+`changes_recorded`; that invalidates the same tags from one `values_list`
+query over the changed rows.
+
+`single_flight=True` collapses concurrent misses of one key into a single
+computation (see `cache_response`).
+
+Hit/miss counters per view: `cache_stats()`, served at /api/cache/stats/.
+"""
+import hashlib
+import time
+from collections import defaultdict
+from functools import wraps
+from types import SimpleNamespace
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.http import HttpResponse
+
+from .changes import changes_recorded
+from .invalidation import get_bus
+from .singleflight import FlightLock, await_for, wait_for
+
+DEFAULT_RESPONSE_CACHE_TIMEOUT = 300
+# How long past its lifetime a single-flight entry may still be served stale
+DEFAULT_RESPONSE_CACHE_STALE_TIMEOUT = 60
+# Bigger bodies are served but not stored
+RESPONSE_CACHE_MAX_BYTES = 1024 * 1024
+
+BUS_CHANNEL = "response-cache"
+
+_cached_views = set()
+_invalidations = {}
+
+
+def _cache():
+    return caches[getattr(settings, "RESPONSE_CACHE_ALIAS", "default")]
+
+
+def _tag_key(tag: str) -> str:
+    return f"rc:tag:{tag}"
+
+
+def instance_tag(model, pk) -> str:
+    return f"{model._meta.label_lower}:{pk}"
+
+
+def user_scope(request) -> str:
+    """Default scope: one entry per caller."""
+    return f"user:{request.user.pk}" if request.user.is_authenticated else "anon"
+
+
+def shared_scope(request) -> str:
+    """For responses that are the same for every caller allowed to see them."""
+    return "all"
+
+
+# ---------- invalidation ----------
+
+def _bump(tags):
+    version = time.time_ns()
+    _cache().set_many({_tag_key(tag): version for tag in tags}, None)
+
+
+def _pack_tags(tags) -> list:
+    """Coalesce "<prefix>:<id>" tags with consecutive ids into "<prefix>:<first>..<last>"."""
+    packed, ids = [], defaultdict(list)
+    for tag in tags:
+        prefix, _, pk = tag.rpartition(":")
+        if prefix and pk.isdigit():
+            ids[prefix].append(int(pk))
+        else:
+            packed.append(tag)
+    for prefix, pks in ids.items():
+        pks.sort()
+        first = last = pks[0]
+        for pk in pks[1:] + [None]:
+            if pk is not None and pk == last + 1:
+                last = pk
+                continue
+            packed.append(f"{prefix}:{first}" if first == last else f"{prefix}:{first}..{last}")
+            first = last = pk
+    return packed
+
+
+def _unpack_tags(packed) -> list:
+    tags = []
+    for tag in packed:
+        prefix, _, run = tag.rpartition(":")
+        first, dots, last = run.partition("..")
+        if prefix and dots and first.isdigit() and last.isdigit():
+            tags.extend(f"{prefix}:{pk}" for pk in range(int(first), int(last) + 1))
+        else:
+            tags.append(tag)
+    return tags
+
+
+def _on_bus_message(packed):
+    _bump(_unpack_tags(packed))
+
+
+def invalidate_tags(tags):
+    """Bump `tags` when the current transaction commits (now if there is none)."""
+    tags = set(tags)
+    if not tags:
+        return
+
+    def after_commit():
+        _bump(tags)
+        # A process-local cache (LocMem) needs the other workers told
+        if isinstance(_cache(), LocMemCache):
+            get_bus().publish(BUS_CHANNEL, _pack_tags(tags))
+
+    transaction.on_commit(after_commit)
+
+
+def cache_invalidation(model, related_tags=None, related_fields=()):
+    """
+    Invalidate "<app_label>.<model>:<pk>" whenever an instance is saved or
+    deleted. `related_tags(obj)` adds tags of responses built from it (e.g.
+    the profile of the ad's contractor); it may only read `related_fields`,
+    since set-based writes pass it rows of just those values instead of
+    loaded instances.
+    """
+    if related_tags is not None and not related_fields:
+        raise ValueError("related_tags needs the related_fields it reads.")
+    _invalidations[model] = (related_tags, tuple(related_fields))
+
+    def on_change(sender, instance, **kwargs):
+        tags = [instance_tag(model, instance.pk)]
+        if related_tags is not None:
+            tags.extend(related_tags(instance))
+        invalidate_tags(tags)
+
+    post_save.connect(on_change, sender=model, weak=False, dispatch_uid=f"rc-save-{model._meta.label_lower}")
+    post_delete.connect(on_change, sender=model, weak=False, dispatch_uid=f"rc-delete-{model._meta.label_lower}")
+
+
+def _on_changes_recorded(sender, ids, **kwargs):
+    if sender not in _invalidations:
+        return
+    related_tags, fields = _invalidations[sender]
+    tags = {instance_tag(sender, pk) for pk in ids}
+    if related_tags is not None:
+        # Distinct related values only: 10k ads of 20 customers give 20 rows
+        rows = sender._base_manager.filter(pk__in=ids).order_by().values_list(*fields).distinct()
+        for row in rows:
+            tags.update(related_tags(SimpleNamespace(**dict(zip(fields, row)))))
+    invalidate_tags(tags)
+
+
+changes_recorded.connect(_on_changes_recorded, weak=False, dispatch_uid="rc-changes-recorded")
+get_bus().subscribe(BUS_CHANNEL, _on_bus_message)
+
+
+# ---------- lookup / store ----------
+
+def _count(view_name: str, outcome: str):
+    cache = _cache()
+    key = f"rc:stats:{view_name}:{outcome}"
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.set(key, 1, None)
+
+
+def cache_stats() -> dict:
+    cache = _cache()
+    views = {}
+    for name in sorted(_cached_views):
+        hits = cache.get(f"rc:stats:{name}:hit", 0)
+        misses = cache.get(f"rc:stats:{name}:miss", 0)
+        views[name] = {"hits": hits, "misses": misses, "hit_rate": _rate(hits, misses)}
+        stale = cache.get(f"rc:stats:{name}:stale", 0)
+        if stale:
+            views[name]["stale"] = stale
+    hits = sum(v["hits"] for v in views.values())
+    misses = sum(v["misses"] for v in views.values())
+    return {"hits": hits, "misses": misses, "hit_rate": _rate(hits, misses), "views": views}
+
+
+def _rate(hits: int, misses: int):
+    return round(hits / (hits + misses), 4) if hits + misses else None
+
+
+def _lookup(key: str):
+    """Return (entry or None, fresh). Stale = outdated by a tag change or past its lifetime."""
+    cache = _cache()
+    entry = cache.get(key)
+    if entry is None:
+        return None, False
+    current = cache.get_many([_tag_key(tag) for tag in entry["tags"]])
+    fresh = entry["expires_at"] > time.time() and all(
+        current.get(_tag_key(tag)) == version for tag, version in entry["tags"].items()
+    )
+    return entry, fresh
+
+
+def _fresh(key: str):
+    entry, fresh = _lookup(key)
+    return entry if fresh else None
+
+
+def _store(key: str, tags, started: int, content: bytes, content_type: str, timeout: int, keep: int):
+    if len(content) > RESPONSE_CACHE_MAX_BYTES:
+        return
+    cache = _cache()
+    tag_keys = {tag: _tag_key(tag) for tag in set(tags)}
+    current = cache.get_many(list(tag_keys.values()))
+    missing = {k: time.time_ns() for k in tag_keys.values() if k not in current}
+    if missing:
+        cache.set_many(missing, None)
+        current.update(missing)
+    # Invalidated while we were reading: the body may be stale
+    if any(current[k] > started for k in tag_keys.values() if k not in missing):
+        return
+    entry = {
+        "tags": {tag: current[k] for tag, k in tag_keys.items()},
+        "content": content,
+        "content_type": content_type,
+        "expires_at": time.time() + timeout,
+    }
+    # `keep` > timeout leaves the body around to be served stale while recomputed
+    cache.set(key, entry, keep)
+
+
+def _cache_key(view, handler_name, request, scope) -> str:
+    params = sorted(request.query_params.lists())
+    raw = f"{request.path}?{params}|{request.accepted_media_type}"
+    digest = hashlib.md5(raw.encode("utf-8")).hexdigest()
+    return f"rc:{type(view).__module__}.{type(view).__qualname__}.{handler_name}:{scope(request)}:{digest}"
+
+
+def _hit_response(entry, status="HIT") -> HttpResponse:
+    response = HttpResponse(entry["content"], content_type=entry["content_type"])
+    response["X-Cache"] = status
+    return response
+
+
+def _prepare(view, request, response):
+    """Return (content or None, content_type, response to send)."""
+    if response.status_code != 200:
+        return None, None, response
+    if response.streaming:
+        return None, response["Content-Type"], response
+    if hasattr(response, "render") and getattr(response, "data", None) is not None:
+        # DRF Response: render now with the negotiated renderer
+        response.accepted_renderer = request.accepted_renderer
+        response.accepted_media_type = request.accepted_media_type
+        response.renderer_context = view.get_renderer_context()
+        response.render()
+    return response.content, response["Content-Type"], response
+
+
+class _Body:
+    """Copy of a streamed body, given up once it outgrows RESPONSE_CACHE_MAX_BYTES."""
+
+    def __init__(self):
+        self.chunks = []
+        self.size = 0
+
+    def add(self, chunk):
+        if self.chunks is None:
+            return
+        self.size += len(chunk)
+        if self.size > RESPONSE_CACHE_MAX_BYTES:
+            self.chunks = None
+        else:
+            self.chunks.append(chunk)
+
+    def complete(self, on_complete):
+        if self.chunks is not None:
+            on_complete(b"".join(self.chunks))
+
+
+async def _tee_async(chunks, on_complete, on_close):
+    body = _Body()
+    try:
+        async for chunk in chunks:
+            body.add(chunk)
+            yield chunk
+        await sync_to_async(body.complete)(on_complete)
+    finally:
+        on_close()
+
+
+def _tee_sync(chunks, on_complete, on_close):
+    body = _Body()
+    try:
+        for chunk in chunks:
+            body.add(chunk)
+            yield chunk
+        body.complete(on_complete)
+    finally:
+        on_close()
+
+
+def _released(lock):
+    return lock.release if lock is not None else (lambda: None)
+
+
+def cache_response(timeout=None, scope=user_scope, single_flight=False, serve_stale=False):
+    """
+    Cache a GET handler's 200 responses (see module docstring). Browsable
+    API (HTML) responses are never cached. Streamed responses keep
+    streaming; their body is stored once fully sent.
+
+    `single_flight=True` lets one caller per key (across threads and
+    workers, see common.singleflight) compute a missing entry while the
+    others wait for it. With `serve_stale=True` those others get the
+    previous body right away (X-Cache: STALE) if one is still around; it
+    is kept for RESPONSE_CACHE_STALE_TIMEOUT past its lifetime.
+    """
+
+    def decorator(handler):
+        view_name = handler.__qualname__
+        _cached_views.add(view_name)
+
+        def ttl():
+            if timeout is not None:
+                return timeout
+            return getattr(settings, "RESPONSE_CACHE_TIMEOUT", DEFAULT_RESPONSE_CACHE_TIMEOUT)
+
+        def begin(view, request):
+            if request.method not in ("GET", "HEAD") or request.accepted_renderer.format == "api":
+                return None
+            return _cache_key(view, handler.__name__, request, scope)
+
+        def contended(entry):
+            """Someone else is computing `key`: serve stale or None (then wait)."""
+            if entry is not None and serve_stale:
+                _count(view_name, "stale")
+                return _hit_response(entry, "STALE")
+            return None
+
+        def finish(view, request, key, started, response, lock):
+            release = _released(lock)
+            content, content_type, response = _prepare(view, request, response)
+            if content_type is None:
+                release()
+                return response
+            fresh_for = ttl()
+            keep = fresh_for
+            if serve_stale:
+                keep += getattr(settings, "RESPONSE_CACHE_STALE_TIMEOUT", DEFAULT_RESPONSE_CACHE_STALE_TIMEOUT)
+
+            def store(body):
+                _store(key, view.get_cache_tags(request, response), started, body, content_type, fresh_for, keep)
+
+            if content is not None:
+                try:
+                    store(content)
+                finally:
+                    release()
+            elif response.is_async:
+                response.streaming_content = _tee_async(response.streaming_content, store, release)
+            else:
+                response.streaming_content = _tee_sync(response.streaming_content, store, release)
+            response["X-Cache"] = "MISS"
+            return response
+
+        if iscoroutinefunction(handler):
+            # The cache backend may do I/O (database, memcached...): its calls, and
+            # rendering/storing the body, go through a thread, never on the loop
+            @wraps(handler)
+            async def wrapper(view, request, *args, **kwargs):
+                key = begin(view, request)
+                if key is None:
+                    return await handler(view, request, *args, **kwargs)
+                entry, fresh = await sync_to_async(_lookup)(key)
+                if fresh:
+                    await sync_to_async(_count)(view_name, "hit")
+                    return _hit_response(entry)
+                lock = None
+                if single_flight:
+                    lock = FlightLock(key)
+                    if not lock.acquire():
+                        response = await sync_to_async(contended)(entry)
+                        if response is not None:
+                            return response
+                        entry = await await_for(lock, lambda: sync_to_async(_fresh)(key))
+                        if entry is not None:
+                            lock.release()
+                            await sync_to_async(_count)(view_name, "hit")
+                            return _hit_response(entry)
+                await sync_to_async(_count)(view_name, "miss")
+                started = time.time_ns()
+                try:
+                    response = await handler(view, request, *args, **kwargs)
+                except BaseException:
+                    _released(lock)()
+                    raise
+                return await sync_to_async(finish)(view, request, key, started, response, lock)
+        else:
+            @wraps(handler)
+            def wrapper(view, request, *args, **kwargs):
+                key = begin(view, request)
+                if key is None:
+                    return handler(view, request, *args, **kwargs)
+                entry, fresh = _lookup(key)
+                if fresh:
+                    _count(view_name, "hit")
+                    return _hit_response(entry)
+                lock = None
+                if single_flight:
+                    lock = FlightLock(key)
+                    if not lock.acquire():
+                        response = contended(entry)
+                        if response is not None:
+                            return response
+                        entry = wait_for(lock, lambda: _fresh(key))
+                        if entry is not None:
+                            lock.release()
+                            _count(view_name, "hit")
+                            return _hit_response(entry)
+                _count(view_name, "miss")
+                started = time.time_ns()
+                try:
+                    response = handler(view, request, *args, **kwargs)
+                except BaseException:
+                    _released(lock)()
+                    raise
+                return finish(view, request, key, started, response, lock)
+
+        return wrapper
+
+    return decorator
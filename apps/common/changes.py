@@ -0,0 +1,118 @@
+"""
+Change feed for client sync.
+
+Apps call `track_changes(kind, Model, Serializer, visible_queryset)` in their
+AppConfig.ready(); every save/delete of that model then appends a
+ChangeLogEntry in the same transaction. Set-based writes (`.update()`,
+`bulk_create`) skip signals and call `record_changes()` themselves; it logs
+the rows with one INSERT ... SELECT and sends
+`changes_recorded(sender=Model, ids=...)` for other listeners (e.g. caches).
+
+`GET /api/changes/?since=<cursor>` returns the objects changed after the
+cursor that the caller can see, at most `limit` log entries per call.
+Objects that were deleted, or changed in a way that hides them from the
+caller, come back as `{"type", "id", "deleted": true}` so clients drop
+them. Those markers only go to the entry's audience: `track_changes(...,
+audience=expr)` stores, with every entry, an expression over the row (e.g.
+JSONArray("created_by_id")) listing the users who may ever see the object;
+kinds without one are public. Support/admin see every object.
+"""
+from django.db.models import F
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import Signal
+from django.utils import timezone
+
+from apps.users.permissions import is_admin, is_support
+
+from .bulk import insert_select
+from .models import ChangeLogEntry
+
+CHANGES_DEFAULT_LIMIT = 200
+CHANGES_MAX_LIMIT = 1000
+
+_sources = {}
+
+# Set-based writes: sender=model, ids=list of pks
+changes_recorded = Signal()
+
+
+class ChangeSource:
+    def __init__(self, kind, model, serializer_class, visible_queryset, audience=None):
+        self.kind = kind
+        self.model = model
+        self.serializer_class = serializer_class
+        # visible_queryset(user) -> QuerySet of objects the user may see
+        self.visible_queryset = visible_queryset
+        # Expression giving a JSON list of user ids, None = public
+        self.audience = audience
+
+    def log(self, queryset, deleted=False):
+        columns = {"object_id": F("pk")}
+        if self.audience is not None:
+            columns["audience"] = self.audience
+        insert_select(ChangeLogEntry, queryset, columns, kind=self.kind, deleted=deleted, created_at=timezone.now())
+
+
+def track_changes(kind: str, model, serializer_class, visible_queryset, audience=None):
+    source = _sources[kind] = ChangeSource(kind, model, serializer_class, visible_queryset, audience)
+
+    def on_save(sender, instance, **kwargs):
+        source.log(model._base_manager.filter(pk=instance.pk))
+
+    def on_delete(sender, instance, **kwargs):
+        # Before the DELETE, while the row is there to compute the audience from
+        source.log(model._base_manager.filter(pk=instance.pk), deleted=True)
+
+    post_save.connect(on_save, sender=model, weak=False, dispatch_uid=f"changes-save-{kind}")
+    pre_delete.connect(on_delete, sender=model, weak=False, dispatch_uid=f"changes-delete-{kind}")
+
+
+def record_changes(kind: str, ids):
+    ids = list(ids)
+    source = _sources[kind]
+    # Batch actions log up to BULK_ACTION_MAX_IDS rows at once
+    source.log(source.model._base_manager.filter(pk__in=ids))
+    changes_recorded.send(sender=source.model, ids=ids)
+
+
+def _in_audience(user, entry) -> bool:
+    return entry.audience is None or user.pk in entry.audience or is_admin(user) or is_support(user)
+
+
+def read_changes(user, since=0, limit=CHANGES_DEFAULT_LIMIT) -> dict:
+    # One extra row tells whether another page follows
+    entries = list(ChangeLogEntry.objects.filter(id__gt=since).order_by("id")[: limit + 1])
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    # Latest entry per object wins; keep the order in which objects last changed
+    latest = {}
+    for entry in entries:
+        latest.pop((entry.kind, entry.object_id), None)
+        latest[(entry.kind, entry.object_id)] = entry
+
+    # One query per kind, through that kind's visibility rules
+    ids_by_kind = {}
+    for (kind, object_id), entry in latest.items():
+        if not entry.deleted and kind in _sources:
+            ids_by_kind.setdefault(kind, []).append(object_id)
+    rows = {}
+    for kind, ids in ids_by_kind.items():
+        source = _sources[kind]
+        objects = list(source.visible_queryset(user).filter(pk__in=ids))
+        for obj, data in zip(objects, source.serializer_class(objects, many=True).data):
+            rows[(kind, obj.pk)] = data
+
+    changes = []
+    for key, entry in latest.items():
+        if key in rows:
+            changes.append({"type": entry.kind, "id": entry.object_id, "deleted": False, "data": rows[key]})
+        elif _in_audience(user, entry):
+            # Deleted, or no longer visible to the caller
+            changes.append({"type": entry.kind, "id": entry.object_id, "deleted": True})
+
+    return {
+        "cursor": entries[-1].id if entries else since,
+        "has_more": has_more,
+        "changes": changes,
+    }
@@ -0,0 +1,72 @@
+"""
+`?expand=creator,ad`: embed related objects instead of bare PKs.
+
+Serializers declare `expandable_fields = {"creator": UserNonSensitiveSerializer}`;
+the view adds the matching select_related/prefetch_related so an expanded page
+costs the same number of queries as an unexpanded one.
+"""
+from drf_spectacular.utils import OpenApiParameter
+
+from .fieldsets import parse_field_list
+
+
+def expand_parameter(*names) -> OpenApiParameter:
+    return OpenApiParameter(
+        name="expand",
+        type=str,
+        required=False,
+        description=f"Comma-separated related objects to embed: {', '.join(names)}.",
+    )
+
+
+class ExpandableSerializerMixin:
+    """
+    Accepts an `expand=` kwarg and swaps the listed PK fields for nested
+    serializers from `expandable_fields`. Unknown names are ignored.
+    """
+
+    expandable_fields = {}
+
+    def __init__(self, *args, **kwargs):
+        expand = kwargs.pop("expand", None)
+        super().__init__(*args, **kwargs)
+
+        for name in expand or ():
+            if name in self.expandable_fields and name in self.fields:
+                source = self.fields[name].source
+                extra = {"source": source} if source != name else {}
+                self.fields[name] = self.expandable_fields[name](read_only=True, **extra)
+
+
+class ExpandMixin:
+    """
+    ViewSet mixin for read actions. List it after SparseFieldsetMixin so the
+    sparse fieldset sees the joins added here.
+    """
+
+    expand_actions = ("list", "retrieve", "batch")
+
+    def get_expand(self):
+        if getattr(self, "action", None) not in self.expand_actions:
+            return []
+        expandable = self.get_serializer_class().expandable_fields
+        requested = parse_field_list(self.request.query_params.get("expand"))
+        return [name for name in requested if name in expandable]
+
+    def get_serializer(self, *args, **kwargs):
+        expand = self.get_expand()
+        if expand:
+            kwargs.setdefault("expand", expand)
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+
+        opts = queryset.model._meta
+        for name in self.get_expand():
+            field = opts.get_field(name)
+            if field.many_to_many or field.one_to_many:
+                queryset = queryset.prefetch_related(name)
+            else:
+                queryset = queryset.select_related(name)
+        return queryset
@@ -0,0 +1,105 @@
+"""
+Sparse fieldsets: `?fields=id,title` / `?omit=description`.
+
+The serializer drops the unrequested fields and the view narrows the SQL
+projection with `.defer()`, so large text columns are never read.
+"""
+from drf_spectacular.utils import OpenApiParameter
+
+SPARSE_FIELDSET_PARAMETERS = [
+    OpenApiParameter(
+        name="fields",
+        type=str,
+        required=False,
+        description="Comma-separated list of fields to return. Example: id,title,status",
+    ),
+    OpenApiParameter(
+        name="omit",
+        type=str,
+        required=False,
+        description="Comma-separated list of fields to leave out. Example: description",
+    ),
+]
+
+
+def parse_field_list(raw) -> list:
+    if not raw:
+        return []
+    return [name.strip() for name in raw.split(",") if name.strip()]
+
+
+class SparseFieldsetSerializerMixin:
+    """
+    Accepts `fields=` / `omit=` kwargs and drops every other field.
+    Unknown names are ignored.
+    """
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop("fields", None)
+        omit = kwargs.pop("omit", None)
+        super().__init__(*args, **kwargs)
+
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        for name in omit or ():
+            self.fields.pop(name, None)
+
+    def get_model_field_names(self):
+        """
+        Model fields needed to render the kept fields, or None if some field
+        can't be mapped (e.g. source="*" or a property) and nothing may be deferred.
+        """
+        model_fields = {f.name for f in self.Meta.model._meta.concrete_fields}
+        needed = set()
+        for field in self.fields.values():
+            root = field.source.split(".")[0]
+            if root not in model_fields:
+                return None
+            needed.add(root)
+        return needed
+
+
+class SparseFieldsetMixin:
+    """
+    ViewSet mixin for read actions. Always loads `sparse_fieldset_required`
+    (fields read by permission checks) so deferring never costs extra queries.
+    """
+
+    sparse_fieldset_actions = ("list", "retrieve", "batch")
+    sparse_fieldset_required = ()
+
+    def get_sparse_fieldset(self):
+        if getattr(self, "action", None) not in self.sparse_fieldset_actions:
+            return {}
+        params = self.request.query_params
+        fieldset = {}
+        if params.get("fields"):
+            fieldset["fields"] = parse_field_list(params["fields"])
+        if params.get("omit"):
+            fieldset["omit"] = parse_field_list(params["omit"])
+        return fieldset
+
+    def get_serializer(self, *args, **kwargs):
+        for key, value in self.get_sparse_fieldset().items():
+            kwargs.setdefault(key, value)
+        return super().get_serializer(*args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        fieldset = self.get_sparse_fieldset()
+        if not fieldset:
+            return queryset
+
+        needed = self.get_serializer_class()(**fieldset).get_model_field_names()
+        related = queryset.query.select_related
+        if needed is None or related is True:
+            return queryset
+
+        keep = needed | set(self.sparse_fieldset_required) | set(related or ())
+        deferred = [
+            f.name
+            for f in queryset.model._meta.concrete_fields
+            if not f.primary_key and f.name not in keep
+        ]
+        return queryset.defer(*deferred) if deferred else queryset
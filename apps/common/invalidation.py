@@ -0,0 +1,192 @@
+"""
+Cross-process invalidation bus for in-process caches.
+
+Workers on one host share a small SQLite log file (INVALIDATION_BUS_PATH,
+WAL mode, outside the source tree). `publish(channel, keys)` appends one
+row holding all the keys; every process runs one listener thread that reads
+rows from other processes every INVALIDATION_POLL_INTERVAL seconds (one
+indexed SELECT) and calls that channel's subscribers with the keys. A worker
+therefore evicts within about one poll interval of the commit. No broker is
+needed. Publishers keep messages small by coalescing their keys (see
+apps.common.cache, which sends id ranges).
+
+    bus = get_bus()
+    bus.subscribe("contractor-stats", lambda keys: ...)
+    bus.publish("contractor-stats", ["42"])   # after the DB commit
+
+config.wsgi / config.asgi call `start_listener_lazily()`: each process
+starts its own listener with its first request, so workers forked from a
+preloaded app (gunicorn --preload) don't inherit a dead thread. Processes
+that serve no requests (tests, management commands) publish but don't listen.
+"""
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLL_INTERVAL = 0.5
+# Rows older than this are pruned; a worker that stalls longer may miss them
+DEFAULT_RETENTION = 300
+POLL_BATCH_SIZE = 1000
+
+# One row per publish; `keys` is newline-separated
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS invalidation_message (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel TEXT NOT NULL,
+    keys TEXT NOT NULL,
+    origin TEXT NOT NULL,
+    created_at REAL NOT NULL
+)
+"""
+
+
+class InvalidationBus:
+    def __init__(self, path=None, poll_interval=DEFAULT_POLL_INTERVAL, retention=DEFAULT_RETENTION):
+        # None: INVALIDATION_BUS_PATH, read when the first connection opens
+        self._path = path
+        self.poll_interval = poll_interval
+        self.retention = retention
+        # Unique per process (and per bus), so we skip our own rows
+        self.origin = uuid.uuid4().hex
+        self.subscribers = defaultdict(list)
+        self.cursor = None
+        self.last_prune = 0.0
+        self.thread = None
+        self.pid = None
+        self._stop = threading.Event()
+        self._local = threading.local()
+        self._start_lock = threading.Lock()
+
+    @property
+    def path(self) -> str:
+        return str(self._path or default_path())
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def subscribe(self, channel: str, callback):
+        """`callback(keys)` runs in the listener thread for keys published by other processes."""
+        self.subscribers[channel].append(callback)
+
+    def publish(self, channel: str, keys):
+        keys = [str(key) for key in keys]
+        if not keys:
+            return
+        try:
+            self._connection().execute(
+                "INSERT INTO invalidation_message (channel, keys, origin, created_at) VALUES (?, ?, ?, ?)",
+                (channel, "\n".join(keys), self.origin, time.time()),
+            )
+        except sqlite3.Error:
+            # Other workers keep stale entries until their TTL; never fail the write path
+            logger.exception("Could not publish %d invalidations on %s", len(keys), channel)
+
+    def poll(self) -> int:
+        """Deliver messages published by other processes since the last poll. Returns how many."""
+        conn = self._connection()
+        if self.cursor is None:
+            self.cursor = conn.execute("SELECT COALESCE(MAX(id), 0) FROM invalidation_message").fetchone()[0]
+
+        rows = conn.execute(
+            "SELECT id, channel, keys, origin FROM invalidation_message WHERE id > ? ORDER BY id LIMIT ?",
+            (self.cursor, POLL_BATCH_SIZE),
+        ).fetchall()
+        keys_by_channel = defaultdict(list)
+        for row_id, channel, keys, origin in rows:
+            self.cursor = row_id
+            if origin != self.origin and channel in self.subscribers:
+                keys_by_channel[channel].extend(keys.split("\n"))
+        for channel, keys in keys_by_channel.items():
+            for callback in self.subscribers[channel]:
+                try:
+                    callback(keys)
+                except Exception:
+                    logger.exception("Invalidation subscriber failed on %s", channel)
+
+        now = time.time()
+        if now - self.last_prune > self.retention / 5:
+            self.last_prune = now
+            conn.execute("DELETE FROM invalidation_message WHERE created_at < ?", (now - self.retention,))
+        return len(rows)
+
+    def _running(self) -> bool:
+        return self.thread is not None and self.thread.is_alive() and self.pid == os.getpid()
+
+    def start(self):
+        """Start the listener thread (once per process; restarts after fork)."""
+        if self._running():
+            return
+        with self._start_lock:
+            if self._running():
+                return
+            self.pid = os.getpid()
+            self._local = threading.local()
+            self._stop.clear()
+            self.cursor = None
+            # Position the cursor now: only what is published from here on is delivered
+            self.poll()
+            self.thread = threading.Thread(target=self._run, name="invalidation-bus", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                while self.poll() >= POLL_BATCH_SIZE:
+                    pass
+            except sqlite3.Error:
+                logger.exception("Invalidation bus poll failed")
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def default_path() -> str:
+    from django.conf import settings
+
+    return getattr(settings, "INVALIDATION_BUS_PATH", None) or os.path.join(
+        tempfile.gettempdir(), "invalidation.sqlite3"
+    )
+
+
+def get_bus() -> InvalidationBus:
+    global _bus
+    if _bus is None:
+        from django.conf import settings
+
+        with _bus_lock:
+            if _bus is None:
+                interval = getattr(settings, "INVALIDATION_POLL_INTERVAL", DEFAULT_POLL_INTERVAL)
+                _bus = InvalidationBus(poll_interval=interval)
+    return _bus
+
+
+def start_listener(**kwargs):
+    # start() is a no-op while this process's thread runs, so this is cheap per request
+    get_bus().start()
+
+
+def start_listener_lazily():
+    """Start the listener in each serving process with its first request."""
+    from django.core.signals import request_started
+
+    request_started.connect(start_listener, dispatch_uid="invalidation-bus-start")
@@ -0,0 +1,127 @@
+"""
+Small persistent job scheduler on top of ScheduledJob.
+
+Apps register handlers with `@job_handler("kind")` and queue work with
+`schedule_job()`. `run_due_jobs()` finds due jobs with a range scan on the
+(status, run_at) index, claims a batch with one conditional UPDATE (so
+several workers never run the same job) and runs the handlers.
+"""
+import logging
+import uuid
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import ScheduledJob
+
+logger = logging.getLogger(__name__)
+
+JOB_BATCH_SIZE = 100
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_DELAY = timedelta(minutes=1)
+# RUNNING jobs older than this belong to a dead worker and are re-queued
+JOB_LEASE = timedelta(minutes=5)
+
+_handlers = {}
+
+
+def job_handler(kind: str):
+    """Register `func(object_id)` as the handler for jobs of `kind`."""
+
+    def register(func):
+        _handlers[kind] = func
+        return func
+
+    return register
+
+
+def schedule_job(kind: str, object_id: int, run_at) -> ScheduledJob:
+    """Queue a job, or move the pending one for the same (kind, object_id)."""
+    job, _ = ScheduledJob.objects.update_or_create(
+        kind=kind,
+        object_id=object_id,
+        status=ScheduledJob.Status.PENDING,
+        defaults={"run_at": run_at},
+    )
+    return job
+
+
+def unschedule_job(kind: str, object_id: int) -> int:
+    return ScheduledJob.objects.filter(
+        kind=kind, object_id=object_id, status=ScheduledJob.Status.PENDING
+    ).delete()[0]
+
+
+def requeue_expired_leases(now) -> int:
+    # A job re-scheduled while it was running already has a newer pending row
+    newer_pending = ScheduledJob.objects.filter(
+        kind=OuterRef("kind"),
+        object_id=OuterRef("object_id"),
+        status=ScheduledJob.Status.PENDING,
+    )
+    return (
+        ScheduledJob.objects.filter(status=ScheduledJob.Status.RUNNING, claimed_at__lt=now - JOB_LEASE)
+        .exclude(Exists(newer_pending))
+        .update(status=ScheduledJob.Status.PENDING, claimed_by="", claimed_at=None)
+    )
+
+
+def claim_due_jobs(batch_size=JOB_BATCH_SIZE, now=None) -> list:
+    now = now or timezone.now()
+    token = uuid.uuid4().hex
+
+    with transaction.atomic():
+        ids = list(
+            ScheduledJob.objects.filter(status=ScheduledJob.Status.PENDING, run_at__lte=now)
+            .order_by("run_at")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        # status is re-checked: jobs another worker claimed meanwhile are skipped
+        ScheduledJob.objects.filter(id__in=ids, status=ScheduledJob.Status.PENDING).update(
+            status=ScheduledJob.Status.RUNNING, claimed_by=token, claimed_at=now, updated_at=now
+        )
+    return list(ScheduledJob.objects.filter(claimed_by=token, status=ScheduledJob.Status.RUNNING))
+
+
+def run_job(job: ScheduledJob, now=None):
+    now = now or timezone.now()
+    handler = _handlers.get(job.kind)
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for {job.kind!r}.")
+        handler(job.object_id)
+    except Exception as exc:
+        logger.exception("Scheduled job %s failed", job.pk)
+        job.attempts += 1
+        job.last_error = repr(exc)
+        if job.attempts < JOB_MAX_ATTEMPTS:
+            job.status = ScheduledJob.Status.PENDING
+            job.run_at = now + JOB_RETRY_DELAY * job.attempts
+        else:
+            job.status = ScheduledJob.Status.FAILED
+        job.claimed_by = ""
+        job.claimed_at = None
+        try:
+            with transaction.atomic():
+                job.save(update_fields=["attempts", "last_error", "status", "run_at", "claimed_by", "claimed_at", "updated_at"])
+        except IntegrityError:
+            # A newer pending job for the same object exists; it supersedes the retry
+            ScheduledJob.objects.filter(pk=job.pk).update(status=ScheduledJob.Status.FAILED)
+        return False
+
+    ScheduledJob.objects.filter(pk=job.pk).update(status=ScheduledJob.Status.DONE, updated_at=now)
+    return True
+
+
+def run_due_jobs(batch_size=JOB_BATCH_SIZE, now=None) -> int:
+    """Run one batch of due jobs. Returns how many were claimed."""
+    now = now or timezone.now()
+    requeue_expired_leases(now)
+    jobs = claim_due_jobs(batch_size=batch_size, now=now)
+    for job in jobs:
+        run_job(job, now=now)
+    return len(jobs)
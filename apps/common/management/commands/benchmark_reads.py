@@ -0,0 +1,132 @@
+import asyncio
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncClient, Client, override_settings
+from rest_framework.authtoken.models import Token
+
+User = get_user_model()
+
+DEFAULT_PATHS = ("/api/ads/", "/api/tickets/", "/api/profiles/contractors/")
+
+
+def _read(response) -> bytes:
+    if not response.streaming:
+        return response.content
+    if hasattr(response.streaming_content, "__aiter__"):
+        return async_to_sync(_ajoin)(response.streaming_content)
+    return b"".join(response.streaming_content)
+
+
+async def _ajoin(chunks) -> bytes:
+    return b"".join([chunk async for chunk in chunks])
+
+
+async def _aread(response) -> bytes:
+    if response.streaming and hasattr(response.streaming_content, "__aiter__"):
+        return await _ajoin(response.streaming_content)
+    return _read(response)
+
+
+def run_wsgi(path, total, concurrency, headers) -> list:
+    """
+    One thread per in-flight request, like a threaded WSGI server. Async
+    views still run, each in its own event loop.
+    """
+
+    def worker(count):
+        client = Client()
+        try:
+            codes = []
+            for _ in range(count):
+                response = client.get(path, headers=headers)
+                _read(response)
+                codes.append(response.status_code)
+            return codes
+        finally:
+            connections.close_all()
+
+    counts = [total // concurrency + (i < total % concurrency) for i in range(concurrency)]
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return [code for codes in pool.map(worker, counts) for code in codes]
+
+
+def run_asgi(path, total, concurrency, headers) -> list:
+    """`concurrency` coroutines on one event loop, like a single ASGI worker."""
+
+    async def main():
+        client = AsyncClient()
+        gate = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with gate:
+                response = await client.get(path, headers=headers)
+                await _aread(response)
+                return response.status_code
+
+        return await asyncio.gather(*(one() for _ in range(total)))
+
+    return async_to_sync(main)()
+
+
+RUNNERS = {"wsgi": run_wsgi, "asgi": run_asgi}
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark read endpoints through the WSGI handler (thread per request) and the "
+        "ASGI handler (one event loop): requests/sec and Python heap per concurrent request. "
+        "Both modes serve the views of this checkout, so 'wsgi' runs the async views through "
+        "async_to_sync; for the sync-view baseline, run the command on a checkout from before "
+        "the views became async. Runs in-process against the configured database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", required=True, help="Username to authenticate as.")
+        parser.add_argument(
+            "--path", action="append", help=f"Endpoint to hit (repeatable). Default: {', '.join(DEFAULT_PATHS)}"
+        )
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--mode", choices=list(RUNNERS), action="append")
+
+    def handle(self, *args, **opts):
+        user = User.objects.filter(username=opts["user"]).first()
+        if user is None:
+            raise CommandError(f"User {opts['user']!r} does not exist.")
+        if opts["requests"] < 1 or opts["concurrency"] < 1:
+            raise CommandError("--requests and --concurrency must be positive.")
+
+        token, _ = Token.objects.get_or_create(user=user)
+        headers = {"Authorization": f"Token {token.key}"}
+        total, concurrency = opts["requests"], opts["concurrency"]
+
+        # DEBUG would keep every SQL query in memory
+        with override_settings(DEBUG=False, ALLOWED_HOSTS=["testserver"]):
+            for path in opts["path"] or DEFAULT_PATHS:
+                for mode in opts["mode"] or list(RUNNERS):
+                    run = RUNNERS[mode]
+                    run(path, concurrency, concurrency, headers)  # warm up
+
+                    started = time.perf_counter()
+                    codes = run(path, total, concurrency, headers)
+                    elapsed = time.perf_counter() - started
+
+                    # Separate pass: tracemalloc slows everything down
+                    tracemalloc.start()
+                    baseline = tracemalloc.get_traced_memory()[0]
+                    run(path, concurrency, concurrency, headers)
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+
+                    errors = sum(code >= 400 for code in codes)
+                    self.stdout.write(
+                        f"{mode} {path}: {total / elapsed:.0f} req/s, "
+                        f"{(peak - baseline) / concurrency / 1024:.1f} KiB/concurrent request"
+                        + (self.style.ERROR(f", {errors} errors") if errors else "")
+                    )
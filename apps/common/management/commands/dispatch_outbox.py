@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.common.outbox import OUTBOX_BATCH_SIZE, dispatch_all
+
+
+class Command(BaseCommand):
+    help = "Deliver outbox events to registered consumers in batches. Use --loop to keep polling."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=OUTBOX_BATCH_SIZE)
+        parser.add_argument("--loop", action="store_true", help="Keep running, sleeping --interval when idle.")
+        parser.add_argument("--interval", type=float, default=1.0)
+
+    def handle(self, *args, **opts):
+        total = 0
+        while True:
+            delivered = dispatch_all(batch_size=opts["batch_size"])
+            total += delivered
+            if delivered:
+                continue
+            if not opts["loop"]:
+                break
+            time.sleep(opts["interval"])
+        self.stdout.write(self.style.SUCCESS(f"Delivered {total} events."))
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from apps.ads.views import AdViewSet
+from apps.common.export import (
+    EXPORT_CHUNK_SIZE,
+    EXPORT_FORMATS,
+    filter_export_queryset,
+    iter_export_lines,
+    iter_keyset_rows,
+)
+from apps.reviews.views import ReviewViewSet
+from apps.tickets.views import TicketViewSet
+
+# Same columns as the /export/ endpoints
+EXPORTS = {
+    "ads": AdViewSet,
+    "tickets": TicketViewSet,
+    "reviews": ReviewViewSet,
+}
+
+
+class Command(BaseCommand):
+    help = "Stream ads, tickets or reviews as NDJSON/CSV in id order (keyset-chunked, constant memory)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("target", choices=list(EXPORTS))
+        parser.add_argument("--output", choices=list(EXPORT_FORMATS), default="ndjson")
+        parser.add_argument("--status")
+        parser.add_argument("--created-after", help="ISO date/datetime, inclusive.")
+        parser.add_argument("--created-before", help="ISO date/datetime, exclusive.")
+        parser.add_argument("--after-id", type=int, default=0, help="Resume after this id.")
+        parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+        parser.add_argument("--file", help="Write to this path instead of stdout.")
+
+    def handle(self, *args, **opts):
+        viewset = EXPORTS[opts["target"]]
+        try:
+            queryset = filter_export_queryset(
+                viewset.queryset.model._default_manager.all(),
+                status=opts["status"],
+                created_after=opts["created_after"],
+                created_before=opts["created_before"],
+            )
+        except ValidationError as exc:
+            raise CommandError(exc.detail)
+
+        fields = list(viewset.export_fields)
+        rows = iter_keyset_rows(queryset, fields, after_id=opts["after_id"], chunk_size=opts["chunk_size"])
+        lines = iter_export_lines(fields, rows, opts["output"])
+
+        if opts["file"]:
+            with open(opts["file"], "w", encoding="utf-8", newline="") as fh:
+                fh.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending="")
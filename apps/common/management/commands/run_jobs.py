@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.common.jobs import JOB_BATCH_SIZE, run_due_jobs
+
+
+class Command(BaseCommand):
+    help = "Run due scheduled jobs in batches. Use --loop to keep polling."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=JOB_BATCH_SIZE)
+        parser.add_argument("--loop", action="store_true", help="Keep running, sleeping --interval when idle.")
+        parser.add_argument("--interval", type=float, default=5.0)
+
+    def handle(self, *args, **opts):
+        total = 0
+        while True:
+            claimed = run_due_jobs(batch_size=opts["batch_size"])
+            total += claimed
+            if claimed:
+                continue
+            if not opts["loop"]:
+                break
+            time.sleep(opts["interval"])
+        self.stdout.write(self.style.SUCCESS(f"Ran {total} jobs."))
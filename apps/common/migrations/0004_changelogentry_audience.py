@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-19 04:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0003_changelogentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='changelogentry',
+            name='audience',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
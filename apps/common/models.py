@@ -0,0 +1,106 @@
+from django.db import models
+from django.db.models import Q
+
+
+class ScheduledJob(models.Model):
+    """
+    Persistent delayed job: run handler `kind` for `object_id` at `run_at`.
+    Handlers are registered in apps.common.jobs; run by `manage.py run_jobs`.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        RUNNING = "RUNNING", "Running"
+        DONE = "DONE", "Done"
+        FAILED = "FAILED", "Failed"
+
+    kind = models.CharField(max_length=50)
+    object_id = models.PositiveBigIntegerField()
+    run_at = models.DateTimeField()
+
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    # Set when a worker claims the job (lease for crash recovery)
+    claimed_by = models.CharField(max_length=40, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["run_at"]
+        constraints = [
+            # Re-scheduling moves the pending job instead of adding another one
+            models.UniqueConstraint(
+                fields=["kind", "object_id"],
+                condition=Q(status="PENDING"),
+                name="uniq_pending_job_per_object",
+            ),
+        ]
+        indexes = [
+            # Due jobs: status=PENDING AND run_at <= now ORDER BY run_at
+            models.Index(fields=["status", "run_at"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"ScheduledJob#{self.pk} {self.kind}:{self.object_id} at {self.run_at} ({self.status})"
+
+
+class OutboxEvent(models.Model):
+    """
+    Append-only log of domain events (e.g. "ad.assigned"), written in the same
+    transaction as the state change. Consumers read it in id order.
+    """
+
+    topic = models.CharField(max_length=50)
+    aggregate = models.CharField(max_length=30)
+    aggregate_id = models.PositiveBigIntegerField()
+    payload = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+
+    def __str__(self) -> str:
+        return f"OutboxEvent#{self.pk} {self.topic} {self.aggregate}={self.aggregate_id}"
+
+
+class OutboxOffset(models.Model):
+    """
+    Delivery position of one outbox consumer: every event with
+    id <= last_event_id has been handled.
+    """
+
+    consumer = models.CharField(max_length=100, unique=True)
+    last_event_id = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.consumer} @ {self.last_event_id}"
+
+
+class ChangeLogEntry(models.Model):
+    """
+    Monotonic change log for client sync: one row per saved/deleted object.
+    The id is the sync cursor (see apps.common.changes).
+    """
+
+    kind = models.CharField(max_length=20)
+    object_id = models.PositiveBigIntegerField()
+    deleted = models.BooleanField(default=False)
+    # Ids of the users who may learn that the object changed even when they can't
+    # see it (anymore); null = anyone
+    audience = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+
+    def __str__(self) -> str:
+        return f"Change#{self.pk} {self.kind}={self.object_id}{' (deleted)' if self.deleted else ''}"
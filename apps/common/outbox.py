@@ -0,0 +1,115 @@
+"""
+Transactional outbox.
+
+Write paths call `record_event()` inside the same `transaction.atomic()` as
+the state change, so an event exists if and only if the change committed.
+Side effects (notifications, stats, reindexing) run later in
+`manage.py dispatch_outbox`, which feeds each registered consumer the events
+after its stored offset, in batches. Delivery is at-least-once: a consumer
+that fails is retried from the same offset on the next run.
+
+Listeners that must stay exact and in step with the write (e.g. rollup
+counters) connect to `events_recorded` instead; it is sent inside the same
+transaction.
+"""
+import logging
+
+from django.db.models import F
+from django.dispatch import Signal
+from django.utils import timezone
+
+from .bulk import insert_select
+from .models import OutboxEvent, OutboxOffset
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = 500
+
+_consumers = {}
+
+# sender=model, topic=str, ids=list of pks, payload=dict
+events_recorded = Signal()
+
+
+def outbox_consumer(name: str, topics=None):
+    """
+    Register `func(events)` as consumer `name`. `topics` limits it to those
+    topics (None = all). `events` is a list of OutboxEvent in id order.
+    """
+
+    def register(func):
+        _consumers[name] = (func, tuple(topics) if topics else None)
+        return func
+
+    return register
+
+
+def _event(topic, aggregate, aggregate_id, payload):
+    return OutboxEvent(topic=topic, aggregate=aggregate, aggregate_id=aggregate_id, payload=payload)
+
+
+def record_event(topic: str, instance, **payload) -> OutboxEvent:
+    """Append one event for `instance`. Call inside the transaction that changed it."""
+    event = _event(topic, instance._meta.model_name, instance.pk, payload)
+    event.save()
+    events_recorded.send(sender=type(instance), topic=topic, ids=[instance.pk], payload=payload)
+    return event
+
+
+def record_events(topic: str, model, ids, **payload) -> int:
+    """
+    Append one event per id (set-based transitions) and return how many.
+    The rows are selected from `model`'s table, so only ids that exist get one.
+    """
+    ids = list(ids)
+    # One INSERT ... SELECT: batch actions append up to BULK_ACTION_MAX_IDS events
+    count = insert_select(
+        OutboxEvent,
+        model._base_manager.filter(pk__in=ids),
+        {"aggregate_id": F("pk")},
+        topic=topic,
+        aggregate=model._meta.model_name,
+        payload=payload,
+        created_at=timezone.now(),
+    )
+    events_recorded.send(sender=model, topic=topic, ids=ids, payload=payload)
+    return count
+
+
+def dispatch_consumer(name: str, batch_size=OUTBOX_BATCH_SIZE) -> int:
+    """Deliver the next batch to one consumer. Returns how many events it got."""
+    func, topics = _consumers[name]
+    offset, _ = OutboxOffset.objects.get_or_create(consumer=name)
+
+    events = OutboxEvent.objects.filter(id__gt=offset.last_event_id).order_by("id")
+    if topics:
+        events = events.filter(topic__in=topics)
+    events = list(events[:batch_size])
+    if not events:
+        return 0
+
+    func(events)
+
+    # Compare-and-set: if another worker already moved the offset, keep theirs
+    OutboxOffset.objects.filter(pk=offset.pk, last_event_id=offset.last_event_id).update(
+        last_event_id=events[-1].id
+    )
+    return len(events)
+
+
+def dispatch_all(batch_size=OUTBOX_BATCH_SIZE) -> int:
+    """One batch for every consumer; a failing consumer doesn't block the others."""
+    delivered = 0
+    for name in list(_consumers):
+        try:
+            delivered += dispatch_consumer(name, batch_size=batch_size)
+        except Exception:
+            logger.exception("Outbox consumer %s failed", name)
+    return delivered
+
+
+@outbox_consumer("log")
+def log_events(events):
+    for event in events:
+        logger.info("%s %s=%s %s", event.topic, event.aggregate, event.aggregate_id, event.payload)
+
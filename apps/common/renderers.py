@@ -0,0 +1,35 @@
+from rest_framework.renderers import JSONRenderer
+
+
+def is_row_list(value) -> bool:
+    return isinstance(value, list) and all(item is None or isinstance(item, dict) for item in value)
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    """
+    Opt-in compact format (`Accept: application/vnd.columnar+json` or
+    `?format=columnar`): a list of objects becomes
+    `{"fields": [...], "rows": [[...], ...]}` so keys are sent once per page.
+    Pagination keys (count/next/previous) are kept next to fields/rows.
+    Anything else (single objects, errors) is rendered unchanged.
+    """
+
+    media_type = "application/vnd.columnar+json"
+    format = "columnar"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if is_row_list(data):
+            data = self.to_columns(data)
+        elif isinstance(data, dict) and is_row_list(data.get("results")):
+            data = {
+                **{k: v for k, v in data.items() if k != "results"},
+                **self.to_columns(data["results"]),
+            }
+        return super().render(data, accepted_media_type, renderer_context)
+
+    @staticmethod
+    def to_columns(items: list) -> dict:
+        first = next((item for item in items if item is not None), None)
+        fields = list(first) if first else []
+        rows = [None if item is None else [item.get(f) for f in fields] for item in items]
+        return {"fields": fields, "rows": rows}
@@ -0,0 +1,122 @@
+"""
+Single-flight: when many callers miss the same expensive value at once, one
+computes it and the rest wait for its result (or take a stale copy).
+
+`FlightLock(key)` is a lock that is exclusive across threads of a worker (a threading.Lock) and across workers of the host (an flock on
+a file in SINGLE_FLIGHT_LOCK_DIR; the kernel drops it if the process dies,
+so a crashed leader never wedges the key). `acquire()` doesn't block unless
+given a timeout, which also makes it a per-key mutex for short critical
+sections (e.g. one ad creation per creator, apps.ads.views). Keys hash onto LOCK_STRIPES
+locks/files, which keeps both bounded; a collision only makes a caller wait
+a little. The lock may be released from another thread or coroutine than
+the one that acquired it, e.g. when a streamed response finishes.
+
+`wait_for()` / `await_for()` poll until the value shows up or the lock frees
+up (then the caller becomes the leader), bounded by a timeout after which
+the caller just computes it itself.
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX: thread-level only
+    fcntl = None
+
+DEFAULT_WAIT_TIMEOUT = 10.0
+POLL_INTERVAL = 0.02
+LOCK_STRIPES = 1024
+
+_thread_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+
+def _lock_dir() -> str:
+    path = getattr(settings, "SINGLE_FLIGHT_LOCK_DIR", None) or os.path.join(
+        tempfile.gettempdir(), "singleflight"
+    )
+    os.makedirs(path, exist_ok=True)
+    return str(path)
+
+
+class FlightLock:
+    def __init__(self, key: str):
+        stripe = int(hashlib.sha1(key.encode("utf-8")).hexdigest(), 16) % LOCK_STRIPES
+        self.name = f"stripe-{stripe}"
+        self._thread_lock = _thread_locks[stripe]
+        self._fd = None
+        self.held = False
+
+    def acquire(self, timeout=0) -> bool:
+        """Take the lock, polling for up to `timeout` seconds if it is held."""
+        deadline = time.monotonic() + timeout
+        while not self._try_acquire():
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(POLL_INTERVAL)
+        return True
+
+    def _try_acquire(self) -> bool:
+        if self.held:
+            return True
+        if not self._thread_lock.acquire(blocking=False):
+            return False
+        if fcntl is not None:
+            fd = os.open(os.path.join(_lock_dir(), self.name), os.O_CREAT | os.O_RDWR, 0o600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                self._thread_lock.release()
+                return False
+            self._fd = fd
+        self.held = True
+        return True
+
+    def release(self):
+        if not self.held:
+            return
+        self.held = False
+        if self._fd is not None:
+            # Closing the descriptor drops the flock
+            os.close(self._fd)
+            self._fd = None
+        self._thread_lock.release()
+
+
+def wait_for(lock: FlightLock, check, timeout=DEFAULT_WAIT_TIMEOUT):
+    """
+    Poll `check()` while someone else holds `lock`. Returns its first non-None
+    result, or None once we hold the lock ourselves or the timeout passed.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        value = check()
+        if value is not None:
+            return value
+        if lock.acquire():
+            # The leader gave up without a value (error or uncacheable result)
+            return check()
+    return None
+
+
+async def await_for(lock: FlightLock, check, timeout=DEFAULT_WAIT_TIMEOUT):
+    """
+    `wait_for()` for coroutines: sleeps on the event loop instead of the
+    thread. `check` is a coroutine function.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        await asyncio.sleep(POLL_INTERVAL)
+        value = await check()
+        if value is not None:
+            return value
+        if lock.acquire():
+            return await check()
+    return None
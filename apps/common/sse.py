@@ -0,0 +1,190 @@
+"""
+Server-Sent Events for status changes (ASGI only).
+
+Each worker process runs one `EventBroker`. While anyone is connected it
+polls the outbox (shared by all workers, so a change made on any worker is
+seen by every worker) once per SSE_POLL_INTERVAL, works out who is involved
+in each event and pushes it into those users' in-memory queues. An idle
+subscriber is one asyncio.Queue; the DB cost is one query per worker per
+interval, no matter how many clients are connected.
+
+Apps say who receives events about their objects with `@event_audience`.
+
+Browsers' EventSource can't send an Authorization header, so clients first
+POST /api/events/ticket/ (normal token auth) for a stream ticket: a signed
+user id, valid for SSE_TICKET_MAX_AGE seconds and only for opening a
+stream. It goes in the URL instead of the API token, which would end up in
+access and proxy logs.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.core import signing
+
+from .models import OutboxEvent
+from .streaming import dumps
+
+logger = logging.getLogger(__name__)
+
+SSE_POLL_INTERVAL = 1.0
+# A failing poll (e.g. database down) is retried with doubling delays up to this
+SSE_MAX_BACKOFF = 30.0
+SSE_KEEPALIVE = 15.0
+SSE_BATCH_SIZE = 500
+SSE_QUEUE_SIZE = 100
+SSE_TICKET_MAX_AGE = 60
+SSE_TICKET_SALT = "apps.common.sse.ticket"
+
+_audiences = {}
+
+
+def event_audience(aggregate: str):
+    """
+    Register `func(ids) -> {object_id: {user_id, ...}}` for outbox events whose
+    aggregate is `aggregate`. Only events with an audience are streamed.
+    """
+
+    def register(func):
+        _audiences[aggregate] = func
+        return func
+
+    return register
+
+
+def latest_event_id() -> int:
+    return OutboxEvent.objects.order_by("-id").values_list("id", flat=True).first() or 0
+
+
+def fetch_messages(after_id: int, limit=SSE_BATCH_SIZE):
+    """Return (new cursor, [(user_id, message), ...]) for events after `after_id`."""
+    events = list(
+        OutboxEvent.objects.filter(id__gt=after_id, aggregate__in=list(_audiences)).order_by("id")[:limit]
+    )
+    if not events:
+        return after_id, []
+
+    ids_by_aggregate = defaultdict(set)
+    for event in events:
+        ids_by_aggregate[event.aggregate].add(event.aggregate_id)
+    audience = {
+        aggregate: _audiences[aggregate](list(ids))
+        for aggregate, ids in ids_by_aggregate.items()
+    }
+
+    messages = []
+    for event in events:
+        message = {
+            "id": event.id,
+            "topic": event.topic,
+            "type": event.aggregate,
+            "object_id": event.aggregate_id,
+            "payload": event.payload,
+            "created_at": event.created_at,
+        }
+        for user_id in audience[event.aggregate].get(event.aggregate_id, ()):
+            messages.append((user_id, message))
+    return events[-1].id, messages
+
+
+def issue_stream_ticket(user_id: int) -> str:
+    return signing.TimestampSigner(salt=SSE_TICKET_SALT).sign(str(user_id))
+
+
+def read_stream_ticket(ticket: str):
+    """User id of a valid, unexpired ticket, else None."""
+    try:
+        return int(signing.TimestampSigner(salt=SSE_TICKET_SALT).unsign(ticket, max_age=SSE_TICKET_MAX_AGE))
+    except (signing.BadSignature, ValueError):
+        return None
+
+
+def format_sse(message: dict) -> str:
+    return f"id: {message['id']}\nevent: {message['topic']}\ndata: {dumps(message)}\n\n"
+
+
+class EventBroker:
+    def __init__(self, poll_interval=SSE_POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self.subscribers = defaultdict(set)
+        self.cursor = None
+        self.task = None
+
+    async def subscribe(self, user_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=SSE_QUEUE_SIZE)
+        self.subscribers[user_id].add(queue)
+        if self.cursor is None:
+            self.cursor = await sync_to_async(latest_event_id)()
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.run())
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue):
+        queues = self.subscribers.get(user_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.subscribers[user_id]
+
+    def publish(self, user_id: int, message: dict):
+        for queue in self.subscribers.get(user_id, ()):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Slow client: it can catch up with Last-Event-ID or /api/changes/
+                pass
+
+    async def poll_once(self):
+        self.cursor, messages = await sync_to_async(fetch_messages)(self.cursor)
+        for user_id, message in messages:
+            self.publish(user_id, message)
+
+    async def run(self):
+        delay = self.poll_interval
+        while self.subscribers:
+            try:
+                await self.poll_once()
+            except Exception:
+                # Keep the connected clients; the cursor is unchanged, so nothing is lost
+                logger.exception("Event broker poll failed, retrying in %.1fs", delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, SSE_MAX_BACKOFF)
+                continue
+            delay = self.poll_interval
+            await asyncio.sleep(self.poll_interval)
+        # Next subscriber starts from the newest event, not from where we stopped
+        self.cursor = None
+
+
+broker = EventBroker()
+
+
+async def stream_events(user_id: int, last_event_id=None, broker=broker):
+    """Async generator of SSE frames for one connection."""
+    queue = await broker.subscribe(user_id)
+    try:
+        yield "retry: 3000\n\n"
+        if last_event_id is not None:
+            # Catch up on what was missed while disconnected, batch by batch until current
+            while True:
+                cursor, missed = await sync_to_async(fetch_messages)(last_event_id)
+                if cursor == last_event_id:
+                    break
+                for uid, message in missed:
+                    if uid == user_id:
+                        yield format_sse(message)
+                # Everything up to here was sent; the broker may have queued some of it too
+                last_event_id = cursor
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if last_event_id is not None and message["id"] <= last_event_id:
+                continue
+            yield format_sse(message)
+    finally:
+        broker.unsubscribe(user_id, queue)
+
@@ -0,0 +1,115 @@
+"""
+Incremental JSON for unpaginated list payloads.
+
+`StreamedList` wraps a queryset + serializer; `StreamingJSONResponse` writes
+the surrounding object normally and each StreamedList row by row from
+`QuerySet.iterator(chunk_size=...)`, so memory is bounded by the chunk size.
+
+Pick the iterator by how the request arrived, not by whether the view is
+async: each handler consumes the other kind in full before sending a byte.
+Pass `asynchronous=is_asgi(request)` to stream from `QuerySet.aiterator()`
+under ASGI.
+"""
+import json
+
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+STREAM_CHUNK_SIZE = 500
+
+
+def dumps(value) -> str:
+    # Same output as DRF's JSONRenderer (compact, unicode)
+    return json.dumps(
+        value,
+        cls=JSONEncoder,
+        ensure_ascii=not api_settings.UNICODE_JSON,
+        separators=(",", ":") if api_settings.COMPACT_JSON else None,
+        allow_nan=not api_settings.STRICT_JSON,
+    )
+
+
+def is_asgi(request) -> bool:
+    """True if `request` (Django or DRF) came in through the ASGI handler."""
+    return isinstance(getattr(request, "_request", request), ASGIRequest)
+
+
+class StreamedList:
+    def __init__(self, queryset, serializer_class, chunk_size=STREAM_CHUNK_SIZE, context=None):
+        self.queryset = queryset
+        self.serializer_class = serializer_class
+        self.chunk_size = chunk_size
+        self.context = context or {}
+
+    def iter_json(self):
+        yield "["
+        buffer = []
+        for i, obj in enumerate(self.queryset.iterator(chunk_size=self.chunk_size)):
+            row = dumps(self.serializer_class(obj, context=self.context).data)
+            buffer.append(row if i == 0 else "," + row)
+            if len(buffer) >= self.chunk_size:
+                yield "".join(buffer)
+                buffer = []
+        if buffer:
+            yield "".join(buffer)
+        yield "]"
+
+    async def aiter_json(self):
+        yield "["
+        buffer = []
+        i = 0
+        async for obj in self.queryset.aiterator(chunk_size=self.chunk_size):
+            row = dumps(self.serializer_class(obj, context=self.context).data)
+            buffer.append(row if i == 0 else "," + row)
+            i += 1
+            if len(buffer) >= self.chunk_size:
+                yield "".join(buffer)
+                buffer = []
+        if buffer:
+            yield "".join(buffer)
+        yield "]"
+
+
+def iter_json(value):
+    if isinstance(value, StreamedList):
+        yield from value.iter_json()
+    elif isinstance(value, dict):
+        yield "{"
+        for i, (key, item) in enumerate(value.items()):
+            yield ("," if i else "") + dumps(str(key)) + ":"
+            yield from iter_json(item)
+        yield "}"
+    else:
+        yield dumps(value)
+
+
+async def aiter_json(value):
+    if isinstance(value, StreamedList):
+        async for chunk in value.aiter_json():
+            yield chunk
+    elif isinstance(value, dict):
+        yield "{"
+        for i, (key, item) in enumerate(value.items()):
+            yield ("," if i else "") + dumps(str(key)) + ":"
+            async for chunk in aiter_json(item):
+                yield chunk
+        yield "}"
+    else:
+        yield dumps(value)
+
+
+async def _aencode(chunks):
+    async for chunk in chunks:
+        yield chunk.encode("utf-8")
+
+
+class StreamingJSONResponse(StreamingHttpResponse):
+    def __init__(self, data, status=None, asynchronous=False, **kwargs):
+        kwargs.setdefault("content_type", "application/json")
+        if asynchronous:
+            chunks = _aencode(aiter_json(data))
+        else:
+            chunks = (chunk.encode("utf-8") for chunk in iter_json(data))
+        super().__init__(chunks, status=status, **kwargs)
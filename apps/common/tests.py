@@ -0,0 +1,487 @@
+import asyncio
+import json
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import OperationalError
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, APITestCase
+from rest_framework.views import APIView
+
+from apps.ads.models import Ad, AdRequest
+from apps.tickets.models import Ticket
+
+from .cache import _cache, _pack_tags, _unpack_tags, cache_response, invalidate_tags, shared_scope
+from .invalidation import InvalidationBus
+from .outbox import record_event
+from .singleflight import FlightLock
+from .sse import (
+    SSE_TICKET_MAX_AGE,
+    EventBroker,
+    broker,
+    fetch_messages,
+    issue_stream_ticket,
+    latest_event_id,
+    read_stream_ticket,
+    stream_events,
+)
+
+User = get_user_model()
+
+
+class ExportCommandTests(TestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username="customerX",
+            email="customerX@example.com",
+            phone="09000000400",
+            password="CustomerPass123",
+            role="CUSTOMER",
+        )
+        self.ads = [
+            Ad.objects.create(creator=self.customer, title=f"Ad {i}", description="Leaking")
+            for i in range(5)
+        ]
+
+    def test_export_walks_all_chunks_in_id_order(self):
+        out = StringIO()
+        # chunk smaller than the table: several keyset queries, no OFFSET
+        with self.assertNumQueries(3):
+            call_command("export_data", "ads", "--chunk-size", "2", stdout=out)
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([r["id"] for r in rows], [ad.id for ad in self.ads])
+
+    def test_export_after_id_resumes(self):
+        out = StringIO()
+        call_command("export_data", "ads", "--output", "csv", "--after-id", str(self.ads[2].id), stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0].split(",")[0], "id")
+        self.assertEqual([int(line.split(",")[0]) for line in lines[1:]], [ad.id for ad in self.ads[3:]])
+
+
+class ChangeFeedTests(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username="customerS",
+            email="customerS@example.com",
+            phone="09000000410",
+            password="CustomerPass123",
+            role="CUSTOMER",
+        )
+        self.other = User.objects.create_user(
+            username="customerS2",
+            email="customerS2@example.com",
+            phone="09000000411",
+            password="CustomerPass123",
+            role="CUSTOMER",
+        )
+
+    def _changes(self, user, since=0, **params):
+        self.client.force_authenticate(user=user)
+        res = self.client.get(reverse("changes"), {"since": since, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_feed_returns_only_visible_changes_after_cursor(self):
+        ad = Ad.objects.create(creator=self.customer, title="Fix sink", description="Leaking")
+        Ticket.objects.create(created_by=self.customer, title="Help", message="Need support")
+
+        data = self._changes(self.customer)
+        self.assertEqual([(c["type"], c["id"]) for c in data["changes"]][0], ("ad", ad.id))
+        self.assertEqual({c["type"] for c in data["changes"]}, {"ad", "ticket"})
+        cursor = data["cursor"]
+
+        # other customer sees the OPEN ad but not the ticket
+        self.assertEqual([c["type"] for c in self._changes(self.other)["changes"]], ["ad"])
+
+        # nothing new since the cursor
+        self.assertEqual(self._changes(self.customer, since=cursor)["changes"], [])
+
+        # several saves of one object collapse into one change
+        ad.title = "Fix kitchen sink"
+        ad.save()
+        ad.save()
+        data = self._changes(self.customer, since=cursor)
+        self.assertEqual(len(data["changes"]), 1)
+        self.assertEqual(data["changes"][0]["data"]["title"], "Fix kitchen sink")
+
+    def test_feed_is_bounded_and_reports_deletes(self):
+        ads = [Ad.objects.create(creator=self.customer, title=f"Ad {i}", description="x") for i in range(3)]
+        deleted_id = ads[0].id
+        ads[0].delete()
+
+        # 4 log entries: 3 creates + 1 delete; ads[0] no longer exists, so its create
+        # already reads as a removal
+        data = self._changes(self.customer, limit=2)
+        self.assertTrue(data["has_more"])
+        self.assertEqual([(c["id"], c["deleted"]) for c in data["changes"]], [(deleted_id, True), (ads[1].id, False)])
+
+        data = self._changes(self.customer, since=data["cursor"], limit=2)
+        self.assertFalse(data["has_more"])
+        self.assertEqual(data["changes"][0]["id"], ads[2].id)
+        self.assertEqual(data["changes"][1], {"type": "ad", "id": deleted_id, "deleted": True})
+
+
+    def test_hidden_and_deleted_objects_are_reported_to_their_audience_only(self):
+        contractor = User.objects.create_user(
+            username="contractorS",
+            email="contractorS@example.com",
+            phone="09000000412",
+            password="ContractorPass123",
+            role="CONTRACTOR",
+        )
+        ad = Ad.objects.create(creator=self.customer, title="Fix sink", description="Leaking")
+        ticket = Ticket.objects.create(created_by=self.customer, title="Help", message="Need support")
+        cursor = self._changes(self.other)["cursor"]
+
+        # The OPEN ad goes to a contractor: other customers can't see it anymore
+        ad.status = "ASSIGNED"
+        ad.assigned_contractor = contractor
+        ad.save()
+        ticket_id = ticket.id
+        ticket.delete()
+
+        self.assertEqual(
+            self._changes(self.other, since=cursor)["changes"], [{"type": "ad", "id": ad.id, "deleted": True}]
+        )
+        changes = self._changes(self.customer, since=cursor)["changes"]
+        self.assertEqual([(c["type"], c["deleted"]) for c in changes], [("ad", False), ("ticket", True)])
+        self.assertEqual(changes[1]["id"], ticket_id)
+
+
+class EventStreamTests(TestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username="customerE",
+            email="customerE@example.com",
+            phone="09000000420",
+            password="CustomerPass123",
+            role="CUSTOMER",
+        )
+        self.contractor = User.objects.create_user(
+            username="contractorE",
+            email="contractorE@example.com",
+            phone="09000000421",
+            password="ContractorPass123",
+            role="CONTRACTOR",
+        )
+        self.ad = Ad.objects.create(creator=self.customer, title="Fix sink", description="Leaking")
+        self.token = Token.objects.create(user=self.customer)
+
+    def test_events_go_to_involved_users_only(self):
+        request = AdRequest.objects.create(ad=self.ad, contractor=self.contractor)
+        ticket = Ticket.objects.create(created_by=self.contractor, title="Help", message="Need support")
+        record_event("adrequest.applied", request)
+        record_event("ad.canceled", self.ad)
+        record_event("ticket.closed", ticket)
+
+        cursor, messages = fetch_messages(0)
+        routed = sorted((m["topic"], user_id) for user_id, m in messages)
+        self.assertEqual(routed, sorted([
+            ("adrequest.applied", self.customer.id),
+            ("adrequest.applied", self.contractor.id),
+            ("ad.canceled", self.customer.id),
+            ("ad.canceled", self.contractor.id),
+            ("ticket.closed", self.contractor.id),
+        ]))
+        self.assertEqual(fetch_messages(cursor), (cursor, []))
+
+    async def test_stream_pushes_status_change(self):
+        res = await self.async_client.get("/api/events/")
+        self.assertEqual(res.status_code, 401)
+        # The API token is not accepted in the URL
+        res = await self.async_client.get("/api/events/", {"token": self.token.key})
+        self.assertEqual(res.status_code, 401)
+
+        res = await self.async_client.post("/api/events/ticket/", headers={"Authorization": f"Token {self.token.key}"})
+        self.assertEqual(res.status_code, 200)
+        ticket = res.json()["ticket"]
+
+        broker.poll_interval = 0.01
+        try:
+            res = await self.async_client.get("/api/events/", {"ticket": ticket})
+            self.assertEqual(res.status_code, 200)
+            self.assertEqual(res["Content-Type"], "text/event-stream")
+            stream = res.streaming_content
+            self.assertEqual(await anext(stream), b"retry: 3000\n\n")
+
+            event = await sync_to_async(record_event)("ad.canceled", self.ad)
+            frame = (await asyncio.wait_for(anext(stream), timeout=5)).decode()
+            self.assertTrue(frame.startswith(f"id: {event.id}\nevent: ad.canceled\n"))
+            self.assertEqual(json.loads(frame.split("data: ")[1])["object_id"], self.ad.id)
+
+            # Client disconnect: the ASGI handler cancels the pending read
+            reader = asyncio.ensure_future(anext(stream))
+            await asyncio.sleep(0.05)
+            reader.cancel()
+            await asyncio.wait_for(broker.task, timeout=5)
+            self.assertEqual(dict(broker.subscribers), {})
+        finally:
+            broker.poll_interval = 1.0
+
+    async def test_broker_keeps_polling_after_a_failed_poll(self):
+        test_broker = EventBroker(poll_interval=0.01)
+        calls = []
+
+        def flaky(after_id):
+            calls.append(after_id)
+            if len(calls) == 1:
+                raise OperationalError("database is locked")
+            return fetch_messages(after_id)
+
+        with mock.patch("apps.common.sse.fetch_messages", flaky), self.assertLogs("apps.common.sse", "ERROR"):
+            queue = await test_broker.subscribe(self.customer.id)
+            event = await sync_to_async(record_event)("ad.canceled", self.ad)
+            message = await asyncio.wait_for(queue.get(), timeout=5)
+        self.assertEqual(message["id"], event.id)
+        # The failed poll left the cursor alone, so the retry read from the same place
+        self.assertEqual(calls[0], calls[1])
+
+        test_broker.unsubscribe(self.customer.id, queue)
+        await asyncio.wait_for(test_broker.task, timeout=5)
+
+    def test_stream_tickets_expire_and_cannot_be_forged(self):
+        ticket = issue_stream_ticket(self.customer.id)
+        self.assertEqual(read_stream_ticket(ticket), self.customer.id)
+        self.assertIsNone(read_stream_ticket(ticket.replace(f"{self.customer.id}:", f"{self.contractor.id}:", 1)))
+        self.assertIsNone(read_stream_ticket(self.token.key))
+        with mock.patch("django.core.signing.time.time", return_value=time.time() + SSE_TICKET_MAX_AGE + 1):
+            self.assertIsNone(read_stream_ticket(ticket))
+
+    async def test_catch_up_replays_every_missed_batch(self):
+        start = await sync_to_async(latest_event_id)()
+        missed = [await sync_to_async(record_event)("ad.canceled", self.ad) for _ in range(3)]
+        test_broker = EventBroker(poll_interval=0.01)
+
+        def one_per_batch(after_id):
+            return fetch_messages(after_id, limit=1)
+
+        with mock.patch("apps.common.sse.fetch_messages", one_per_batch):
+            stream = stream_events(self.customer.id, last_event_id=start, broker=test_broker)
+            try:
+                self.assertEqual(await anext(stream), "retry: 3000\n\n")
+                frames = [await asyncio.wait_for(anext(stream), timeout=5) for _ in missed]
+            finally:
+                await stream.aclose()
+        self.assertEqual([frame.split("\n")[0] for frame in frames], [f"id: {event.id}" for event in missed])
+        await asyncio.wait_for(test_broker.task, timeout=5)
+
+    async def test_reconnect_does_not_repeat_caught_up_events(self):
+        missed = await sync_to_async(record_event)("ad.canceled", self.ad)
+        test_broker = EventBroker(poll_interval=0.01)
+        # The broker hasn't read `missed` yet either, so it queues it as well
+        test_broker.cursor = missed.id - 1
+        stream = stream_events(self.customer.id, last_event_id=missed.id - 1, broker=test_broker)
+        try:
+            self.assertEqual(await anext(stream), "retry: 3000\n\n")
+            self.assertTrue((await anext(stream)).startswith(f"id: {missed.id}\n"))
+
+            event = await sync_to_async(record_event)("ad.canceled", self.ad)
+            frame = await asyncio.wait_for(anext(stream), timeout=5)
+            self.assertTrue(frame.startswith(f"id: {event.id}\n"))
+        finally:
+            await stream.aclose()
+        await asyncio.wait_for(test_broker.task, timeout=5)
+
+
+class AsyncReadTests(TestCase):
+    """Read paths served through the ASGI handler must not touch the ORM synchronously."""
+
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username="customerA",
+            email="customerA@example.com",
+            phone="09000000430",
+            password="CustomerPass123",
+            role="CUSTOMER",
+        )
+        self.ad = Ad.objects.create(creator=self.customer, title="Fix sink", description="Leaking")
+        Ad.objects.create(creator=self.customer, title="Paint wall", description="Blue")
+        token = Token.objects.create(user=self.customer)
+        self.headers = {"Authorization": f"Token {token.key}"}
+
+    async def test_ad_list_and_retrieve(self):
+        res = await self.async_client.get("/api/ads/", {"expand": "creator"}, headers=self.headers)
+        self.assertEqual(res.status_code, 200)
+        body = res.json()
+        self.assertEqual(body["count"], 2)
+        self.assertEqual(body["results"][0]["creator"]["username"], "customerA")
+
+        res = await self.async_client.get(f"/api/ads/{self.ad.id}/", {"fields": "id,title"}, headers=self.headers)
+        self.assertEqual(res.json(), {"id": self.ad.id, "title": "Fix sink"})
+
+        res = await self.async_client.get("/api/ads/999999/", headers=self.headers)
+        self.assertEqual(res.status_code, 404)
+        res = await self.async_client.get("/api/ads/")
+        self.assertEqual(res.status_code, 401)
+
+    async def test_profiles_and_contractor_list(self):
+        res = await self.async_client.get("/api/profiles/contractors/", headers=self.headers)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["count"], 0)
+
+        res = await self.async_client.get(f"/api/profiles/customers/{self.customer.id}/", headers=self.headers)
+        body = json.loads(b"".join([chunk async for chunk in res.streaming_content]))
+        self.assertEqual(len(body["ads"]), 2)
+
+    async def test_cached_views_reach_the_cache_off_the_event_loop(self):
+        def off_loop_cache():
+            with self.assertRaises(RuntimeError):
+                asyncio.get_running_loop()
+            return _cache()
+
+        with mock.patch("apps.common.cache._cache", off_loop_cache):
+            for expected in ("MISS", "HIT"):
+                res = await self.async_client.get("/api/profiles/contractors/", headers=self.headers)
+                self.assertEqual((res.status_code, res["X-Cache"]), (200, expected))
+
+
+# Child process: subscribe, report readiness, then print when the key arrives
+BUS_WORKER = """
+import sys, time
+from apps.common.invalidation import InvalidationBus
+bus = InvalidationBus(sys.argv[1], poll_interval=0.05)
+received = []
+bus.subscribe("stats", lambda keys: received.append((time.time(), keys)))
+bus.start()
+print("ready", flush=True)
+while not received:
+    time.sleep(0.005)
+print(received[0][0], ",".join(received[0][1]), flush=True)
+"""
+
+
+class InvalidationBusTests(SimpleTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "bus.sqlite3"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_own_events_are_not_redelivered(self):
+        a, b = InvalidationBus(self.path), InvalidationBus(self.path)
+        got_a, got_b = [], []
+        a.subscribe("stats", got_a.extend)
+        b.subscribe("stats", got_b.extend)
+        a.poll()
+        b.poll()
+
+        a.publish("stats", ["7", "8"])
+        b.publish("other", ["9"])
+        # One message per publish, whatever the number of keys
+        self.assertEqual((a.poll(), b.poll()), (2, 2))
+        self.assertEqual((got_a, got_b), ([], ["7", "8"]))
+
+    def test_cache_tags_are_sent_as_id_runs(self):
+        tags = {f"ads.ad:{pk}" for pk in range(1, 10001)} | {"ads.ad:10003", "profile:4", "contractor-stats"}
+        packed = _pack_tags(tags)
+        self.assertEqual(sorted(packed), ["ads.ad:1..10000", "ads.ad:10003", "contractor-stats", "profile:4"])
+        self.assertEqual(set(_unpack_tags(packed)), tags)
+
+    def test_bus_file_lives_outside_the_source_tree(self):
+        self.assertFalse(Path(InvalidationBus().path).resolve().is_relative_to(settings.BASE_DIR))
+
+    def test_workers_converge_within_bounded_delay(self):
+        workers = [
+            subprocess.Popen(
+                [sys.executable, "-c", BUS_WORKER, str(self.path)],
+                cwd=settings.BASE_DIR,
+                stdout=subprocess.PIPE,
+                text=True,
+            )
+            for _ in range(3)
+        ]
+        try:
+            for worker in workers:
+                self.assertEqual(worker.stdout.readline().strip(), "ready")
+
+            published_at = time.time()
+            InvalidationBus(self.path).publish("stats", ["42"])
+
+            delays = []
+            for worker in workers:
+                received_at, keys = worker.stdout.readline().split()
+                self.assertEqual(keys, "42")
+                delays.append(float(received_at) - published_at)
+            # poll interval is 50 ms; allow for a slow CI box
+            self.assertLess(max(delays), 1.0)
+        finally:
+            for worker in workers:
+                worker.kill()
+                worker.wait()
+                worker.stdout.close()
+
+
+class SlowStatsView(APIView):
+    authentication_classes = []
+    permission_classes = []
+    calls = 0
+
+    def get_cache_tags(self, request, response):
+        return ["test-stats"]
+
+    @cache_response(scope=shared_scope, timeout=60, single_flight=True, serve_stale=True)
+    def get(self, request):
+        type(self).calls += 1
+        time.sleep(0.2)
+        return Response({"calls": type(self).calls})
+
+
+class SingleFlightTests(SimpleTestCase):
+    def setUp(self):
+        SlowStatsView.calls = 0
+        self.view = SlowStatsView.as_view()
+        self.factory = APIRequestFactory()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.settings = override_settings(SINGLE_FLIGHT_LOCK_DIR=self.tmp.name)
+        self.settings.enable()
+
+    def tearDown(self):
+        self.settings.disable()
+        self.tmp.cleanup()
+
+    def _get(self, path="/stats/"):
+        response = self.view(self.factory.get(path))
+        return response["X-Cache"], json.loads(response.content)["calls"]
+
+    def test_lock_is_exclusive_until_released(self):
+        first, second = FlightLock("k"), FlightLock("k")
+        self.assertTrue(first.acquire())
+        self.assertFalse(second.acquire())
+        first.release()
+        self.assertTrue(second.acquire())
+        second.release()
+
+    def test_concurrent_misses_compute_once(self):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: self._get("/stats/?k=once"), range(8)))
+        self.assertEqual(SlowStatsView.calls, 1)
+        self.assertEqual(sorted(cache for cache, _ in results), ["HIT"] * 7 + ["MISS"])
+        self.assertEqual({calls for _, calls in results}, {1})
+
+    def test_stale_entry_served_while_recomputing(self):
+        self._get("/stats/?k=stale")
+        invalidate_tags(["test-stats"])
+
+        leader = threading.Thread(target=self._get, args=("/stats/?k=stale",))
+        leader.start()
+        time.sleep(0.05)
+        self.assertEqual(self._get("/stats/?k=stale"), ("STALE", 1))
+        leader.join()
+        self.assertEqual(self._get("/stats/?k=stale"), ("HIT", 2))
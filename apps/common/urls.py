@@ -0,0 +1,10 @@
+from django.urls import path
+
+from .views import CacheStatsView, ChangesView, StreamTicketView, event_stream
+
+urlpatterns = [
+    path("changes/", ChangesView.as_view(), name="changes"),
+    path("events/", event_stream, name="events"),
+    path("events/ticket/", StreamTicketView.as_view(), name="events-ticket"),
+    path("cache/stats/", CacheStatsView.as_view(), name="cache-stats"),
+]
@@ -0,0 +1,145 @@
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework import permissions, serializers, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from drf_spectacular.utils import OpenApiExample, OpenApiResponse, extend_schema
+
+from apps.users.permissions import IsAdmin
+
+from .cache import cache_stats
+from .changes import CHANGES_DEFAULT_LIMIT, CHANGES_MAX_LIMIT, read_changes
+from .sse import SSE_TICKET_MAX_AGE, issue_stream_ticket, read_stream_ticket, stream_events
+
+User = get_user_model()
+
+
+class ChangesQuerySerializer(serializers.Serializer):
+    since = serializers.IntegerField(min_value=0, default=0)
+    limit = serializers.IntegerField(min_value=1, max_value=CHANGES_MAX_LIMIT, default=CHANGES_DEFAULT_LIMIT)
+
+
+class ChangesView(APIView):
+    """
+    Incremental sync: objects (ads, ad requests, tickets, reviews) changed
+    after `since`, filtered by what the caller can see.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(
+        tags=["Sync"],
+        summary="Changes since cursor",
+        description=(
+            "Returns objects changed after `since` that you can see, oldest change first. "
+            "Objects deleted or no longer visible to you come as `deleted: true` (drop them locally). "
+            "Pass the returned `cursor` as `since` next time; repeat while `has_more` is true."
+        ),
+        parameters=[ChangesQuerySerializer],
+        responses={200: OpenApiResponse(description="Changes page")},
+        examples=[
+            OpenApiExample(
+                "Changes response",
+                value={
+                    "cursor": 1042,
+                    "has_more": False,
+                    "changes": [
+                        {"type": "ad", "id": 10, "deleted": False, "data": {"id": 10, "status": "ASSIGNED"}},
+                        {"type": "ticket", "id": 3, "deleted": True},
+                    ],
+                },
+                response_only=True,
+            )
+        ],
+    )
+    def get(self, request):
+        s = ChangesQuerySerializer(data=request.query_params)
+        s.is_valid(raise_exception=True)
+        payload = read_changes(request.user, since=s.validated_data["since"], limit=s.validated_data["limit"])
+        return Response(payload, status=status.HTTP_200_OK)
+
+
+class CacheStatsView(APIView):
+    permission_classes = [permissions.IsAuthenticated, IsAdmin]
+
+    @extend_schema(
+        tags=["Sync"],
+        summary="Response cache stats",
+        description="ADMIN only. Hit/miss counters of the response cache, per cached view (this process).",
+        responses={200: OpenApiResponse(description="Cache stats")},
+        examples=[
+            OpenApiExample(
+                "Cache stats response",
+                value={
+                    "hits": 90,
+                    "misses": 10,
+                    "hit_rate": 0.9,
+                    "views": {"AdViewSet.retrieve": {"hits": 90, "misses": 10, "hit_rate": 0.9}},
+                },
+                response_only=True,
+            )
+        ],
+    )
+    def get(self, request):
+        return Response(cache_stats(), status=status.HTTP_200_OK)
+
+
+class StreamTicketView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    @extend_schema(
+        tags=["Sync"],
+        summary="Event stream ticket",
+        description=(
+            f"Short-lived ticket for opening GET /api/events/?ticket=... (valid {SSE_TICKET_MAX_AGE} s, "
+            "only for the event stream). Fetch a new one before each (re)connect."
+        ),
+        request=None,
+        responses={200: OpenApiResponse(description="Stream ticket")},
+        examples=[
+            OpenApiExample(
+                "Stream ticket response",
+                value={"ticket": "5:1tQx2b:3f1u...", "expires_in": SSE_TICKET_MAX_AGE},
+                response_only=True,
+            )
+        ],
+    )
+    def post(self, request):
+        return Response(
+            {"ticket": issue_stream_ticket(request.user.pk), "expires_in": SSE_TICKET_MAX_AGE},
+            status=status.HTTP_200_OK,
+        )
+
+
+async def event_stream(request):
+    """
+    GET /api/events/?ticket=... - Server-Sent Events with status changes of
+    the ads, ad requests and tickets you are involved in. Needs an ASGI server
+    (`uvicorn config.asgi:application`); under WSGI each client would hold a
+    worker thread.
+
+    The ticket comes from POST /api/events/ticket/; API tokens are not
+    accepted in the URL. Reconnects resume after the `Last-Event-ID` header
+    (or `?last_event_id=`).
+    """
+    if request.method != "GET":
+        return JsonResponse({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+
+    user_id = read_stream_ticket(request.GET.get("ticket", ""))
+    if user_id is None or not await User.objects.filter(pk=user_id, is_active=True).aexists():
+        return JsonResponse({"detail": "Missing, invalid or expired stream ticket."}, status=401)
+
+    last_event_id = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return JsonResponse({"detail": "Last-Event-ID must be an integer."}, status=400)
+
+    response = StreamingHttpResponse(
+        stream_events(user_id, last_event_id=last_event_id),
+        content_type="text/event-stream",
+    )
+    response["Cache-Control"] = "no-cache"
+    # Tell nginx not to buffer the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
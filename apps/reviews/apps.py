@@ -4,3 +4,27 @@ from django.apps import AppConfig
 class ReviewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.reviews'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+
+        from apps.common.cache import cache_invalidation
+        from apps.common.changes import track_changes
+        from apps.users.leaderboard import on_review_changed
+        from apps.users.profile_views import CONTRACTOR_STATS_TAG, profile_tag
+        from .models import Review
+        from .serializers import ReviewSerializer
+
+        # Reviews are readable by every authenticated user (see ReviewViewSet)
+        track_changes("review", Review, ReviewSerializer, lambda user: Review.objects.all())
+
+        # Contractor profiles and the contractor list show reviews and ratings
+        cache_invalidation(
+            Review,
+            related_tags=lambda review: [profile_tag(review.contractor_id), CONTRACTOR_STATS_TAG],
+            related_fields=("contractor_id",),
+        )
+
+        # Leaderboard rows follow their reviews in the same transaction
+        post_save.connect(on_review_changed, sender=Review, dispatch_uid="leaderboard-review-save")
+        post_delete.connect(on_review_changed, sender=Review, dispatch_uid="leaderboard-review-delete")
@@ -1,9 +1,15 @@
+from django.db import transaction
 from rest_framework import serializers
 from apps.ads.models import Ad
+from apps.ads.serializers import AdSummarySerializer
+from apps.common.expand import ExpandableSerializerMixin
+from apps.common.fieldsets import SparseFieldsetSerializerMixin
+from apps.common.outbox import record_event
+from apps.users.serializers import UserNonSensitiveSerializer
 from .models import Review
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(ExpandableSerializerMixin, SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     author = serializers.PrimaryKeyRelatedField(read_only=True)
     contractor = serializers.PrimaryKeyRelatedField(read_only=True)
     created_at = serializers.DateTimeField(read_only=True)
@@ -12,6 +18,12 @@ class ReviewSerializer(serializers.ModelSerializer):
         model = Review
         fields = ("id", "ad", "author", "contractor", "rating", "comment", "created_at")
 
+    expandable_fields = {
+        "ad": AdSummarySerializer,
+        "author": UserNonSensitiveSerializer,
+        "contractor": UserNonSensitiveSerializer,
+    }
+
     def validate_ad(self, ad: Ad):
         request = self.context["request"]
         user = request.user
@@ -29,13 +41,16 @@ class ReviewSerializer(serializers.ModelSerializer):
         request = self.context["request"]
         ad: Ad = validated_data["ad"]
 
-        return Review.objects.create(
-            ad=ad,
-            author=request.user,
-            contractor=ad.assigned_contractor,
-            rating=validated_data["rating"],
-            comment=validated_data.get("comment", ""),
-        )
+        with transaction.atomic():
+            review = Review.objects.create(
+                ad=ad,
+                author=request.user,
+                contractor=ad.assigned_contractor,
+                rating=validated_data["rating"],
+                comment=validated_data.get("comment", ""),
+            )
+            record_event("review.created", review, ad=ad.id, contractor=review.contractor_id, rating=review.rating)
+        return review
 
 
 class ReviewPublicSerializer(serializers.ModelSerializer):
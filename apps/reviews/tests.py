@@ -1,3 +1,51 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
 
-# Create your tests here.
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from apps.ads.models import Ad
+from .models import Review
+
+User = get_user_model()
+
+
+class ReviewExpandTests(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username="customerR",
+            email="customerR@example.com",
+            phone="09000000300",
+            password="CustomerPass123",
+            role="CUSTOMER",
+        )
+        self.contractor = User.objects.create_user(
+            username="contractorR",
+            email="contractorR@example.com",
+            phone="09000000301",
+            password="ContractorPass123",
+            role="CONTRACTOR",
+        )
+        now = timezone.now()
+        for i in range(5):
+            ad = Ad.objects.create(
+                creator=self.customer,
+                title=f"Ad {i}",
+                description="Leaking",
+                status="DONE",
+                assigned_contractor=self.contractor,
+                work_reported_done_at=now,
+                completed_at=now,
+            )
+            Review.objects.create(ad=ad, author=self.customer, contractor=self.contractor, rating=5)
+
+    def test_expand_embeds_related_with_constant_queries(self):
+        self.client.force_authenticate(user=self.customer)
+        for name, key in (("ad", "title"), ("author", "username"), ("contractor", "username")):
+            with self.subTest(expand=name):
+                with self.assertNumQueries(2):
+                    res = self.client.get(reverse("review-list"), {"expand": name})
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                self.assertEqual(len(res.data["results"]), 5)
+                self.assertIn(key, res.data["results"][0][name])
@@ -1,16 +1,32 @@
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import permissions, viewsets
 
-from drf_spectacular.utils import OpenApiExample, extend_schema
+from drf_spectacular.utils import OpenApiExample, extend_schema, extend_schema_view
 
-from apps.users.permissions import IsCustomerOrAdmin
+from apps.common.batch import BatchRetrieveMixin
+from apps.common.expand import ExpandMixin, expand_parameter
+from apps.common.export import ExportMixin
+from apps.common.fieldsets import SPARSE_FIELDSET_PARAMETERS, SparseFieldsetMixin
+from apps.common.outbox import record_event
+from apps.users.permissions import IsCustomerOrAdmin, IsSupportOrAdmin
 from .models import Review
 from .permissions import IsReviewAuthorOrSupportOrAdmin
 from .serializers import ReviewSerializer
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
+REVIEW_READ_PARAMETERS = SPARSE_FIELDSET_PARAMETERS + [expand_parameter("ad", "author", "contractor")]
+
+
+@extend_schema_view(
+    list=extend_schema(parameters=REVIEW_READ_PARAMETERS),
+    retrieve=extend_schema(parameters=REVIEW_READ_PARAMETERS),
+)
+class ReviewViewSet(SparseFieldsetMixin, ExpandMixin, BatchRetrieveMixin, ExportMixin, viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
-    queryset = Review.objects.select_related("ad", "author", "contractor")
+    # Joins are added per ?expand= (see ExpandMixin)
+    queryset = Review.objects.all()
+    export_fields = ("id", "ad_id", "author_id", "contractor_id", "rating", "comment", "created_at")
 
     def get_permissions(self):
         if self.action == "create":
@@ -18,6 +34,8 @@ class ReviewViewSet(viewsets.ModelViewSet):
             return [permissions.IsAuthenticated(), IsCustomerOrAdmin()]
         if self.action in ("update", "partial_update", "destroy"):
             return [permissions.IsAuthenticated(), IsReviewAuthorOrSupportOrAdmin()]
+        if self.action == "export":
+            return [permissions.IsAuthenticated(), IsSupportOrAdmin()]
         return [permissions.IsAuthenticated()]
 
     @extend_schema(
@@ -36,3 +54,27 @@ class ReviewViewSet(viewsets.ModelViewSet):
     )
     def create(self, request, *args, **kwargs):
         return super().create(request, *args, **kwargs)
+
+    def perform_update(self, serializer):
+        previous_rating = serializer.instance.rating
+        with transaction.atomic():
+            review = serializer.save()
+            record_event(
+                "review.updated",
+                review,
+                rating=review.rating,
+                previous_rating=previous_rating,
+                created_day=timezone.localdate(review.created_at).isoformat(),
+                actor=self.request.user.id,
+            )
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            record_event(
+                "review.deleted",
+                instance,
+                rating=instance.rating,
+                created_day=timezone.localdate(instance.created_at).isoformat(),
+                actor=self.request.user.id,
+            )
+            instance.delete()
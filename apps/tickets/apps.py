@@ -4,3 +4,18 @@ from django.apps import AppConfig
 class TicketsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.tickets'
+
+    def ready(self):
+        # Register live event audience
+        from . import sse  # noqa: F401
+
+        from django.db.models.functions import JSONArray
+
+        from apps.common.cache import cache_invalidation
+        from apps.common.changes import track_changes
+        from .models import Ticket
+        from .permissions import visible_tickets
+        from .serializers import TicketSerializer
+
+        track_changes("ticket", Ticket, TicketSerializer, visible_tickets, audience=JSONArray("created_by_id"))
+        cache_invalidation(Ticket)
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.9 on 2026-10-19 04:41
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0002_ticket_claims'),
+    ]
+
+    operations = [
+        migrations.RenameIndex(
+            model_name='ticket',
+            new_name='ticket_status_created_idx',
+            old_name='tickets_tic_status_8acd21_idx',
+        ),
+    ]
@@ -51,6 +51,17 @@ class Ticket(models.Model):
     )
     responded_at = models.DateTimeField(null=True, blank=True)
 
+    # Support work queue (apps.tickets.queue): an OPEN ticket is reserved for
+    # claimed_by until claim_expires_at; after that anyone may claim it again
+    claimed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="tickets_claimed",
+    )
+    claim_expires_at = models.DateTimeField(null=True, blank=True)
+
     created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -68,7 +79,7 @@ class Ticket(models.Model):
         ]
         indexes = [
             models.Index(fields=["created_by", "status"]),
-            models.Index(fields=["status", "created_at"]),
+            models.Index(fields=["status", "created_at"], name="ticket_status_created_idx"),
         ]
 
     def __str__(self) -> str:
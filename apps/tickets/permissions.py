@@ -1,6 +1,18 @@
 from rest_framework.permissions import BasePermission
 from apps.users.permissions import is_admin, is_support
 
+from .models import Ticket
+
+
+def visible_tickets(user, qs=None):
+    """
+    Users see their own tickets. SUPPORT/ADMIN see all tickets.
+    """
+    qs = Ticket.objects.all() if qs is None else qs
+    if is_admin(user) or is_support(user):
+        return qs
+    return qs.filter(created_by=user)
+
 
 class IsTicketOwnerOrSupportOrAdmin(BasePermission):
     def has_object_permission(self, request, view, obj) -> bool:
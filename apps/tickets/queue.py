@@ -0,0 +1,55 @@
+"""
+Support work queue: each agent claims the oldest unclaimed OPEN ticket
+instead of picking from the full list.
+
+A claim is a lease: `claimed_by` holds the ticket until `claim_expires_at`
+(TICKET_CLAIM_LEASE_SECONDS), so a ticket an agent walks away from goes back
+to the queue by itself. Claiming again while the lease runs returns the same
+ticket with a renewed lease, which makes retries safe.
+
+The claim is one conditional UPDATE whose target is the first row of the
+(status, created_at) index that is not under a live lease. On backends with
+SKIP LOCKED (PostgreSQL, MySQL 8, Oracle) the candidate subquery skips rows
+other agents are claiming right now, so concurrent claimers take different
+tickets without waiting on each other; SQLite runs writers one at a time.
+The outer WHERE repeats the conditions, so a ticket claimed in between is
+never taken over.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q, Subquery
+from django.utils import timezone
+
+from apps.common.changes import record_changes
+from .models import Ticket
+
+DEFAULT_CLAIM_LEASE_SECONDS = 900
+
+
+def claimable(now) -> Q:
+    return Q(status=Ticket.Status.OPEN) & (Q(claim_expires_at__isnull=True) | Q(claim_expires_at__lte=now))
+
+
+def claim_next(user) -> Ticket | None:
+    """Claim (or renew) a ticket for `user`. Returns None when the queue is empty."""
+    now = timezone.now()
+    lease = timedelta(seconds=getattr(settings, "TICKET_CLAIM_LEASE_SECONDS", DEFAULT_CLAIM_LEASE_SECONDS))
+    claim = {"claimed_by": user, "claim_expires_at": now + lease}
+
+    with transaction.atomic():
+        held = Ticket.objects.filter(status=Ticket.Status.OPEN, claimed_by=user, claim_expires_at__gt=now)
+        ticket = held.order_by("created_at", "pk").first()
+        if ticket is None:
+            candidates = Ticket.objects.filter(claimable(now)).order_by("created_at", "pk")
+            if connection.features.has_select_for_update_skip_locked:
+                candidates = candidates.select_for_update(skip_locked=True)
+            if not Ticket.objects.filter(claimable(now), pk=Subquery(candidates.values("pk")[:1])).update(**claim):
+                return None
+            ticket = Ticket.objects.get(claimed_by=user, claim_expires_at=claim["claim_expires_at"])
+        else:
+            Ticket.objects.filter(pk=ticket.pk, claimed_by=user).update(**claim)
+            ticket.claim_expires_at = claim["claim_expires_at"]
+        record_changes("ticket", [ticket.pk])
+    return ticket
@@ -1,11 +1,19 @@
 from rest_framework import serializers
+
+from apps.ads.serializers import AdSummarySerializer
+from apps.common.batch import BulkIdsSerializer
+from apps.common.expand import ExpandableSerializerMixin
+from apps.common.fieldsets import SparseFieldsetSerializerMixin
+from apps.users.serializers import UserNonSensitiveSerializer
 from .models import Ticket
 
 
-class TicketSerializer(serializers.ModelSerializer):
+class TicketSerializer(ExpandableSerializerMixin, SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     created_by = serializers.PrimaryKeyRelatedField(read_only=True)
     responded_by = serializers.PrimaryKeyRelatedField(read_only=True)
     responded_at = serializers.DateTimeField(read_only=True)
+    claimed_by = serializers.PrimaryKeyRelatedField(read_only=True)
+    claim_expires_at = serializers.DateTimeField(read_only=True)
     support_response = serializers.CharField(read_only=True)
 
     created_at = serializers.DateTimeField(read_only=True)
@@ -23,11 +31,23 @@ class TicketSerializer(serializers.ModelSerializer):
             "support_response",
             "responded_by",
             "responded_at",
+            "claimed_by",
+            "claim_expires_at",
             "created_at",
             "updated_at",
         )
 
+    expandable_fields = {
+        "ad": AdSummarySerializer,
+        "created_by": UserNonSensitiveSerializer,
+        "responded_by": UserNonSensitiveSerializer,
+    }
+
 
 class TicketRespondSerializer(serializers.Serializer):
     support_response = serializers.CharField()
     status = serializers.ChoiceField(choices=["OPEN", "IN_PROGRESS", "CLOSED"], required=False)
+
+
+class TicketBatchCloseSerializer(BulkIdsSerializer):
+    support_response = serializers.CharField(required=False)
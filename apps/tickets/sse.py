@@ -0,0 +1,12 @@
+"""Live status events (apps.common.sse) for a ticket go to its author."""
+from apps.common.sse import event_audience
+
+from .models import Ticket
+
+
+@event_audience("ticket")
+def ticket_audience(ids) -> dict:
+    return {
+        ticket_id: {user_id}
+        for ticket_id, user_id in Ticket.objects.filter(id__in=ids).values_list("id", "created_by_id")
+    }
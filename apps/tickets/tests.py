@@ -1,9 +1,20 @@
+import json
+from unittest import mock
+
 from django.contrib.auth import get_user_model
 from django.urls import reverse
+from django.utils import timezone
 
 from rest_framework import status
+from rest_framework.authtoken.models import Token
 from rest_framework.test import APITestCase
 
+from apps.ads.models import Ad
+from apps.common.models import OutboxEvent
+from .models import Ticket
+from .queue import claimable
+from .views import TicketViewSet
+
 User = get_user_model()
 
 
@@ -67,3 +78,201 @@ class TicketRulesTests(APITestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         self.assertEqual(res.data["status"], "IN_PROGRESS")
         self.assertEqual(res.data["support_response"], "We are investigating.")
+
+
+class TicketExpandTests(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username="customerTE",
+            email="customerTE@example.com",
+            phone="09000000210",
+            password="CustomerPass123",
+            role="CUSTOMER",
+        )
+        self.support = User.objects.create_user(
+            username="supportTE",
+            email="supportTE@example.com",
+            phone="09000000211",
+            password="SupportPass123",
+            role="SUPPORT",
+        )
+        ad = Ad.objects.create(creator=self.customer, title="Fix sink", description="Leaking")
+        for i in range(5):
+            Ticket.objects.create(
+                created_by=self.customer,
+                ad=ad,
+                title=f"Help {i}",
+                message="Need support",
+                support_response="On it.",
+                responded_by=self.support,
+                responded_at=timezone.now(),
+            )
+
+    def test_expand_embeds_related_with_constant_queries(self):
+        self.client.force_authenticate(user=self.support)
+        for name, key in (("ad", "title"), ("created_by", "username"), ("responded_by", "username")):
+            with self.subTest(expand=name):
+                with self.assertNumQueries(2):
+                    res = self.client.get(reverse("ticket-list"), {"expand": name})
+                self.assertEqual(res.status_code, status.HTTP_200_OK)
+                self.assertEqual(len(res.data["results"]), 5)
+                self.assertIn(key, res.data["results"][0][name])
+
+
+class TicketBulkOperationTests(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username="customerTX",
+            email="customerTX@example.com",
+            phone="09000000220",
+            password="CustomerPass123",
+            role="CUSTOMER",
+        )
+        self.support = User.objects.create_user(
+            username="supportTX",
+            email="supportTX@example.com",
+            phone="09000000221",
+            password="SupportPass123",
+            role="SUPPORT",
+        )
+        self.tickets = [
+            Ticket.objects.create(
+                created_by=self.customer,
+                title=f"Help {i}",
+                message="Need support",
+                status="CLOSED" if i % 2 else "OPEN",
+            )
+            for i in range(6)
+        ]
+
+    def _export(self, params):
+        res = self.client.get(reverse("ticket-export"), params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return b"".join(res.streaming_content).decode()
+
+    def test_support_exports_ndjson_with_filters_and_cursor(self):
+        self.client.force_authenticate(user=self.support)
+        lines = self._export({"status": "OPEN"}).splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([r["id"] for r in rows], [t.id for t in self.tickets if t.status == "OPEN"])
+        self.assertEqual(rows[0]["created_by_id"], self.customer.id)
+
+        # resume after the first exported row
+        resumed = [json.loads(line) for line in self._export({"status": "OPEN", "after_id": rows[0]["id"]}).splitlines()]
+        self.assertEqual([r["id"] for r in resumed], [r["id"] for r in rows[1:]])
+
+    def test_csv_export_and_owner_is_forbidden(self):
+        self.client.force_authenticate(user=self.support)
+        lines = self._export({"output": "csv"}).splitlines()
+        self.assertEqual(lines[0].split(",")[:3], ["id", "title", "message"])
+        self.assertEqual(len(lines), 7)
+
+        self.client.force_authenticate(user=self.customer)
+        res = self.client.get(reverse("ticket-export"))
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_export_streams_one_chunk_at_a_time(self):
+        self.client.force_authenticate(user=self.support)
+        with mock.patch.object(TicketViewSet, "export_chunk_size", 2):
+            res = self.client.get(reverse("ticket-export"))
+        # Served through WSGI: a sync iterator, read as it is sent
+        self.assertFalse(res.is_async)
+        stream = iter(res.streaming_content)
+        with self.assertNumQueries(1):
+            first = next(stream)
+        self.assertEqual(json.loads(first)["id"], self.tickets[0].id)
+        # 6 rows in chunks of 2: three more keyset queries, the last one empty
+        with self.assertNumQueries(3):
+            rest = list(stream)
+        self.assertEqual(len(rest), 5)
+
+    async def test_export_under_asgi_streams_asynchronously(self):
+        token = await Token.objects.acreate(user=self.support)
+        res = await self.async_client.get(reverse("ticket-export"), headers={"Authorization": f"Token {token.key}"})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.is_async)
+        lines = b"".join([chunk async for chunk in res.streaming_content]).decode().splitlines()
+        self.assertEqual([json.loads(line)["id"] for line in lines], [t.id for t in self.tickets])
+
+    def test_export_rejects_out_of_range_dates(self):
+        self.client.force_authenticate(user=self.support)
+        res = self.client.get(reverse("ticket-export"), {"created_after": "2026-13-45"})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("created_after", res.data)
+
+    def test_batch_close_records_response_and_reports_per_id(self):
+        already = self.tickets[1]  # CLOSED
+        ids = [self.tickets[0].id, already.id, 999999]
+        self.client.force_authenticate(user=self.support)
+        res = self.client.post(
+            reverse("ticket-batch-close"), {"ids": ids, "support_response": "Closed as spam."}, format="json"
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data["updated"], [self.tickets[0].id])
+        self.assertEqual([r["result"] for r in res.data["results"]], ["closed", "already_closed", "not_found"])
+        # Only the ticket this call closed gets an event
+        self.assertEqual(
+            list(OutboxEvent.objects.filter(topic="ticket.closed").values_list("aggregate_id", flat=True)),
+            [self.tickets[0].id],
+        )
+
+        ticket = Ticket.objects.get(id=self.tickets[0].id)
+        self.assertEqual(ticket.status, "CLOSED")
+        self.assertEqual(ticket.responded_by, self.support)
+        self.assertEqual(ticket.support_response, "Closed as spam.")
+
+
+class TicketQueueTests(APITestCase):
+    def setUp(self):
+        self.customer = User.objects.create_user(
+            username="customerTQ",
+            email="customerTQ@example.com",
+            phone="09000000230",
+            password="CustomerPass123",
+            role="CUSTOMER",
+        )
+        self.agents = [
+            User.objects.create_user(
+                username=f"supportTQ{i}",
+                email=f"supportTQ{i}@example.com",
+                phone=f"0900000023{i + 1}",
+                password="SupportPass123",
+                role="SUPPORT",
+            )
+            for i in range(3)
+        ]
+        now = timezone.now()
+        self.tickets = []
+        for i, state in enumerate(["CLOSED", "OPEN", "OPEN", "IN_PROGRESS", "OPEN"]):
+            ticket = Ticket.objects.create(created_by=self.customer, title=f"Help {i}", message="?", status=state)
+            Ticket.objects.filter(pk=ticket.pk).update(created_at=now - timezone.timedelta(hours=10 - i))
+            self.tickets.append(ticket)
+
+    def _claim(self, user):
+        self.client.force_authenticate(user=user)
+        return self.client.post(reverse("ticket-claim-next"))
+
+    def test_agents_claim_oldest_open_tickets_with_a_lease(self):
+        first = self._claim(self.agents[0])
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual((first.data["id"], first.data["claimed_by"]), (self.tickets[1].id, self.agents[0].id))
+
+        # Claiming again keeps (and renews) the same ticket
+        self.assertEqual(self._claim(self.agents[0]).data["id"], self.tickets[1].id)
+        self.assertEqual(self._claim(self.agents[1]).data["id"], self.tickets[2].id)
+        self.assertEqual(self._claim(self.agents[2]).data["id"], self.tickets[4].id)
+
+        # An expired lease puts the ticket back in the queue
+        Ticket.objects.filter(pk=self.tickets[1].pk).update(claim_expires_at=timezone.now())
+        self.client.force_authenticate(user=self.agents[2])
+        self.client.post(reverse("ticket-respond", kwargs={"pk": self.tickets[4].id}), {"support_response": "Done"})
+        self.assertEqual(self._claim(self.agents[2]).data["id"], self.tickets[1].id)
+
+        self.assertEqual(self._claim(self.customer).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self._claim(self.agents[0]).status_code, status.HTTP_204_NO_CONTENT)
+
+    def test_claim_candidate_walks_the_status_created_at_index(self):
+        candidates = Ticket.objects.filter(claimable(timezone.now())).order_by("created_at", "pk")
+        plan = candidates.values("pk")[:1].explain()
+        self.assertIn("USING INDEX ticket_status_created_idx", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
@@ -1,3 +1,4 @@
+from django.db import transaction
 from django.utils import timezone
 from rest_framework import permissions, status, viewsets
 from rest_framework.decorators import action
@@ -10,10 +11,22 @@ from drf_spectacular.utils import (
     OpenApiResponse,
 )
 
-from apps.users.permissions import IsSupportOrAdmin, is_admin, is_support
+from apps.analytics.rollups import previous_slots
+from apps.common.asyncviews import AsyncListModelMixin, AsyncRetrieveModelMixin, AsyncViewMixin
+from apps.common.batch import BatchRetrieveMixin
+from apps.common.changes import record_changes
+from apps.common.expand import ExpandMixin, expand_parameter
+from apps.common.export import ExportMixin
+from apps.common.fieldsets import SPARSE_FIELDSET_PARAMETERS, SparseFieldsetMixin
+from apps.common.outbox import record_event, record_events
+from apps.users.permissions import IsSupportOrAdmin
 from .models import Ticket
-from .permissions import IsTicketOwnerOrSupportOrAdmin
-from .serializers import TicketRespondSerializer, TicketSerializer
+from .permissions import IsTicketOwnerOrSupportOrAdmin, visible_tickets
+from .queue import claim_next as claim_next_ticket
+from .serializers import TicketBatchCloseSerializer, TicketRespondSerializer, TicketSerializer
+
+
+TICKET_READ_PARAMETERS = SPARSE_FIELDSET_PARAMETERS + [expand_parameter("ad", "created_by", "responded_by")]
 
 
 @extend_schema_view(
@@ -21,6 +34,12 @@ from .serializers import TicketRespondSerializer, TicketSerializer
         tags=["Tickets"],
         summary="List tickets",
         description="Users see their own tickets. SUPPORT/ADMIN see all tickets.",
+        parameters=TICKET_READ_PARAMETERS,
+    ),
+    retrieve=extend_schema(
+        tags=["Tickets"],
+        summary="Retrieve ticket",
+        parameters=TICKET_READ_PARAMETERS,
     ),
     create=extend_schema(
         tags=["Tickets"],
@@ -45,28 +64,79 @@ from .serializers import TicketRespondSerializer, TicketSerializer
         description="SUPPORT/ADMIN only.",
     ),
 )
-class TicketViewSet(viewsets.ModelViewSet):
+class TicketViewSet(
+    AsyncViewMixin,
+    AsyncListModelMixin,
+    AsyncRetrieveModelMixin,
+    SparseFieldsetMixin,
+    ExpandMixin,
+    BatchRetrieveMixin,
+    ExportMixin,
+    viewsets.ModelViewSet,
+):
+    # list/retrieve are async (apps.common.asyncviews); writes and actions stay sync
     serializer_class = TicketSerializer
-    queryset = Ticket.objects.select_related("created_by", "ad")
+    # Joins are added per ?expand= (see ExpandMixin)
+    queryset = Ticket.objects.all()
+    # IsTicketOwnerOrSupportOrAdmin reads created_by_id
+    sparse_fieldset_required = ("created_by",)
+    export_fields = (
+        "id",
+        "title",
+        "message",
+        "status",
+        "ad_id",
+        "created_by_id",
+        "support_response",
+        "responded_by_id",
+        "responded_at",
+        "created_at",
+        "updated_at",
+    )
 
     def get_queryset(self):
-        u = self.request.user
-        if is_admin(u) or is_support(u):
-            return self.queryset
-        return self.queryset.filter(created_by=u)
+        return visible_tickets(self.request.user, self.queryset)
 
     def get_permissions(self):
-        if self.action in ("destroy",):
+        if self.action in ("destroy", "export"):
             # only support/admin can delete/manage all tickets :contentReference[oaicite:14]{index=14}
             return [permissions.IsAuthenticated(), IsSupportOrAdmin()]
-        if self.action == "respond":
+        if self.action in ("respond", "batch_close", "claim_next"):
             # only support/admin can answer (customer cannot answer own ticket) :contentReference[oaicite:15]{index=15}
             return [permissions.IsAuthenticated(), IsSupportOrAdmin()]
         # read/update: owner OR support/admin
         return [permissions.IsAuthenticated(), IsTicketOwnerOrSupportOrAdmin()]
 
     def perform_create(self, serializer):
-        serializer.save(created_by=self.request.user)
+        with transaction.atomic():
+            ticket = serializer.save(created_by=self.request.user)
+            record_event("ticket.created", ticket, actor=self.request.user.id)
+
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            # Where the rollups (apps.analytics) count it before the change
+            previous = previous_slots(Ticket.objects.filter(pk=serializer.instance.pk))
+            previous_status = serializer.instance.status
+            ticket = serializer.save()
+            record_event(
+                "ticket.updated",
+                ticket,
+                status=ticket.status,
+                previous_status=previous_status,
+                previous=previous,
+                actor=self.request.user.id,
+            )
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            record_event(
+                "ticket.deleted",
+                instance,
+                created_day=timezone.localdate(instance.created_at).isoformat(),
+                previous=previous_slots(Ticket.objects.filter(pk=instance.pk)),
+                actor=self.request.user.id,
+            )
+            instance.delete()
 
     @extend_schema(
         tags=["Tickets"],
@@ -94,6 +164,9 @@ class TicketViewSet(viewsets.ModelViewSet):
         s = TicketRespondSerializer(data=request.data)
         s.is_valid(raise_exception=True)
 
+        # Only the first response counts towards response-time SLAs (apps.analytics)
+        first_response = ticket.responded_at is None
+        previous_status = ticket.status
         ticket.support_response = s.validated_data["support_response"]
         ticket.responded_by = request.user
         ticket.responded_at = timezone.now()
@@ -104,5 +177,104 @@ class TicketViewSet(viewsets.ModelViewSet):
             # default when responding
             ticket.status = "IN_PROGRESS"
 
-        ticket.save(update_fields=["support_response", "responded_by", "responded_at", "status", "updated_at"])
+        with transaction.atomic():
+            previous = previous_slots(Ticket.objects.filter(pk=ticket.pk))
+            ticket.save(update_fields=["support_response", "responded_by", "responded_at", "status", "updated_at"])
+            timing = {}
+            if first_response:
+                timing["response_seconds"] = (ticket.responded_at - ticket.created_at).total_seconds()
+            record_event(
+                "ticket.responded",
+                ticket,
+                status=ticket.status,
+                previous_status=previous_status,
+                previous=previous,
+                actor=request.user.id,
+                **timing,
+            )
+        return Response(TicketSerializer(ticket).data, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        tags=["Tickets"],
+        summary="Close many tickets",
+        description=(
+            "SUPPORT/ADMIN only. Closes every listed ticket with one conditional UPDATE. "
+            "An optional support_response is recorded as the response on each closed ticket. "
+            "Returns the ids it closed (`updated`) and a per-id result: closed, already_closed or not_found."
+        ),
+        request=TicketBatchCloseSerializer,
+        responses={200: OpenApiResponse(description="Per-id results")},
+        examples=[
+            OpenApiExample(
+                "Batch close request",
+                value={"ids": [12, 13], "support_response": "Closed as spam."},
+                request_only=True,
+            ),
+            OpenApiExample(
+                "Batch close response",
+                value={"updated": [12], "results": [{"id": 12, "result": "closed"}, {"id": 13, "result": "already_closed"}]},
+                response_only=True,
+            ),
+        ],
+    )
+    @action(detail=False, methods=["post"], url_path="batch-close")
+    def batch_close(self, request):
+        s = TicketBatchCloseSerializer(data=request.data)
+        s.is_valid(raise_exception=True)
+        ids = s.validated_data["ids"]
+
+        now = timezone.now()
+        changes = {"status": "CLOSED", "updated_at": now}
+        if "support_response" in s.validated_data:
+            changes.update(
+                support_response=s.validated_data["support_response"],
+                responded_by=request.user,
+                responded_at=now,
+            )
+
+        pending = Ticket.objects.filter(id__in=ids).exclude(status="CLOSED")
+        groups = [(pending, {})]
+        if "support_response" in s.validated_data:
+            # Unanswered tickets get their first response (response-time sketches, apps.analytics)
+            groups.insert(0, (pending.filter(responded_at__isnull=True), {"first_response": True}))
+
+        with transaction.atomic():
+            moved = set()
+            for group, extra in groups:
+                # Where the rollups count these tickets before they close
+                previous = previous_slots(group)
+                group.update(**changes)
+                # The rows this UPDATE changed carry its timestamp; only they get events
+                changed = set(Ticket.objects.filter(id__in=ids, updated_at=now).values_list("id", flat=True)) - moved
+                if changed:
+                    record_events("ticket.closed", Ticket, sorted(changed), actor=request.user.id, previous=previous, **extra)
+                moved |= changed
+            found = set(Ticket.objects.filter(id__in=ids).values_list("id", flat=True))
+            closed = [pk for pk in ids if pk in moved]
+            if closed:
+                record_changes("ticket", closed)
+
+        results = [
+            {"id": pk, "result": ("closed" if pk in moved else "already_closed") if pk in found else "not_found"}
+            for pk in ids
+        ]
+        return Response({"updated": closed, "results": results}, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        tags=["Tickets"],
+        summary="Claim next ticket",
+        description=(
+            "SUPPORT/ADMIN only. Reserves the oldest OPEN ticket nobody holds for the caller for "
+            "TICKET_CLAIM_LEASE_SECONDS and returns it. While the lease runs, calling again returns the "
+            "same ticket with a renewed lease; an expired lease puts the ticket back in the queue. "
+            "204 when there is nothing to claim."
+        ),
+        request=None,
+        responses={200: TicketSerializer, 204: OpenApiResponse(description="Queue is empty")},
+    )
+    @action(detail=False, methods=["post"], url_path="claim-next")
+    def claim_next(self, request):
+        ticket = claim_next_ticket(request.user)
+        if ticket is None:
+            return Response(status=status.HTTP_204_NO_CONTENT)
         return Response(TicketSerializer(ticket).data, status=status.HTTP_200_OK)
@@ -4,3 +4,19 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = "apps.users"
+
+    def ready(self):
+        from apps.common.cache import cache_invalidation
+        from django.contrib.auth import get_user_model
+        from django.db.models.signals import post_save
+        from .leaderboard import on_user_saved
+        from .profile_views import CONTRACTOR_STATS_TAG, profile_tag
+
+        post_save.connect(on_user_saved, sender=get_user_model(), dispatch_uid="leaderboard-user-save")
+
+        cache_invalidation(
+            get_user_model(),
+            related_tags=lambda user: [profile_tag(user.pk)]
+            + ([CONTRACTOR_STATS_TAG] if user.role == "CONTRACTOR" else []),
+            related_fields=("pk", "role"),
+        )
@@ -1,12 +1,19 @@
 import django_filters as filters
 from django.contrib.auth import get_user_model
+from django.db.models import F, FilteredRelation, Q
+
+from .leaderboard import normalize_category
 
 User = get_user_model()
 
 
 class ContractorFilterSet(filters.FilterSet):
+    """Filters on the indexed ContractorStats columns (see apps.users.leaderboard)."""
+
     min_avg_rating = filters.NumberFilter(method="filter_min_avg_rating")
     min_review_count = filters.NumberFilter(method="filter_min_review_count")
+    min_completed_ads = filters.NumberFilter(method="filter_min_completed_ads")
+    category = filters.CharFilter(method="filter_category")
 
     class Meta:
         model = User
@@ -15,9 +22,31 @@ class ContractorFilterSet(filters.FilterSet):
     def filter_min_avg_rating(self, queryset, name, value):
         if value is None:
             return queryset
-        return queryset.filter(avg_rating__gte=value)
+        return queryset.filter(stats__avg_rating__gte=value)
 
     def filter_min_review_count(self, queryset, name, value):
         if value is None:
             return queryset
-        return queryset.filter(review_count__gte=value)
+        return queryset.filter(stats__review_count__gte=value)
+
+    def filter_min_completed_ads(self, queryset, name, value):
+        if value is None:
+            return queryset
+        return queryset.filter(stats__completed_ads_count__gte=value)
+
+    def filter_category(self, queryset, name, value):
+        # Contractors with DONE ads in the category, with their record in it (ContractorCategoryStats)
+        category = normalize_category(value or "")
+        if not category:
+            return queryset
+        return (
+            queryset.annotate(
+                in_category=FilteredRelation("category_stats", condition=Q(category_stats__category=category))
+            )
+            .filter(in_category__isnull=False)
+            .annotate(
+                category_score=F("in_category__score"),
+                category_done_count=F("in_category__done_count"),
+                category_review_count=F("in_category__review_count"),
+            )
+        )
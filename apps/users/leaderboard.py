@@ -0,0 +1,179 @@
+"""
+Contractor summary and leaderboard: one ContractorStats row per contractor
+with review count, average rating, completed ads and a Bayesian-weighted
+`score`, and one ContractorCategoryStats row per (contractor, category) of
+their DONE ads. The contractor list filters and sorts on these indexed columns
+(a WHERE range scan) instead of aggregating every contractor's reviews and
+ads per request (a HAVING over the full GROUP BY).
+
+Rows are refreshed in the same transaction as the write that changes them:
+post_save/post_delete of Review (ReviewsConfig.ready) and of assigned Ads
+(AdsConfig.ready); set-based ad updates that complete ads (auto-confirm)
+call `refresh_contractor_stats()` themselves. A refresh re-aggregates only the affected contractors
+over the (contractor, rating) and (assigned_contractor, status) indexes.
+`rebuild_leaderboard` recomputes every row, e.g. after changing the prior.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Sum
+
+from apps.ads.models import Ad
+from apps.reviews.models import Review
+
+from .models import ContractorCategoryStats, ContractorStats
+
+User = get_user_model()
+
+DEFAULT_PRIOR_RATING = 3.5
+DEFAULT_PRIOR_WEIGHT = 10
+
+
+def prior() -> tuple:
+    """(rating, weight) of the virtual reviews every contractor starts with."""
+    return (
+        getattr(settings, "LEADERBOARD_PRIOR_RATING", DEFAULT_PRIOR_RATING),
+        getattr(settings, "LEADERBOARD_PRIOR_WEIGHT", DEFAULT_PRIOR_WEIGHT),
+    )
+
+
+def bayesian_score(review_count: int, rating_sum: int) -> float:
+    prior_rating, prior_weight = prior()
+    return (prior_rating * prior_weight + rating_sum) / (prior_weight + review_count)
+
+
+def normalize_category(category: str) -> str:
+    """
+    The key categories are stored and looked up under. Always applied in
+    Python: SQL LOWER/TRIM disagree with it on non-ASCII letters and on
+    whitespace other than spaces.
+    """
+    return category.strip().lower()
+
+
+def build_stats(contractor_id, review_count: int, rating_sum: int, completed_ads_count: int = 0) -> ContractorStats:
+    return ContractorStats(
+        contractor_id=contractor_id,
+        review_count=review_count,
+        rating_sum=rating_sum,
+        avg_rating=rating_sum / review_count if review_count else 0.0,
+        completed_ads_count=completed_ads_count,
+        score=bayesian_score(review_count, rating_sum),
+    )
+
+
+def _upsert(rows):
+    ContractorStats.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["contractor"],
+        update_fields=["review_count", "rating_sum", "avg_rating", "completed_ads_count", "score", "updated_at"],
+    )
+
+
+def refresh_contractor_stats(contractor_ids):
+    """Recompute the rows of these contractors from their reviews and ads."""
+    contractor_ids = {pk for pk in contractor_ids if pk is not None}
+    if not contractor_ids:
+        return
+    reviews = {
+        row["contractor_id"]: (row["review_count"], row["rating_sum"])
+        for row in Review.objects.filter(contractor_id__in=contractor_ids)
+        .order_by()
+        .values("contractor_id")
+        .annotate(review_count=Count("id"), rating_sum=Sum("rating"))
+    }
+    completed = dict(
+        Ad.objects.filter(assigned_contractor_id__in=contractor_ids, status=Ad.Status.DONE)
+        .order_by()
+        .values("assigned_contractor_id")
+        .annotate(n=Count("id"))
+        .values_list("assigned_contractor_id", "n")
+    )
+    rows = []
+    for contractor_id in contractor_ids:
+        review_count, rating_sum = reviews.get(contractor_id, (0, 0))
+        rows.append(build_stats(contractor_id, review_count, rating_sum, completed.get(contractor_id, 0)))
+    _upsert(rows)
+    _refresh_categories(contractor_ids)
+
+
+def _refresh_categories(contractor_ids):
+    """Replace these contractors' per-category rows (a category may have emptied out)."""
+    # Grouped by the raw category in SQL, merged per normalized one here
+    totals = defaultdict(lambda: [0, 0, 0])
+    done = (
+        Ad.objects.filter(assigned_contractor_id__in=contractor_ids, status=Ad.Status.DONE)
+        .order_by()
+        .values_list("assigned_contractor_id", "category")
+        .annotate(n=Count("id"))
+    )
+    for contractor_id, category, n in done:
+        totals[contractor_id, normalize_category(category)][0] += n
+    reviews = (
+        Review.objects.filter(contractor_id__in=contractor_ids, ad__status=Ad.Status.DONE)
+        .order_by()
+        .values_list("contractor_id", "ad__category")
+        .annotate(n=Count("id"), total=Sum("rating"))
+    )
+    for contractor_id, category, n, total in reviews:
+        entry = totals[contractor_id, normalize_category(category)]
+        entry[1] += n
+        entry[2] += total
+
+    ContractorCategoryStats.objects.filter(contractor_id__in=contractor_ids).delete()
+    ContractorCategoryStats.objects.bulk_create(
+        [
+            ContractorCategoryStats(
+                contractor_id=contractor_id,
+                category=category,
+                done_count=done_count,
+                review_count=review_count,
+                rating_sum=rating_sum,
+                score=bayesian_score(review_count, rating_sum),
+            )
+            for (contractor_id, category), (done_count, review_count, rating_sum) in totals.items()
+            if category
+        ],
+        batch_size=1000,
+    )
+
+
+def rebuild_leaderboard(chunk_size=1000) -> int:
+    """Recompute every contractor's row. Returns how many were written."""
+    ids = User.objects.filter(role=User.Role.CONTRACTOR).order_by("pk").values_list("pk", flat=True)
+    total = 0
+    last = 0
+    while True:
+        chunk = list(ids.filter(pk__gt=last)[:chunk_size])
+        if not chunk:
+            return total
+        refresh_contractor_stats(chunk)
+        total += len(chunk)
+        last = chunk[-1]
+
+
+def on_review_changed(sender, instance, **kwargs):
+    refresh_contractor_stats([instance.contractor_id])
+
+
+def on_ad_changed(sender, instance, update_fields=None, **kwargs):
+    # Only the status (e.g. confirm_completion), contractor or category move completed counts
+    if instance.assigned_contractor_id is None:
+        return
+    if update_fields is not None and not {"status", "assigned_contractor", "category"} & set(update_fields):
+        return
+    refresh_contractor_stats([instance.assigned_contractor_id])
+
+
+def on_user_saved(sender, instance, created, update_fields=None, **kwargs):
+    # New contractors get their (prior-only) row; e.g. last_login updates are skipped
+    if instance.role != User.Role.CONTRACTOR:
+        return
+    if update_fields is not None and "role" not in update_fields:
+        return
+    if created:
+        _upsert([build_stats(instance.pk, 0, 0)])
+    elif not ContractorStats.objects.filter(contractor_id=instance.pk).exists():
+        refresh_contractor_stats([instance.pk])
@@ -0,0 +1,153 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Avg, Count, FloatField, Q, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.ads.models import Ad
+from apps.reviews.models import Review
+from apps.users.filters import ContractorFilterSet
+from apps.users.leaderboard import rebuild_leaderboard
+from apps.users.profile_views import contractors_with_stats_queryset
+
+User = get_user_model()
+
+FILTERS = (
+    {"min_avg_rating": 4.5, "min_review_count": 10},
+    {"min_review_count": 20},
+    {"min_completed_ads": 15},
+)
+PAGE_SIZE = 20
+
+
+def aggregate_queryset():
+    """The contractor list's previous queryset: stats aggregated per request."""
+    return User.objects.filter(role="CONTRACTOR").annotate(
+        review_count=Count("reviews_received", distinct=True),
+        avg_rating=Coalesce(Avg("reviews_received__rating"), Value(0.0), output_field=FloatField()),
+        completed_ads_count=Count("ads_assigned", filter=Q(ads_assigned__status="DONE"), distinct=True),
+    )
+
+
+def aggregate_filter(queryset, params):
+    lookups = {
+        "min_avg_rating": "avg_rating__gte",
+        "min_review_count": "review_count__gte",
+        "min_completed_ads": "completed_ads_count__gte",
+    }
+    return queryset.filter(**{lookups[name]: value for name, value in params.items()})
+
+
+def summary_filter(queryset, params):
+    return ContractorFilterSet(data=params, queryset=queryset).qs
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare contractor list filters on per-request aggregates (HAVING) with filters on the "
+        "ContractorStats summary (indexed WHERE). Seeds synthetic contractors, reviews and ads "
+        "inside a transaction that is rolled back, so the database is left unchanged."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--contractors", type=int, default=100_000)
+        parser.add_argument("--max-reviews", type=int, default=30, help="Reviews per contractor: 0..N, skewed low.")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--skip-aggregate", action="store_true", help="Only time the summary queries.")
+        parser.add_argument("--explain", action="store_true", help="Print the query plans.")
+
+    def handle(self, *args, **opts):
+        if opts["contractors"] < 1 or opts["repeat"] < 1:
+            raise CommandError("--contractors and --repeat must be positive.")
+        try:
+            with transaction.atomic():
+                self.seed(opts["contractors"], opts["max_reviews"])
+                self.measure(opts)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, contractors, max_reviews):
+        rng = random.Random(0)
+        started = time.perf_counter()
+        now = timezone.now()
+        customer = User.objects.create(
+            username="bench-customer", email="bench-customer@example.com", phone="bench-0", password="!"
+        )
+        users = User.objects.bulk_create(
+            [
+                User(
+                    username=f"bench-{i}",
+                    email=f"bench-{i}@example.com",
+                    phone=f"bench-{i + 1}",
+                    password="!",
+                    role="CONTRACTOR",
+                )
+                for i in range(contractors)
+            ],
+            batch_size=5000,
+        )
+        # bulk_create sends no signals: reviews, ads and summary rows are written in bulk
+        ads, ratings = [], []
+        for user in users:
+            quality = rng.uniform(2.5, 5.0)
+            for _ in range(int(max_reviews * rng.random() ** 2)):
+                ads.append(
+                    Ad(
+                        creator=customer,
+                        title="Bench",
+                        description="-",
+                        status="DONE",
+                        assigned_contractor=user,
+                        work_reported_done_at=now,
+                        completed_at=now,
+                    )
+                )
+                ratings.append(max(1, min(5, round(rng.gauss(quality, 0.7)))))
+        ads = Ad.objects.bulk_create(ads, batch_size=5000)
+        Review.objects.bulk_create(
+            [
+                Review(ad=ad, author=customer, contractor_id=ad.assigned_contractor_id, rating=rating)
+                for ad, rating in zip(ads, ratings)
+            ],
+            batch_size=5000,
+        )
+        rebuild_leaderboard(chunk_size=5000)
+        with connection.cursor() as cursor:
+            # Planner statistics, as a long-lived database would have them
+            cursor.execute("ANALYZE")
+        self.stdout.write(
+            f"Seeded {contractors} contractors, {len(ads)} DONE ads with reviews "
+            f"in {time.perf_counter() - started:.1f}s."
+        )
+
+    def measure(self, opts):
+        variants = [("summary", contractors_with_stats_queryset, summary_filter)]
+        if not opts["skip_aggregate"]:
+            variants.insert(0, ("aggregate", aggregate_queryset, aggregate_filter))
+
+        for params in FILTERS:
+            query_string = "&".join(f"{name}={value}" for name, value in params.items())
+            for name, base, apply in variants:
+                queryset = apply(base(), params).order_by("-avg_rating", "-review_count", "pk")
+                timings = []
+                for _ in range(opts["repeat"]):
+                    started = time.perf_counter()
+                    # What one list page costs: the count plus the first page
+                    count = queryset.count()
+                    list(queryset[:PAGE_SIZE])
+                    timings.append(time.perf_counter() - started)
+                self.stdout.write(
+                    f"?{query_string} [{name}]: {count} matches, "
+                    f"best {min(timings) * 1000:.1f} ms, median {sorted(timings)[len(timings) // 2] * 1000:.1f} ms"
+                )
+                if opts["explain"]:
+                    self.stdout.write("    " + queryset[:PAGE_SIZE].explain().replace("\n", "\n    "))
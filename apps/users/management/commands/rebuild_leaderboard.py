@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from apps.users.leaderboard import prior, rebuild_leaderboard
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every contractor's leaderboard row (ContractorStats) from their reviews. "
+        "Rows are kept current on review writes; run this after changing the prior or to repair drift."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **opts):
+        count = rebuild_leaderboard(chunk_size=opts["chunk_size"])
+        rating, weight = prior()
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt {count} contractor rows (prior: {weight} reviews of {rating}).")
+        )
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.9 on 2026-10-19 03:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fill_stats(apps, schema_editor):
+    # Same formula as apps.users.leaderboard.build_stats, with the current prior
+    User = apps.get_model("users", "User")
+    Review = apps.get_model("reviews", "Review")
+    ContractorStats = apps.get_model("users", "ContractorStats")
+    prior_rating = getattr(settings, "LEADERBOARD_PRIOR_RATING", 3.5)
+    prior_weight = getattr(settings, "LEADERBOARD_PRIOR_WEIGHT", 10)
+
+    totals = {
+        row["contractor_id"]: (row["n"], row["total"])
+        for row in Review.objects.order_by().values("contractor_id").annotate(n=Count("id"), total=Sum("rating"))
+    }
+    rows = []
+    for pk in User.objects.filter(role="CONTRACTOR").values_list("pk", flat=True).iterator():
+        n, total = totals.get(pk, (0, 0))
+        rows.append(
+            ContractorStats(
+                contractor_id=pk,
+                review_count=n,
+                rating_sum=total,
+                avg_rating=total / n if n else 0.0,
+                score=(prior_rating * prior_weight + total) / (prior_weight + n),
+            )
+        )
+    ContractorStats.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_alter_user_role'),
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContractorStats',
+            fields=[
+                ('contractor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('avg_rating', models.FloatField(default=0.0)),
+                ('score', models.FloatField(default=0.0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-score', 'contractor'], name='contractor_stats_rank_idx')],
+            },
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.9 on 2026-10-19 03:07
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_completed_ads(apps, schema_editor):
+    Ad = apps.get_model("ads", "Ad")
+    ContractorStats = apps.get_model("users", "ContractorStats")
+    counts = (
+        Ad.objects.filter(status="DONE", assigned_contractor__isnull=False)
+        .order_by()
+        .values("assigned_contractor_id")
+        .annotate(n=Count("id"))
+    )
+    for row in counts.iterator():
+        ContractorStats.objects.filter(contractor_id=row["assigned_contractor_id"]).update(completed_ads_count=row["n"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_contractorstats'),
+        ('ads', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contractorstats',
+            name='completed_ads_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='contractorstats',
+            index=models.Index(fields=['avg_rating', 'review_count'], name='contractor_stats_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contractorstats',
+            index=models.Index(fields=['review_count'], name='contractor_stats_reviews_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contractorstats',
+            index=models.Index(fields=['completed_ads_count'], name='contractor_stats_completed_idx'),
+        ),
+        migrations.RunPython(fill_completed_ads, migrations.RunPython.noop),
+    ]
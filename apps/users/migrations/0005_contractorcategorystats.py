@@ -0,0 +1,83 @@
+# Generated by Django 5.2.9 on 2026-10-19 03:17
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fill_category_stats(apps, schema_editor):
+    # Same rows as apps.users.leaderboard._refresh_categories, for every contractor
+    Ad = apps.get_model("ads", "Ad")
+    Review = apps.get_model("reviews", "Review")
+    ContractorCategoryStats = apps.get_model("users", "ContractorCategoryStats")
+    prior_rating = getattr(settings, "LEADERBOARD_PRIOR_RATING", 3.5)
+    prior_weight = getattr(settings, "LEADERBOARD_PRIOR_WEIGHT", 10)
+
+    # Categories normalized in Python, as apps.users.leaderboard.normalize_category does
+    totals = defaultdict(lambda: [0, 0, 0])
+    done = (
+        Ad.objects.filter(status="DONE", assigned_contractor__isnull=False)
+        .order_by()
+        .values_list("assigned_contractor_id", "category")
+        .annotate(n=Count("id"))
+    )
+    for contractor_id, category, n in done.iterator():
+        totals[contractor_id, category.strip().lower()][0] += n
+    reviews = (
+        Review.objects.filter(ad__status="DONE")
+        .order_by()
+        .values_list("contractor_id", "ad__category")
+        .annotate(n=Count("id"), total=Sum("rating"))
+    )
+    for contractor_id, category, n, total in reviews.iterator():
+        entry = totals[contractor_id, category.strip().lower()]
+        entry[1] += n
+        entry[2] += total
+
+    ContractorCategoryStats.objects.bulk_create(
+        [
+            ContractorCategoryStats(
+                contractor_id=contractor_id,
+                category=category,
+                done_count=done_count,
+                review_count=review_count,
+                rating_sum=rating_sum,
+                score=(prior_rating * prior_weight + rating_sum) / (prior_weight + review_count),
+            )
+            for (contractor_id, category), (done_count, review_count, rating_sum) in totals.items()
+            if category
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_contractorstats_summary'),
+        ('ads', '0001_initial'),
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContractorCategoryStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(max_length=100)),
+                ('done_count', models.PositiveIntegerField(default=0)),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('score', models.FloatField(default=0.0)),
+                ('contractor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='category_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['category', '-score', 'contractor'], name='contractor_category_rank_idx')],
+                'constraints': [models.UniqueConstraint(fields=('contractor', 'category'), name='contractor_category_stats_unique')],
+            },
+        ),
+        migrations.RunPython(fill_category_stats, migrations.RunPython.noop),
+    ]
@@ -29,3 +29,68 @@ class User(AbstractUser):
 
     def __str__(self) -> str:
         return f"{self.username} ({self.role})"
+
+
+class ContractorStats(models.Model):
+    """
+    Materialized summary/leaderboard row per contractor, kept current by
+    apps.users.leaderboard whenever their reviews or completed ads change.
+
+    `score` is the Bayesian average rating: the contractor's ratings plus
+    LEADERBOARD_PRIOR_WEIGHT virtual reviews of LEADERBOARD_PRIOR_RATING,
+    so few reviews pull a contractor towards the prior and many reviews
+    let the real average through.
+    """
+
+    contractor = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats",
+    )
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    avg_rating = models.FloatField(default=0.0)
+    completed_ads_count = models.PositiveIntegerField(default=0)
+    score = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Top-N (descending scan) and score range queries
+            models.Index(fields=["-score", "contractor"], name="contractor_stats_rank_idx"),
+            # Contractor list filters (min_*) as range scans; the first also serves the default ordering
+            models.Index(fields=["avg_rating", "review_count"], name="contractor_stats_rating_idx"),
+            models.Index(fields=["review_count"], name="contractor_stats_reviews_idx"),
+            models.Index(fields=["completed_ads_count"], name="contractor_stats_completed_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"Stats of contractor={self.contractor_id} score={self.score:.3f}"
+
+
+class ContractorCategoryStats(models.Model):
+    """
+    A contractor's track record in one ad category (normalized: trimmed,
+    lowercase): DONE ads and the reviews on them, with the same Bayesian
+    `score` as ContractorStats. Maintained with it by apps.users.leaderboard.
+    """
+
+    contractor = models.ForeignKey(User, on_delete=models.CASCADE, related_name="category_stats")
+    category = models.CharField(max_length=100)
+    done_count = models.PositiveIntegerField(default=0)
+    review_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    score = models.FloatField(default=0.0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["contractor", "category"], name="contractor_category_stats_unique"),
+        ]
+        indexes = [
+            # "Top plumbers": equality on category, then a descending scan by score
+            models.Index(fields=["category", "-score", "contractor"], name="contractor_category_rank_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.category} stats of contractor={self.contractor_id} score={self.score:.3f}"
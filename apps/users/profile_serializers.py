@@ -4,29 +4,30 @@ from rest_framework import serializers
 from apps.ads.serializers import AdSummarySerializer
 from apps.reviews.serializers import ReviewPublicSerializer
 
-User = get_user_model()
-
+from .serializers import UserNonSensitiveSerializer
 
-class UserNonSensitiveSerializer(serializers.ModelSerializer):
-    """
-    Non-sensitive fields only (no email/phone).
-    """
-    class Meta:
-        model = User
-        fields = ("id", "username", "first_name", "last_name", "role")
-        read_only_fields = fields
+User = get_user_model()
 
 
 class ContractorListSerializer(UserNonSensitiveSerializer):
     avg_rating = serializers.FloatField(read_only=True)
     review_count = serializers.IntegerField(read_only=True)
     completed_ads_count = serializers.IntegerField(read_only=True)
+    score = serializers.FloatField(read_only=True)
+    # Only with ?category= (omitted otherwise)
+    category_score = serializers.FloatField(read_only=True)
+    category_done_count = serializers.IntegerField(read_only=True)
+    category_review_count = serializers.IntegerField(read_only=True)
 
     class Meta(UserNonSensitiveSerializer.Meta):
         fields = UserNonSensitiveSerializer.Meta.fields + (
             "avg_rating",
             "review_count",
             "completed_ads_count",
+            "score",
+            "category_score",
+            "category_done_count",
+            "category_review_count",
         )
 
 
@@ -1,6 +1,5 @@
 from django.contrib.auth import get_user_model
-from django.db.models import Avg, Count, Q, FloatField, Value
-from django.db.models.functions import Coalesce
+from django.db.models import F
 
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import generics, permissions, status
@@ -12,6 +11,9 @@ from drf_spectacular.utils import OpenApiExample, OpenApiParameter, extend_schem
 
 from apps.ads.models import Ad
 from apps.ads.serializers import AdSummarySerializer
+from apps.common.asyncviews import AsyncListModelMixin, AsyncViewMixin
+from apps.common.cache import cache_response, shared_scope
+from apps.common.streaming import StreamedList, StreamingJSONResponse, is_asgi
 from apps.reviews.models import Review
 from apps.reviews.serializers import ReviewPublicSerializer
 from apps.users.permissions import is_admin, is_support
@@ -27,45 +29,70 @@ from .profile_serializers import (
 User = get_user_model()
 
 
+def profile_tag(user_id) -> str:
+    """Cache tag of a user's profile page (see apps.common.cache)."""
+    return f"profile:{user_id}"
+
+
+# Every contractor list response: rating/review/completed-ad stats of all contractors
+CONTRACTOR_STATS_TAG = "contractor-stats"
+
+
+def customer_profile_scope(request) -> str:
+    # Owner/support/admin also see CANCELED ads
+    user = request.user
+    if is_support(user) or request.parser_context["kwargs"].get("pk") == user.pk:
+        return "full"
+    return "public"
+
+
 def contractors_with_stats_queryset():
     """
-    Reusable annotated queryset for contractor list + contractor profile stats.
+    Contractors with their summary stats (ContractorStats, see
+    apps.users.leaderboard) for the contractor list and profile. Plain
+    columns of a joined row: filters on them are WHERE range scans over the
+    summary's indexes, not a HAVING over aggregated reviews and ads.
     """
-    return (
-        User.objects.filter(role="CONTRACTOR")
-        .annotate(
-            review_count=Count("reviews_received", distinct=True),
-            avg_rating=Coalesce(
-                Avg("reviews_received__rating"),
-                Value(0.0),
-                output_field=FloatField(),
-            ),
-            completed_ads_count=Count(
-                "ads_assigned",
-                filter=Q(ads_assigned__status="DONE"),
-                distinct=True,
-            ),
-        )
+    return User.objects.filter(role="CONTRACTOR").annotate(
+        review_count=F("stats__review_count"),
+        avg_rating=F("stats__avg_rating"),
+        completed_ads_count=F("stats__completed_ads_count"),
+        score=F("stats__score"),
     )
 
 
-class ContractorListView(generics.ListAPIView):
+class ContractorListView(AsyncViewMixin, AsyncListModelMixin, generics.ListAPIView):
     """
     Contractor search/filter/sort:
-    - filter by min avg rating and min review count
-    - ordering by avg_rating and review_count
+    - filter by min avg rating, min review count and min completed ads
+    - ?category=plumbing: contractors with DONE ads in that category, ranked
+      by their score in it (ContractorCategoryStats, one indexed query)
+    - ordering by avg_rating and review_count, or by leaderboard score
+      (Bayesian average, so one 5-star review doesn't beat 400 at 4.9)
+    Async (see apps.common.asyncviews). Cached with single-flight: the stats
+    aggregate over all reviews, so concurrent misses compute them once.
     """
     permission_classes = [permissions.IsAuthenticated]
     serializer_class = ContractorListSerializer
 
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_class = ContractorFilterSet
-    ordering_fields = ["avg_rating", "review_count"]
+    ordering_fields = ["avg_rating", "review_count", "completed_ads_count", "score"]
     ordering = ["-avg_rating", "-review_count"]
 
     def get_queryset(self):
         return contractors_with_stats_queryset()
 
+    def get_cache_tags(self, request, response):
+        return [CONTRACTOR_STATS_TAG]
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if "category_score" in queryset.query.annotations and not self.request.query_params.get("ordering"):
+            # Walks the (category, -score, contractor) index, no sort step
+            queryset = queryset.order_by("-category_score", "in_category__contractor")
+        return queryset
+
     @extend_schema(
         parameters=[
             OpenApiParameter(
@@ -80,11 +107,30 @@ class ContractorListView(generics.ListAPIView):
                 required=False,
                 description="Minimum number of reviews (e.g. 10).",
             ),
+            OpenApiParameter(
+                name="min_completed_ads",
+                type=int,
+                required=False,
+                description="Minimum number of completed (DONE) ads.",
+            ),
+            OpenApiParameter(
+                name="category",
+                type=str,
+                required=False,
+                description=(
+                    "Only contractors with DONE ads in this category (case-insensitive), ranked by their "
+                    "score in it unless ?ordering= is given. Adds category_score/done_count/review_count."
+                ),
+            ),
             OpenApiParameter(
                 name="ordering",
                 type=str,
                 required=False,
-                description="Comma-separated ordering fields: avg_rating, review_count. Prefix with '-' for desc. Example: -avg_rating,-review_count",
+                description=(
+                    "Comma-separated ordering fields: avg_rating, review_count, completed_ads_count, "
+                    "score (leaderboard rank). "
+                    "Prefix with '-' for desc. Example: -avg_rating,-review_count or -score"
+                ),
             ),
         ],
         responses={200: ContractorListSerializer(many=True)},
@@ -101,19 +147,24 @@ class ContractorListView(generics.ListAPIView):
                         "avg_rating": 4.7,
                         "review_count": 12,
                         "completed_ads_count": 20,
+                        "score": 4.36,
                     }
                 ],
                 response_only=True,
             )
         ],
     )
-    def get(self, request, *args, **kwargs):
-        return super().get(request, *args, **kwargs)
+    @cache_response(scope=shared_scope, single_flight=True, serve_stale=True)
+    async def get(self, request, *args, **kwargs):
+        return await super().get(request, *args, **kwargs)
 
 
-class ContractorProfileView(APIView):
+class ContractorProfileView(AsyncViewMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_cache_tags(self, request, response):
+        return [profile_tag(self.kwargs["pk"])]
+
     @extend_schema(
         responses={200: ContractorProfileResponseSerializer},
         examples=[
@@ -153,8 +204,9 @@ class ContractorProfileView(APIView):
             )
         ],
     )
-    def get(self, request, pk: int):
-        contractor = contractors_with_stats_queryset().filter(pk=pk).first()
+    @cache_response(scope=shared_scope, single_flight=True, serve_stale=True)
+    async def get(self, request, pk: int):
+        contractor = await contractors_with_stats_queryset().filter(pk=pk).afirst()
         if not contractor:
             return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
 
@@ -176,15 +228,19 @@ class ContractorProfileView(APIView):
             "completed_ads_count": contractor.completed_ads_count,
             "avg_rating": contractor.avg_rating,
             "review_count": contractor.review_count,
-            "completed_ads": AdSummarySerializer(completed_ads_qs, many=True).data,
-            "reviews": ReviewPublicSerializer(reviews_qs, many=True).data,
+            "completed_ads": StreamedList(completed_ads_qs, AdSummarySerializer),
+            "reviews": StreamedList(reviews_qs, ReviewPublicSerializer),
         }
-        return Response(payload, status=status.HTTP_200_OK)
+        # Lists are unpaginated: stream them row by row instead of building them in memory
+        return StreamingJSONResponse(payload, status=status.HTTP_200_OK, asynchronous=is_asgi(request))
 
 
-class CustomerProfileView(APIView):
+class CustomerProfileView(AsyncViewMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    def get_cache_tags(self, request, response):
+        return [profile_tag(self.kwargs["pk"])]
+
     @extend_schema(
         responses={200: CustomerProfileResponseSerializer},
         examples=[
@@ -210,8 +266,9 @@ class CustomerProfileView(APIView):
             )
         ],
     )
-    def get(self, request, pk: int):
-        customer = User.objects.filter(pk=pk, role="CUSTOMER").first()
+    @cache_response(scope=customer_profile_scope)
+    async def get(self, request, pk: int):
+        customer = await User.objects.filter(pk=pk, role="CUSTOMER").afirst()
         if not customer:
             return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
 
@@ -223,6 +280,6 @@ class CustomerProfileView(APIView):
 
         payload = {
             "customer": UserNonSensitiveSerializer(customer).data,
-            "ads": AdSummarySerializer(ads_qs, many=True).data,
+            "ads": StreamedList(ads_qs, AdSummarySerializer),
         }
-        return Response(payload, status=status.HTTP_200_OK)
+        return StreamingJSONResponse(payload, status=status.HTTP_200_OK, asynchronous=is_asgi(request))
@@ -11,6 +11,16 @@ class UserPublicSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
+class UserNonSensitiveSerializer(serializers.ModelSerializer):
+    """
+    Non-sensitive fields only (no email/phone).
+    """
+    class Meta:
+        model = User
+        fields = ("id", "username", "first_name", "last_name", "role")
+        read_only_fields = fields
+
+
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, min_length=6)
 
@@ -1,8 +1,21 @@
+import json
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from apps.ads.models import Ad
+from apps.reviews.models import Review
+
+from .filters import ContractorFilterSet
+from .models import ContractorCategoryStats, ContractorStats
+from .profile_views import contractors_with_stats_queryset
+
 User = get_user_model()
 
 
@@ -59,3 +72,217 @@ class RoleAssignmentTests(APITestCase):
         self.assertEqual(res.status_code, status.HTTP_200_OK)
         target2.refresh_from_db()
         self.assertEqual(target2.role, "CONTRACTOR")
+
+
+class ProfileStreamingTests(APITestCase):
+    def setUp(self):
+        # Cached responses of other tests were never invalidated (no commit)
+        cache.clear()
+        self.customer = User.objects.create_user(
+            username="customerP",
+            email="customerP@example.com",
+            phone="09000000010",
+            password="CustomerPass123",
+            role="CUSTOMER",
+        )
+        self.contractor = User.objects.create_user(
+            username="contractorP",
+            email="contractorP@example.com",
+            phone="09000000011",
+            password="ContractorPass123",
+            role="CONTRACTOR",
+        )
+        now = timezone.now()
+        for i in range(3):
+            ad = Ad.objects.create(
+                creator=self.customer,
+                title=f"Ad {i}",
+                description="Leaking",
+                status="DONE",
+                assigned_contractor=self.contractor,
+                work_reported_done_at=now,
+                completed_at=now,
+            )
+            Review.objects.create(ad=ad, author=self.customer, contractor=self.contractor, rating=4 + i % 2)
+        Ad.objects.create(creator=self.customer, title="Gone", description="Leaking", status="CANCELED")
+
+    def _get_json(self, url):
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        # Async views, but served through WSGI: a sync stream
+        self.assertFalse(res.is_async)
+        return json.loads(b"".join(res.streaming_content))
+
+    def test_customer_profile_streams_visible_ads(self):
+        self.client.force_authenticate(user=self.contractor)
+        body = self._get_json(reverse("customer-profile", kwargs={"pk": self.customer.id}))
+        self.assertEqual(body["customer"]["username"], "customerP")
+        self.assertEqual(len(body["ads"]), 3)
+        self.assertNotIn("CANCELED", {ad["status"] for ad in body["ads"]})
+
+    def test_contractor_profile_streams_ads_and_reviews(self):
+        self.client.force_authenticate(user=self.customer)
+        body = self._get_json(reverse("contractor-profile", kwargs={"pk": self.contractor.id}))
+        self.assertEqual(body["review_count"], 3)
+        self.assertEqual(len(body["completed_ads"]), 3)
+        self.assertEqual(len(body["reviews"]), 3)
+        self.assertEqual(body["reviews"][0]["author_username"], "customerP")
+
+    def test_contractor_profile_cache_follows_new_reviews(self):
+        self.client.force_authenticate(user=self.customer)
+        url = reverse("contractor-profile", kwargs={"pk": self.contractor.id})
+        self._get_json(url)
+
+        res = self.client.get(url)
+        self.assertEqual(res["X-Cache"], "HIT")
+        self.assertEqual(json.loads(res.content)["review_count"], 3)
+
+        ad = Ad.objects.filter(creator=self.customer, status="DONE").first()
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.filter(ad=ad).delete()
+        self.assertEqual(self._get_json(url)["review_count"], 2)
+
+
+class LeaderboardTests(APITestCase):
+    def setUp(self):
+        # Cached responses of other tests were never invalidated (no commit)
+        cache.clear()
+        self.customer = User.objects.create_user(
+            username="customerL",
+            email="customerL@example.com",
+            phone="09000000020",
+            password="CustomerPass123",
+            role="CUSTOMER",
+        )
+        self.newcomer = self._contractor("newcomer", "09000000021")
+        self.veteran = self._contractor("veteran", "09000000022")
+        self.idle = self._contractor("idle", "09000000023")
+        self._review(self.newcomer, 5)
+        for rating in [5] * 9 + [4]:
+            self._review(self.veteran, rating)
+
+    def _contractor(self, username, phone):
+        return User.objects.create_user(
+            username=username,
+            email=f"{username}@example.com",
+            phone=phone,
+            password="ContractorPass123",
+            role="CONTRACTOR",
+        )
+
+    def _review(self, contractor, rating, category=""):
+        now = timezone.now()
+        ad = Ad.objects.create(
+            creator=self.customer,
+            title="Fix",
+            category=category,
+            description="Leaking",
+            status="DONE",
+            assigned_contractor=contractor,
+            work_reported_done_at=now,
+            completed_at=now,
+        )
+        return Review.objects.create(ad=ad, author=self.customer, contractor=contractor, rating=rating)
+
+    def _usernames(self, ordering):
+        self.client.force_authenticate(user=self.customer)
+        res = self.client.get(reverse("contractor-list"), {"ordering": ordering})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [row["username"] for row in json.loads(res.content)["results"]]
+
+    def test_score_ranks_many_good_reviews_above_one_perfect(self):
+        self.assertEqual(self._usernames("-avg_rating"), ["newcomer", "veteran", "idle"])
+        self.assertEqual(self._usernames("-score"), ["veteran", "newcomer", "idle"])
+
+        stats = ContractorStats.objects.get(contractor=self.veteran)
+        self.assertEqual((stats.review_count, stats.rating_sum), (10, 49))
+        self.assertAlmostEqual(stats.score, (3.5 * 10 + 49) / 20)
+        self.assertAlmostEqual(ContractorStats.objects.get(contractor=self.idle).score, 3.5)
+
+    def test_rows_follow_review_writes(self):
+        review = self._review(self.newcomer, 1)
+        self.assertEqual(ContractorStats.objects.get(contractor=self.newcomer).review_count, 2)
+        review.ad.delete()
+        stats = ContractorStats.objects.get(contractor=self.newcomer)
+        self.assertEqual((stats.review_count, stats.rating_sum), (1, 5))
+
+    def test_rebuild_restores_drifted_rows(self):
+        ContractorStats.objects.update(review_count=0, rating_sum=0, score=0.0)
+        call_command("rebuild_leaderboard", stdout=StringIO())
+        self.assertEqual(ContractorStats.objects.get(contractor=self.veteran).rating_sum, 49)
+        self.assertAlmostEqual(ContractorStats.objects.get(contractor=self.newcomer).score, 40 / 11)
+
+    def test_filters_use_summary_columns(self):
+        self.client.force_authenticate(user=self.customer)
+        url = reverse("contractor-list")
+        res = self.client.get(url, {"min_avg_rating": 4.5, "min_review_count": 5})
+        self.assertEqual([row["username"] for row in json.loads(res.content)["results"]], ["veteran"])
+
+        res = self.client.get(url, {"min_completed_ads": 2})
+        self.assertEqual([row["username"] for row in json.loads(res.content)["results"]], ["veteran"])
+
+        queryset = ContractorFilterSet(
+            data={"min_avg_rating": 4.5, "min_review_count": 5}, queryset=contractors_with_stats_queryset()
+        ).qs
+        self.assertNotIn("HAVING", str(queryset.query))
+
+    def test_completed_ads_follow_ad_status(self):
+        now = timezone.now()
+        ad = Ad.objects.create(
+            creator=self.customer,
+            title="Paint",
+            description="Walls",
+            status="ASSIGNED",
+            assigned_contractor=self.idle,
+            work_reported_done_at=now,
+        )
+        self.assertEqual(ContractorStats.objects.get(contractor=self.idle).completed_ads_count, 0)
+
+        self.client.force_authenticate(user=self.customer)
+        res = self.client.post(reverse("ad-confirm-completion", kwargs={"pk": ad.id}))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(ContractorStats.objects.get(contractor=self.idle).completed_ads_count, 1)
+
+    def test_category_ranks_from_expertise_table(self):
+        for rating in (5, 5, 5):
+            self._review(self.newcomer, rating, category="Plumbing ")
+        self._review(self.veteran, 3, category="plumbing")
+        self._review(self.idle, 5, category="painting")
+        self.assertEqual(
+            set(ContractorCategoryStats.objects.filter(category="plumbing").values_list("contractor__username", "done_count")),
+            {("newcomer", 3), ("veteran", 1)},
+        )
+
+        self.client.force_authenticate(user=self.customer)
+        url = reverse("contractor-list")
+        with self.assertNumQueries(2):
+            rows = json.loads(self.client.get(url, {"category": "PLUMBING"}).content)["results"]
+        self.assertEqual([row["username"] for row in rows], ["newcomer", "veteran"])
+        self.assertEqual((rows[0]["category_done_count"], rows[0]["category_review_count"]), (3, 3))
+        self.assertAlmostEqual(rows[0]["category_score"], (3.5 * 10 + 15) / 13)
+        self.assertNotIn("category_score", json.loads(self.client.get(url).content)["results"][0])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.filter(contractor=self.newcomer, ad__category="Plumbing ").delete()
+        rows = json.loads(self.client.get(url, {"category": "plumbing"}).content)["results"]
+        self.assertEqual([row["username"] for row in rows], ["newcomer", "veteran"])
+        self.assertEqual(rows[0]["category_review_count"], 0)
+
+    def test_category_keys_match_the_filter_normalization(self):
+        # SQL LOWER/TRIM would leave "\tÉlectricité" and "ÉLECTRICITÉ" apart from the ?category= key
+        self._review(self.idle, 5, category="\tÉlectricité")
+        self._review(self.idle, 4, category="ÉLECTRICITÉ ")
+        row = ContractorCategoryStats.objects.get(contractor=self.idle)
+        self.assertEqual((row.category, row.done_count, row.rating_sum), ("électricité", 2, 9))
+
+        ContractorCategoryStats.objects.all().delete()
+        call_command("rebuild_leaderboard", stdout=StringIO())
+        self.assertEqual(
+            list(ContractorCategoryStats.objects.filter(contractor=self.idle).values_list("category", "done_count")),
+            [("électricité", 2)],
+        )
+
+        self.client.force_authenticate(user=self.customer)
+        rows = json.loads(self.client.get(reverse("contractor-list"), {"category": "Électricité"}).content)["results"]
+        self.assertEqual([row["username"] for row in rows], ["idle"])
@@ -3,6 +3,9 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve with an ASGI server (e.g. ``uvicorn config.asgi:application``) so the
+Server-Sent Events stream at /api/events/ doesn't tie up a worker per client.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -14,3 +17,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_asgi_application()
+
+# Evict in-process caches when another worker writes (apps.common.invalidation).
+# Started by each worker's first request, not here: a preloaded app is forked after import
+from apps.common.invalidation import start_listener_lazily  # noqa: E402
+
+start_listener_lazily()
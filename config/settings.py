@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -46,10 +47,12 @@ INSTALLED_APPS = [
     "django_filters",
 
     # Local
+    "apps.common",
     "apps.users",
     "apps.ads",
     "apps.reviews",
     "apps.tickets",
+    "apps.analytics",
 ]
 
 MIDDLEWARE = [
@@ -134,6 +137,9 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Keeps runtime files (RUNTIME_DIR) of test runs in a temporary directory
+TEST_RUNNER = "config.test_runner.TestRunner"
+
 
 AUTH_USER_MODEL = "users.User"
 
@@ -145,6 +151,12 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
+    "DEFAULT_RENDERER_CLASSES": (
+        "rest_framework.renderers.JSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+        # Opt-in compact list format: Accept: application/vnd.columnar+json
+        "apps.common.renderers.ColumnarJSONRenderer",
+    ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
 
     # Nice-to-have defaults
@@ -181,3 +193,54 @@ SPECTACULAR_SETTINGS = {
         }
     },
 }
+
+
+# Ads maintenance
+# OPEN ads older than this are canceled by `manage.py expire_open_ads`
+ADS_OPEN_EXPIRY_DAYS = 30
+ADS_EXPIRY_CHUNK_SIZE = 500
+# Scheduled jobs (`manage.py run_jobs`): auto-confirm reported-done ads, remind before scheduled_at
+ADS_AUTO_CONFIRM_AFTER_HOURS = 72
+ADS_REMINDER_BEFORE_HOURS = 24
+# Near-duplicate detection on ad creation (apps.ads.dedup): estimated Jaccard similarity
+# of title+description shingles, and what to do about the creator's own OPEN duplicates
+# vs other customers' ones: "block", "hint" or "off"
+ADS_DUPLICATE_THRESHOLD = 0.8
+ADS_DUPLICATE_OWN_POLICY = "hint"
+ADS_DUPLICATE_OTHERS_POLICY = "hint"
+
+# Contractor leaderboard (apps.users.leaderboard): score = Bayesian average with this
+# many virtual reviews of this rating; run `manage.py rebuild_leaderboard` after changing them
+LEADERBOARD_PRIOR_RATING = 3.5
+LEADERBOARD_PRIOR_WEIGHT = 10
+
+# Contractor feed (apps.ads.feed): newest OPEN ads scored, weight of category affinity
+# vs recency, and how fast recency decays
+FEED_CANDIDATE_WINDOW = 500
+FEED_AFFINITY_WEIGHT = 0.7
+FEED_RECENCY_HALF_LIFE_HOURS = 48
+
+# Support work queue (apps.tickets.queue): how long a claimed OPEN ticket stays reserved
+# for its agent before it goes back to the queue
+TICKET_CLAIM_LEASE_SECONDS = 900
+
+# Support SLA (apps.analytics): relative accuracy of the time-to-first-response percentiles;
+# sketches of different accuracy don't merge, so run `manage.py backfill_rollups` after changing it
+SLA_SKETCH_RELATIVE_ACCURACY = 0.01
+
+# Response cache (apps.common.cache): cache alias and entry lifetime in seconds
+RESPONSE_CACHE_ALIAS = "default"
+RESPONSE_CACHE_TIMEOUT = 300
+# Single-flight views may serve an entry this long past its lifetime while one caller
+# recomputes it; the lock files live in SINGLE_FLIGHT_LOCK_DIR (shared by the host's workers)
+RESPONSE_CACHE_STALE_TIMEOUT = 60
+
+# Host-local runtime files shared by this host's workers, kept out of the source tree;
+# the test runner (config.test_runner) points them at a throwaway directory
+RUNTIME_DIR = Path(tempfile.gettempdir()) / "hw2-backend"
+SINGLE_FLIGHT_LOCK_DIR = RUNTIME_DIR / "singleflight"
+
+# Cross-process invalidation bus (apps.common.invalidation): shared SQLite log for
+# evicting in-process caches on every worker of this host
+INVALIDATION_BUS_PATH = RUNTIME_DIR / "invalidation.sqlite3"
+INVALIDATION_POLL_INTERVAL = 0.5
@@ -0,0 +1,26 @@
+"""
+Test runner: like Django's, but the host-local runtime files (single-flight
+lock files, invalidation bus log) go to a throwaway directory instead of the
+shared RUNTIME_DIR, so test runs neither see nor leave behind a live host's files.
+"""
+import os
+import tempfile
+
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._runtime_dir = tempfile.TemporaryDirectory(prefix="test-runtime-")
+        self._runtime_settings = override_settings(
+            SINGLE_FLIGHT_LOCK_DIR=os.path.join(self._runtime_dir.name, "singleflight"),
+            INVALIDATION_BUS_PATH=os.path.join(self._runtime_dir.name, "invalidation.sqlite3"),
+        )
+        self._runtime_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._runtime_settings.disable()
+        self._runtime_dir.cleanup()
+        super().teardown_test_environment(**kwargs)
@@ -21,4 +21,6 @@ urlpatterns = [
     path("api/ads/", include("apps.ads.urls")),
     path("api/reviews/", include("apps.reviews.urls")),
     path("api/tickets/", include("apps.tickets.urls")),
+    path("api/analytics/", include("apps.analytics.urls")),
+    path("api/", include("apps.common.urls")),
 ]
@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# Evict in-process caches when another worker writes (apps.common.invalidation).
+# Started by each worker's first request, not here: a preloaded app is forked after import
+from apps.common.invalidation import start_listener_lazily  # noqa: E402
+
+start_listener_lazily()